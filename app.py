@@ -1,31 +1,39 @@
 #!/usr/bin/env python3
 import aws_cdk as cdk
 
-from stacks.data_analytics.data_analytics_stack import DataAnalyticsStack
-from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
-from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+from lib.manifest import load_manifest, expand_manifest
 
 
-env_EU = cdk.Environment(region='eu-north-1')
-
 app = cdk.App()
 
-data_analytics_stack = DataAnalyticsStack(
-    scope=app,
-    construct_id='DataAnalyticsStack',
-    env=env_EU
-)
-
-energy_efficiency_stack = EnergyEfficiencyStack(
-    scope=app,
-    construct_id='EnergyEfficiencyStack',
-    env=env_EU
-)
-
-smart_traffic_stack = SmartTrafficStack(
-    scope=app,
-    construct_id='SmartTrafficStack',
-    env=env_EU
-)
+# cdk synth -c manifest=cities.json deploys the stacks of each city of the manifest in its region
+manifest = app.node.try_get_context('manifest')
+
+if manifest:
+    expand_manifest(app, load_manifest(manifest))
+else:
+    from stacks.data_analytics.data_analytics_stack import DataAnalyticsStack
+    from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+    from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+
+    env_EU = cdk.Environment(region='eu-north-1')
+
+    data_analytics_stack = DataAnalyticsStack(
+        scope=app,
+        construct_id='DataAnalyticsStack',
+        env=env_EU
+    )
+
+    energy_efficiency_stack = EnergyEfficiencyStack(
+        scope=app,
+        construct_id='EnergyEfficiencyStack',
+        env=env_EU
+    )
+
+    smart_traffic_stack = SmartTrafficStack(
+        scope=app,
+        construct_id='SmartTrafficStack',
+        env=env_EU
+    )
 
 app.synth()
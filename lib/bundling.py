@@ -0,0 +1,333 @@
+"""
+Bundling of the Lambda functions and layers
+
+The code of a function is its folder, with the packages of its requirements.txt installed next to it. The
+bundles are built on the host when it can: pip downloads the manylinux wheels of the Lambda runtime and
+architecture into a cache keyed by the hash of the requirements, so that a synth only installs a set of
+requirements once, without Docker. When pip cannot install them (no network, no wheel for the platform),
+the bundle is built in the bundling image of the runtime, as the PythonFunction construct does.
+
+The packages of the functions are bundled apart from their code, in a layer per set of requirements: the asset
+of that layer only depends on the requirements.txt, the runtime and the architecture, so the functions with
+the same requirements, in any stack, share one asset, uploaded once to the content-addressed bootstrap bucket,
+and the asset of each function is only its code.
+
+The bundles only carry what the functions import: the packages provided by the Lambda runtime are removed
+when a requirement pulls them in, the local caches of the sources are excluded, and the Python files are
+compiled for the runtime. The code of a function is read-only in Lambda, without the .pyc files every
+cold start compiles the modules it imports again; unchecked-hash .pyc files do not depend on the timestamps
+of the files, which the asset zip does not keep.
+
+References:
+  - AWS Doc:
+      - aws_cdk.ILocalBundling: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk/ILocalBundling.html
+      - aws_cdk.BundlingOptions: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk/BundlingOptions.html
+      - aws_lambda.Code.from_asset: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_lambda/Code.html#aws_cdk.aws_lambda.Code.from_asset
+      - Working with layers for Python Lambda functions: https://docs.aws.amazon.com/lambda/latest/dg/python-layers.html
+      - Working with .zip file archives for Python Lambda functions: https://docs.aws.amazon.com/lambda/latest/dg/python-package.html
+      - Lambda runtimes, included SDK: https://docs.aws.amazon.com/lambda/latest/dg/lambda-runtimes.html
+      - pip install --platform: https://pip.pypa.io/en/stable/cli/pip_install/#cmdoption-platform
+      - Cached bytecode invalidation: https://docs.python.org/3/library/py_compile.html#py_compile.PycInvalidationMode
+"""
+
+import os
+import sys
+import shutil
+import fnmatch
+import hashlib
+import tempfile
+import subprocess
+from typing import Optional
+
+import jsii
+from aws_cdk import (
+    BundlingOptions,
+    ILocalBundling,
+    aws_lambda as lambda_
+)
+
+
+# Provided by the Lambda Python runtime
+RUNTIME_PROVIDED_PACKAGES = ('boto3', 'botocore', 's3transfer', 'jmespath')
+
+# Files of the sources that are never imported by the functions
+ASSET_EXCLUDES = ['__pycache__', '*.pyc', '.pytest_cache', 'tests']
+
+BUNDLE_CACHE_DIR = os.environ.get(
+    'BUNDLE_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), '.bundle-cache')
+)
+
+PIP_PLATFORMS = {
+    'x86_64': 'manylinux2014_x86_64',
+    'arm64': 'manylinux2014_aarch64'
+}
+
+
+def runtime_python_version(runtime: lambda_.Runtime) -> str:
+    """
+    Version of Python of the runtime, e.g. "3.8" for python3.8
+
+    :param runtime:
+    :return: str
+    """
+
+    return runtime.name[len('python'):]
+
+
+def requirements_hash(requirements_path: str, runtime: lambda_.Runtime, architecture: lambda_.Architecture) -> str:
+    """
+    Key of the packages installed from the requirements for the runtime and architecture
+
+    :param requirements_path:
+    :param runtime:
+    :param architecture:
+    :return: str
+    """
+
+    with open(requirements_path, 'rb') as f:
+        requirements = f.read()
+
+    digest = hashlib.sha256(requirements)
+    digest.update(f'{runtime.name}/{architecture.name}'.encode())
+
+    return digest.hexdigest()
+
+
+def install_requirements(requirements_path: str, target_dir: str, runtime: lambda_.Runtime,
+                         architecture: lambda_.Architecture) -> bool:
+    """
+    Install the wheels of the requirements for the runtime and architecture, whatever the host
+
+    :param requirements_path:
+    :param target_dir:
+    :param runtime:
+    :param architecture:
+    :return: bool, whether pip installed them
+    """
+
+    result = subprocess.run(
+        [
+            sys.executable, '-m', 'pip', 'install',
+            '--requirement', requirements_path,
+            '--target', target_dir,
+            '--platform', PIP_PLATFORMS[architecture.name],
+            '--implementation', 'cp',
+            '--python-version', runtime_python_version(runtime),
+            '--only-binary=:all:',
+            '--quiet',
+            '--disable-pip-version-check',
+            '--no-compile'
+        ],
+        capture_output=True,
+        text=True
+    )
+
+    if result.returncode != 0:
+        print(f'pip could not install {requirements_path} for {runtime.name}/{architecture.name}: '
+              f'{result.stderr.strip()}')
+
+    return result.returncode == 0
+
+
+def get_dependencies(requirements_path: str, runtime: lambda_.Runtime, architecture: lambda_.Architecture,
+                     cache_dir: str = BUNDLE_CACHE_DIR) -> Optional[str]:
+    """
+    Directory of the packages installed from the requirements, installed on the first call only
+
+    :param requirements_path:
+    :param runtime:
+    :param architecture:
+    :param cache_dir:
+    :return: str, None when they cannot be installed on the host
+    """
+
+    dependencies_dir = os.path.join(cache_dir, requirements_hash(requirements_path, runtime, architecture))
+
+    if os.path.isdir(dependencies_dir):
+        return dependencies_dir
+
+    os.makedirs(cache_dir, exist_ok=True)
+    install_dir = tempfile.mkdtemp(dir=cache_dir, prefix='.install-')
+
+    if not install_requirements(requirements_path, install_dir, runtime, architecture):
+        shutil.rmtree(install_dir, ignore_errors=True)
+        return None
+
+    remove_runtime_provided_packages(install_dir)
+
+    # Another synth may have installed the same requirements in the meantime
+    try:
+        os.rename(install_dir, dependencies_dir)
+    except OSError:
+        shutil.rmtree(install_dir, ignore_errors=True)
+
+    return dependencies_dir
+
+
+def remove_runtime_provided_packages(directory: str) -> None:
+    for name in os.listdir(directory):
+        package = name.split('-')[0]
+
+        if package in RUNTIME_PROVIDED_PACKAGES and (name == package or name.endswith('.dist-info')):
+            shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def is_excluded(name: str) -> bool:
+    return any(fnmatch.fnmatch(name, pattern) for pattern in ASSET_EXCLUDES)
+
+
+@jsii.implements(ILocalBundling)
+class LocalPythonBundling:
+    """
+    Bundle of a function, or of a layer with output_path_suffix="python", built on the host.
+    With with_requirements=False the requirements.txt of the sources is not installed, a layer carries them
+    """
+
+    def __init__(self, entry: str, runtime: lambda_.Runtime, architecture: lambda_.Architecture,
+                 output_path_suffix: str = '', cache_dir: str = BUNDLE_CACHE_DIR, with_requirements: bool = True):
+        self.entry = entry
+        self.runtime = runtime
+        self.architecture = architecture
+        self.output_path_suffix = output_path_suffix
+        self.cache_dir = cache_dir
+        self.with_requirements = with_requirements
+
+    def try_bundle(self, output_dir: str, options: BundlingOptions = None) -> bool:
+        bundle_dir = os.path.join(output_dir, self.output_path_suffix)
+        requirements_path = os.path.join(self.entry, 'requirements.txt')
+
+        dependencies_dir = None
+
+        if self.with_requirements and os.path.isfile(requirements_path):
+            dependencies_dir = get_dependencies(requirements_path, self.runtime, self.architecture, self.cache_dir)
+
+            if dependencies_dir is None:
+                print(f'Bundling {self.entry} with Docker')
+                return False
+
+        if dependencies_dir is not None:
+            shutil.copytree(dependencies_dir, bundle_dir, dirs_exist_ok=True)
+
+        shutil.copytree(
+            self.entry,
+            bundle_dir,
+            ignore=lambda directory, names: [name for name in names if is_excluded(name)],
+            dirs_exist_ok=True
+        )
+
+        # The .pyc files are specific to the version of Python, the runtime compiles them otherwise
+        if sys.version_info[:2] == tuple(int(part) for part in runtime_python_version(self.runtime).split('.')):
+            subprocess.run(
+                [sys.executable, '-m', 'compileall', '-q', '--invalidation-mode', 'unchecked-hash', bundle_dir],
+                check=True
+            )
+
+        return True
+
+
+def slim_bundle_commands(output_dir: str) -> list[str]:
+    """
+    Shell commands removing the runtime-provided packages from the bundle and compiling it
+
+    :param output_dir:
+    :return: list of commands
+    """
+
+    packages = ' '.join(
+        f'{output_dir}/{package} {output_dir}/{package}-*.dist-info'
+        for package in RUNTIME_PROVIDED_PACKAGES
+    )
+
+    return [
+        f'rm -rf {packages}',
+        f'python -m compileall -q --invalidation-mode unchecked-hash {output_dir}'
+    ]
+
+
+def docker_bundling_command(output_path_suffix: str = '', with_requirements: bool = True) -> list[str]:
+    """
+    Command building the bundle in the bundling image of the runtime
+
+    :param output_path_suffix:
+    :param with_requirements: install the requirements.txt of the sources
+    :return: list
+    """
+
+    output_dir = os.path.join('/asset-output', output_path_suffix).rstrip('/')
+
+    commands = [
+        f'cp -rT /asset-input {output_dir}',
+        *slim_bundle_commands(output_dir)
+    ]
+
+    if with_requirements:
+        commands.insert(
+            0,
+            f'if [ -f requirements.txt ]; then pip install --requirement requirements.txt --target {output_dir}; fi'
+        )
+
+    return ['bash', '-c', ' && '.join(commands)]
+
+
+def get_code(entry: str, runtime: lambda_.Runtime, architecture: lambda_.Architecture,
+             output_path_suffix: str = '', with_requirements: bool = True) -> lambda_.Code:
+    """
+    Code of a function, or of a layer with output_path_suffix="python", bundled on the host when it can
+
+    :param entry: folder of the sources, with the requirements.txt of the function
+    :param runtime:
+    :param architecture:
+    :param output_path_suffix:
+    :param with_requirements: install the requirements.txt of the sources, False when a layer carries them
+    :return: lambda_.Code
+    """
+
+    return lambda_.Code.from_asset(
+        entry,
+        exclude=ASSET_EXCLUDES,
+        bundling=BundlingOptions(
+            image=runtime.bundling_image,
+            platform=architecture.docker_platform,
+            command=docker_bundling_command(output_path_suffix, with_requirements),
+            local=LocalPythonBundling(entry, runtime, architecture, output_path_suffix,
+                                      with_requirements=with_requirements)
+        )
+    )
+
+
+def stage_requirements(requirements_path: str, runtime: lambda_.Runtime, architecture: lambda_.Architecture,
+                       cache_dir: str = BUNDLE_CACHE_DIR) -> str:
+    """
+    Copy the requirements alone in a folder named after their key, the sources of their layer:
+    the same requirements give the same sources, whatever the function they come from
+
+    :param requirements_path:
+    :param runtime:
+    :param architecture:
+    :param cache_dir:
+    :return: str, path of the folder
+    """
+
+    requirements_dir = os.path.join(
+        cache_dir, 'requirements', requirements_hash(requirements_path, runtime, architecture)
+    )
+    os.makedirs(requirements_dir, exist_ok=True)
+    shutil.copyfile(requirements_path, os.path.join(requirements_dir, 'requirements.txt'))
+
+    return requirements_dir
+
+
+def get_requirements_code(requirements_path: str, runtime: lambda_.Runtime,
+                          architecture: lambda_.Architecture) -> lambda_.Code:
+    """
+    Code of the layer of the packages of the requirements, under /opt/python
+
+    :param requirements_path:
+    :param runtime:
+    :param architecture:
+    :return: lambda_.Code
+    """
+
+    return get_code(stage_requirements(requirements_path, runtime, architecture), runtime, architecture,
+                    output_path_suffix='python')
@@ -8,6 +8,15 @@ References:
         - aws_ec2.InstanceSize: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/InstanceSize.html
         - aws_ec2.SecurityGroup: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/SecurityGroup.html#aws_cdk.aws_ec2.SecurityGroup
         - aws_s3.Bucket: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_s3/Bucket.html
+        - aws_rds.DatabaseProxy: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/DatabaseProxy.html
+        - aws_sqs.Queue: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_sqs/Queue.html
+        - aws_kinesis.Stream: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_kinesis/Stream.html
+        - aws_autoscaling.AutoScalingGroup: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_autoscaling/AutoScalingGroup.html
+        - aws_elasticloadbalancingv2.NetworkLoadBalancer: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_elasticloadbalancingv2/NetworkLoadBalancer.html
+        - aws_imagebuilder.CfnImagePipeline: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_imagebuilder/CfnImagePipeline.html
+        - aws_kinesisfirehose.CfnDeliveryStream: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_kinesisfirehose/CfnDeliveryStream.html
+        - aws_lambda.Alias: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_lambda/Alias.html
+        - aws_applicationautoscaling.Schedule: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_applicationautoscaling/Schedule.html
 """
 
 from dataclasses import dataclass
@@ -19,7 +28,11 @@ from aws_cdk import (
     aws_rds as rds,
     aws_lambda as lambda_,
     aws_iam as iam,
-    aws_s3 as s3
+    aws_s3 as s3,
+    aws_kinesis as kinesis,
+    aws_autoscaling as autoscaling,
+    aws_applicationautoscaling as appscaling,
+    aws_cloudwatch as cloudwatch
 )
 
 
@@ -67,6 +80,22 @@ class DbConfig:
     delete_automated_backups: bool = True
     security_groups: list[ec2.SecurityGroup] = None
     credentials: rds.Credentials = None
+    read_replicas: int = 0
+
+
+@dataclass
+class DbProxyConfig:
+    db_instance: rds.DatabaseInstance
+    vpc: ec2.Vpc
+    vpc_subnet_id: str
+    id: str = 'rds-proxy'
+    name: str = 'RdsProxy'
+    max_connections_percent: int = 90
+    max_idle_connections_percent: int = 50
+    borrow_timeout: Duration = Duration.seconds(30)
+    idle_client_timeout: Duration = Duration.minutes(30)
+    require_tls: bool = False
+    security_groups: list[ec2.SecurityGroup] = None
 
 
 @dataclass
@@ -83,8 +112,52 @@ class LambdaConfig:
     timeout: Duration = Duration.seconds(300)
     memory_size: int = 256
     environment: dict = None
-    security_groups: list[ec2.SecurityGroup] = None,
+    security_groups: list[ec2.SecurityGroup] = None
     role: iam.Role = None
+    layers: list[lambda_.ILayerVersion] = None
+    reserved_concurrent_executions: int = None
+    # ARM_64 runs on Graviton, the dependencies are bundled with the wheels of the architecture
+    architecture: lambda_.Architecture = lambda_.Architecture.X86_64
+    # Fetch the secret and open the connection during the init of every environment,
+    # the provisioned ones always do it
+    warmup_on_init: bool = False
+    # Install the requirements.txt of the function in a layer shared by the functions with the same
+    # requirements, the package of the function is only its code
+    requirements_layer: bool = True
+
+
+@dataclass
+class ProvisionedConcurrencySchedule:
+    id: str
+    # Cron expressions are evaluated in UTC
+    schedule: appscaling.Schedule
+    min_capacity: int
+    max_capacity: int = None
+
+
+@dataclass
+class LambdaAliasConfig:
+    id: str
+    name: str = 'live'
+    description: str = None
+    # Environments initialized ahead of the invocations, at most the reserved concurrency of the function
+    provisioned_concurrency: int = 0
+    # Scheduled changes of the provisioned concurrency, e.g. raised before the rush hours
+    schedules: list[ProvisionedConcurrencySchedule] = None
+    # Tracks the utilization of the provisioned environments between the scheduled capacities
+    utilization_target: float = None
+    max_provisioned_concurrency: int = None
+
+
+@dataclass
+class LambdaLayerConfig:
+    id: str
+    name: str
+    description: str
+    code_folder_path: str
+    compatible_runtimes: list[lambda_.Runtime] = None
+    # The layer is bundled for the first architecture
+    compatible_architectures: list[lambda_.Architecture] = None
 
 
 @dataclass
@@ -94,13 +167,73 @@ class Ec2Config:
     vpc_subnet_id: str
     instance_class: ec2.InstanceClass = ec2.InstanceClass.T3
     instance_size: ec2.InstanceSize = ec2.InstanceSize.MICRO
-    machine_image: ec2.IMachineImage = ec2.MachineImage.latest_amazon_linux2023()
+    # Latest Amazon Linux 2023 for the architecture of the instance class by default
+    machine_image: ec2.IMachineImage = None
     security_group: ec2.SecurityGroup = None
     role: iam.Role = None
     key_name: str = None
     private_ip_address: str = None
 
 
+@dataclass
+class AsgConfig:
+    id: str
+    vpc: ec2.Vpc
+    vpc_subnet_id: str
+    instance_class: ec2.InstanceClass = ec2.InstanceClass.T3
+    instance_size: ec2.InstanceSize = ec2.InstanceSize.MICRO
+    # Latest Amazon Linux 2023 for the architecture of the instance class by default
+    machine_image: ec2.IMachineImage = None
+    security_group: ec2.SecurityGroup = None
+    role: iam.Role = None
+    key_name: str = None
+    min_capacity: int = 1
+    max_capacity: int = 4
+    desired_capacity: int = None
+    # Target tracking: the group scales to keep the average CPU of its instances,
+    # and/or the value of scaling_metric (e.g. the depth of a queue), at the target
+    target_cpu_utilization: int = 60
+    scaling_metric: cloudwatch.IMetric = None
+    scaling_metric_target: float = None
+    # Time for a new instance to boot and start its service before it is counted in the metrics
+    default_instance_warmup: Duration = Duration.minutes(5)
+    # The instances failing the health checks of their load balancer are replaced, not only the stopped ones
+    elb_health_check: bool = False
+    health_check_grace_period: Duration = Duration.minutes(5)
+
+
+@dataclass
+class LoadBalancerConfig:
+    id: str
+    vpc: ec2.Vpc
+    vpc_subnet_id: str
+    port: int
+    targets: list[autoscaling.AutoScalingGroup]
+    health_check_interval: Duration = Duration.seconds(10)
+    deregistration_delay: Duration = Duration.seconds(30)
+
+
+@dataclass
+class ImagePipelineConfig:
+    id: str
+    name: str
+    description: str
+    # Bash commands of the build phase, run once per image instead of at every boot
+    build_commands: list[str]
+    # The recipe of an existing version cannot change, the version must be increased with the commands
+    version: str = '1.0.0'
+    # The build instances must have the architecture of the parent image
+    parent_image: ec2.IMachineImage = ec2.MachineImage.latest_amazon_linux2023()
+    instance_types: list[str] = None
+    vpc: ec2.Vpc = None
+    vpc_subnet_id: str = None
+    security_group: ec2.SecurityGroup = None
+    # Permissions of the build instance, e.g. to read the secrets needed by the build commands
+    policy_statements: list[iam.PolicyStatement] = None
+    # Cron expression of the Image Builder schedule, the pipeline only runs on demand without it
+    schedule_expression: str = None
+
+
 @dataclass
 class BastionHostConfig:
     vpc: ec2.Vpc
@@ -126,4 +259,63 @@ class IamRoleConfig:
 class S3Config:
     id: str
     removal_policy: RemovalPolicy = RemovalPolicy.DESTROY
-    block_public_access: s3.BlockPublicAccess = s3.BlockPublicAccess.BLOCK_ALL
\ No newline at end of file
+    block_public_access: s3.BlockPublicAccess = s3.BlockPublicAccess.BLOCK_ALL
+    auto_delete_objects: bool = False
+    lifecycle_rules: list[s3.LifecycleRule] = None
+
+
+@dataclass
+class SqsConfig:
+    id: str
+    name: str
+    # At least 6 times the timeout of the consuming function, as advised for the Lambda event sources
+    visibility_timeout: Duration = Duration.seconds(360)
+    retention_period: Duration = Duration.days(4)
+    # Receives of a message before it is moved to the dead-letter queue
+    max_receive_count: int = 5
+    dlq_retention_period: Duration = Duration.days(14)
+
+
+@dataclass
+class KinesisStreamConfig:
+    id: str
+    name: str
+    # Each shard takes 1 MB/s or 1000 records/s in and is read by one worker at a time,
+    # not used in on-demand mode
+    shard_count: int = 1
+    stream_mode: kinesis.StreamMode = kinesis.StreamMode.PROVISIONED
+    retention_period: Duration = Duration.hours(24)
+    encryption: kinesis.StreamEncryption = kinesis.StreamEncryption.MANAGED
+
+
+@dataclass
+class FirehoseConfig:
+    id: str
+    name: str
+    source_stream: kinesis.IStream
+    destination_bucket: s3.IBucket
+    # Firehose expressions such as !{timestamp:yyyy/MM/dd} partition the objects of the bucket
+    prefix: str = ''
+    error_output_prefix: str = 'errors/!{firehose:error-output-type}/'
+    buffering_interval: Duration = Duration.seconds(300)
+    buffering_size_mib: int = 5
+    compression_format: str = 'GZIP'
+
+
+@dataclass
+class SshKeyConfig:
+    id: str
+    key_name: str
+    key_format: str = 'pem'
+    key_type: str = 'rsa'
+
+
+@dataclass
+class CityConfig:
+    # Prefixes the construct ids (lowercase) and the names (as is) of the resources of the city
+    name: str
+    region: str
+    # Keys of lib.synth.STACKS, every stack when None
+    stacks: list[str] = None
+    # Keyword arguments of the stacks sizing them: db_instance_size, lambda_memory_size, ec2_min_capacity, ...
+    capacity: dict = None
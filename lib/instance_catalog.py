@@ -0,0 +1,149 @@
+"""
+Offline catalog of the EC2 instance types and RDS instance classes offered per region
+
+The factories of lib/services.py check their instance types against instance_catalog.json at synth time,
+so that a class or size missing in the region fails the synth instead of the deployment. Regions missing
+from the catalog, and stacks without region, are not checked. The catalog is refreshed with:
+
+    python -m lib.instance_catalog eu-north-1 eu-central-1 ...
+
+References:
+  - AWS Doc:
+      - describe-instance-type-offerings: https://docs.aws.amazon.com/cli/latest/reference/ec2/describe-instance-type-offerings.html
+      - describe-orderable-db-instance-options: https://docs.aws.amazon.com/cli/latest/reference/rds/describe-orderable-db-instance-options.html
+      - AWS Graviton processors: https://aws.amazon.com/ec2/graviton/
+"""
+
+import os
+import sys
+import json
+import functools
+from typing import Optional
+
+from aws_cdk import (
+    Stack,
+    Token,
+    aws_ec2 as ec2
+)
+
+
+CATALOG_PATH = os.path.join(os.path.dirname(__file__), 'instance_catalog.json')
+
+SERVICES = ('ec2', 'rds')
+
+
+@functools.lru_cache(maxsize=None)
+def load_catalog(path: str = CATALOG_PATH) -> dict:
+    """
+    Read the catalog: {region: {"ec2" | "rds": {family: [sizes]}}}
+
+    :param path:
+    :return: dict
+    """
+
+    with open(path) as f:
+        return json.load(f)
+
+
+def is_offered(region: str, service: str, instance_type: str, path: str = CATALOG_PATH) -> Optional[bool]:
+    """
+    Tell whether the instance type, e.g. "m6i.large", is offered in the region
+
+    :param region:
+    :param service: "ec2" or "rds"
+    :param instance_type:
+    :param path:
+    :return: bool, None when the region is not in the catalog
+    """
+
+    offerings = load_catalog(path).get(region)
+
+    if offerings is None:
+        return None
+
+    family, _, size = instance_type.partition('.')
+
+    return size in offerings.get(service, {}).get(family, [])
+
+
+def validate_instance_type(scope, instance_type: ec2.InstanceType, service: str = 'ec2') -> None:
+    """
+    Fail the synth when the instance type is not offered in the region of the stack of the scope
+
+    :param scope:
+    :param instance_type:
+    :param service: "ec2" or "rds"
+    :return:
+    """
+
+    region = Stack.of(scope).region
+
+    if Token.is_unresolved(region):
+        return
+
+    if is_offered(region, service, instance_type.to_string()) is False:
+        prefix = 'db.' if service == 'rds' else ''
+
+        raise ValueError(
+            f'{service.upper()} instance type {prefix}{instance_type.to_string()} is not offered in {region}, '
+            f'see lib/instance_catalog.json'
+        )
+
+
+def fetch_offerings(region: str) -> dict:
+    """
+    List the instance types offered in the region, with the AWS credentials of the environment
+
+    :param region:
+    :return: {"ec2": {family: [sizes]}, "rds": {family: [sizes]}}
+    """
+
+    # Only needed to refresh the catalog, not to synth
+    import boto3
+
+    offerings = {service: {} for service in SERVICES}
+
+    paginator = boto3.client('ec2', region_name=region).get_paginator('describe_instance_type_offerings')
+    for page in paginator.paginate(LocationType='region'):
+        for offering in page['InstanceTypeOfferings']:
+            family, _, size = offering['InstanceType'].partition('.')
+            offerings['ec2'].setdefault(family, []).append(size)
+
+    paginator = boto3.client('rds', region_name=region).get_paginator('describe_orderable_db_instance_options')
+    for page in paginator.paginate(Engine='mysql'):
+        for option in page['OrderableDBInstanceOptions']:
+            family, _, size = option['DBInstanceClass'][len('db.'):].partition('.')
+            sizes = offerings['rds'].setdefault(family, [])
+            if size not in sizes:
+                sizes.append(size)
+
+    return {
+        service: {family: sorted(sizes) for family, sizes in sorted(families.items())}
+        for service, families in offerings.items()
+    }
+
+
+def refresh_catalog(regions: list[str], path: str = CATALOG_PATH) -> None:
+    """
+    Replace the offerings of the regions in the catalog, the other regions are kept
+
+    :param regions:
+    :param path:
+    :return:
+    """
+
+    catalog = dict(load_catalog(path))
+
+    for region in regions:
+        print(f'Fetching the offerings of {region}')
+        catalog[region] = fetch_offerings(region)
+
+    with open(path, 'w') as f:
+        json.dump(dict(sorted(catalog.items())), f, indent=2)
+        f.write('\n')
+
+    load_catalog.cache_clear()
+
+
+if __name__ == '__main__':
+    refresh_catalog(sys.argv[1:])
@@ -0,0 +1,17 @@
+"""
+Shared runtime of the FuturaCity Lambda functions, deployed as a Lambda layer.
+
+The handlers only define the table they serve, the runtime provides the connection
+kept across warm invocations, the cached database secret, the responses and the timing metrics.
+"""
+
+from .tables import Table
+from .responses import make_response, encode_response
+from .secret import get_secret
+from .db import get_connection, close_connection, execute_with_retry, run_in_transaction
+from .replicas import execute_on_reader
+from .timing import instrumented, timer
+from .events import proxy_integration
+from .cache import invalidate_cache
+from .warmup import warm_up, warm_up_on_init
+from .handlers import read_handler, write_handler, consume_handler, init_handler
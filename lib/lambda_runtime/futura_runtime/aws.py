@@ -0,0 +1,43 @@
+"""
+AWS clients of the runtime, imported on first use
+
+boto3 is most of the import time of a handler (python -X importtime), and the Lambda runtime provides it:
+it is imported with the first client instead of at the import of every handler, and the functions do not
+bundle it. The handlers that reach AWS only on some requests (exports, cache flushes) never pay for it otherwise.
+
+References:
+    - Lambda runtimes, included SDK: https://docs.aws.amazon.com/lambda/latest/dg/lambda-runtimes.html
+    - Python -X importtime: https://docs.python.org/3/using/cmdline.html#cmdoption-X
+"""
+
+
+def create_client(service_name: str, config: dict = None):
+    """
+    Create a client of the service, importing boto3 on the first call
+
+    :param service_name:
+    :param config: options of botocore.config.Config, e.g. connect_timeout and retries
+    :return: botocore client
+    """
+
+    import boto3
+
+    if config is None:
+        return boto3.client(service_name)
+
+    from botocore.config import Config
+
+    return boto3.client(service_name, config=Config(**config))
+
+
+def aws_errors() -> tuple:
+    """
+    Exceptions raised by the AWS clients, for the except clauses: the expression of an except clause
+    is only evaluated when an exception reaches it, so botocore is not imported before a client is used
+
+    :return: (BotoCoreError, ClientError)
+    """
+
+    from botocore.exceptions import BotoCoreError, ClientError
+
+    return BotoCoreError, ClientError
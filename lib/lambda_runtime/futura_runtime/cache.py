@@ -0,0 +1,87 @@
+"""
+Invalidation of the API Gateway cache of the read endpoints after a write
+
+The functions run in isolated subnets, and the API Gateway management API (FlushStageCache) has no VPC
+endpoint: they invoke asynchronously, through the Lambda VPC endpoint, the function of the API stack
+flushing the cache from outside the VPC (stacks/api_gateway/lambda_cache_flush). It is named
+CACHE_FLUSH_FUNCTION, its ARN cannot be passed to the function without a dependency cycle between the
+function and the API integrating it.
+
+References:
+    - Enabling API caching: https://docs.aws.amazon.com/apigateway/latest/developerguide/api-gateway-caching.html
+    - Invoke, InvocationType Event: https://docs.aws.amazon.com/lambda/latest/dg/API_Invoke.html
+    - botocore Config: https://botocore.amazonaws.com/v1/documentation/api/latest/reference/config.html
+"""
+
+import os
+import time
+
+from .aws import create_client, aws_errors
+
+
+CACHE_FLUSH_FUNCTION = os.environ.get('CACHE_FLUSH_FUNCTION')
+# Under a steady flow of writes the cache is flushed at most this often, the TTL bounds the staleness in between.
+# Failed attempts count as well: an unreachable endpoint costs one timeout per interval, not one per write
+CACHE_FLUSH_MIN_INTERVAL_SECONDS = float(os.environ.get('CACHE_FLUSH_MIN_INTERVAL_SECONDS', 5))
+
+# An asynchronous invocation is queued by Lambda and answered at once, the write does not wait for the flush
+LAMBDA_CLIENT_CONFIG = {
+    'connect_timeout': float(os.environ.get('CACHE_FLUSH_CONNECT_TIMEOUT', 1)),
+    'read_timeout': float(os.environ.get('CACHE_FLUSH_READ_TIMEOUT', 2)),
+    'retries': {
+        'max_attempts': 1,
+        'mode': 'standard'
+    }
+}
+
+_lambda_client = None
+_last_attempt = None
+
+
+def get_lambda_client():
+    """
+    Return the Lambda client, created once per container
+
+    :return: Lambda.Client
+    """
+
+    global _lambda_client
+
+    if _lambda_client is None:
+        _lambda_client = create_client('lambda', LAMBDA_CLIENT_CONFIG)
+
+    return _lambda_client
+
+
+def invalidate_cache() -> bool:
+    """
+    Request a flush of the stage cache of the API, unless one was attempted less than
+    CACHE_FLUSH_MIN_INTERVAL_SECONDS ago. A failure is logged and does not fail the write,
+    the cached responses expire with their TTL
+
+    :return: bool whether the flush was requested
+    """
+
+    global _last_attempt
+
+    if CACHE_FLUSH_FUNCTION is None:
+        return False
+
+    now = time.monotonic()
+
+    if _last_attempt is not None and now - _last_attempt < CACHE_FLUSH_MIN_INTERVAL_SECONDS:
+        return False
+
+    _last_attempt = now
+
+    try:
+        get_lambda_client().invoke(
+            FunctionName=CACHE_FLUSH_FUNCTION,
+            InvocationType='Event',
+            Payload=b'{}'
+        )
+    except aws_errors() as e:
+        print(f'Cannot request the flush of the cache to {CACHE_FLUSH_FUNCTION} ({e})')
+        return False
+
+    return True
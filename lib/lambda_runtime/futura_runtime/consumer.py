@@ -0,0 +1,123 @@
+"""
+Batches of SQS messages written to MySQL
+
+The POST requests are queued by API Gateway, the body of each message is the body of the request:
+a single record, a list of records or {"records": [...]}. The records of the whole batch are sent
+as one multi-row INSERT, the messages that cannot be written are reported to the event source,
+which returns only them to the queue.
+
+References:
+    - Using Lambda with Amazon SQS: https://docs.aws.amazon.com/lambda/latest/dg/with-sqs.html
+    - Reporting batch item failures: https://docs.aws.amazon.com/lambda/latest/dg/with-sqs.html#services-sqs-batchfailurereporting
+"""
+
+import json
+
+import pymysql
+
+from .cache import invalidate_cache
+from .db import execute_with_retry, is_connection_lost
+from .tables import Table
+from .writes import parse_batch_request, validate_record, insert_rows
+
+
+def parse_message(body: str, table: Table) -> list:
+    """
+    Read the records of a message, all of them must be valid for the message to be written
+
+    :param body: body of the SQS message
+    :param table:
+    :return: list of rows, tuples of values in the order of the insert fields
+    """
+
+    try:
+        request = json.loads(body)
+    except (TypeError, ValueError):
+        raise ValueError('The body of the message is not valid JSON')
+
+    # A single record, as posted by the clients sending one reading
+    if isinstance(request, dict) and 'records' not in request:
+        records = [request]
+    else:
+        records, _ = parse_batch_request(request)
+
+    for index, record in enumerate(records):
+        error = validate_record(record, table)
+
+        if error is not None:
+            raise ValueError(f'Record {index}: {error}')
+
+    return [tuple(record[field] for field in table.insert_fields) for record in records]
+
+
+def consume_batch(table: Table, messages: list) -> dict:
+    """
+    Insert the records of a batch of SQS messages in a single transaction. When it fails on the data
+    (e.g. a duplicate key) the messages are written one by one, so that only the failing ones are retried;
+    when the database is unreachable, or the connection was lost during the insert, the whole batch is
+    returned to the queue
+
+    :param table:
+    :param messages: "Records" of the SQS event
+    :return: {"batchItemFailures": [{"itemIdentifier": messageId}, ...]}
+    """
+
+    failures = []
+    parsed = []
+
+    for message in messages:
+        try:
+            parsed.append((message['messageId'], parse_message(message.get('body'), table)))
+        except ValueError as e:
+            # Invalid messages end up in the dead-letter queue after max_receive_count receives
+            print(f'Message {message["messageId"]} rejected: {e}')
+            failures.append(message['messageId'])
+
+    inserted = 0
+
+    if parsed:
+        rows = [row for _, message_rows in parsed for row in message_rows]
+
+        try:
+            execute_with_retry(lambda conn: insert_rows(conn, table, rows), idempotent=False)
+            inserted = len(rows)
+        except pymysql.MySQLError as e:
+            if is_connection_lost(e) or isinstance(e, pymysql.err.OperationalError):
+                print(f'Batch of {len(parsed)} messages failed: {e}')
+                failures.extend(message_id for message_id, _ in parsed)
+            else:
+                print(f'Batch of {len(parsed)} messages failed ({e}), writing them one by one')
+                inserted, failed = insert_messages(table, parsed)
+                failures.extend(failed)
+
+    print(f'Inserted {inserted} records from {len(messages)} messages, {len(failures)} failed')
+
+    if inserted > 0:
+        invalidate_cache()
+
+    return {
+        'batchItemFailures': [{'itemIdentifier': message_id} for message_id in failures]
+    }
+
+
+def insert_messages(table: Table, parsed: list) -> tuple:
+    """
+    Insert the rows of each message in its own transaction
+
+    :param table:
+    :param parsed: (messageId, rows) of the valid messages
+    :return: (number of inserted rows, messageId of the failed messages)
+    """
+
+    inserted = 0
+    failed = []
+
+    for message_id, rows in parsed:
+        try:
+            execute_with_retry(lambda conn: insert_rows(conn, table, rows), idempotent=False)
+            inserted += len(rows)
+        except pymysql.MySQLError as e:
+            print(f'Message {message_id} failed: {e}')
+            failed.append(message_id)
+
+    return inserted, failed
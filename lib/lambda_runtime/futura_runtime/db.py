@@ -0,0 +1,190 @@
+"""
+MySQL connection kept open across warm invocations of the same container
+
+References:
+    - Lambda execution environment lifecycle: https://docs.aws.amazon.com/lambda/latest/dg/lambda-runtime-environment.html
+"""
+
+import os
+import time
+from typing import Callable
+
+import pymysql
+
+from .secret import get_secret
+from .timing import timer
+
+
+DB_MAX_IDLE_SECONDS = float(os.environ.get('DB_MAX_IDLE_SECONDS', 300))
+DB_PING_AFTER_SECONDS = float(os.environ.get('DB_PING_AFTER_SECONDS', 30))
+DB_CONNECT_TIMEOUT = int(os.environ.get('DB_CONNECT_TIMEOUT', 5))
+
+# Endpoint to connect to instead of the host of the secret, e.g. an RDS Proxy
+DB_HOST = os.environ.get('DB_HOST')
+
+# Client error codes raised when the server side of the connection is gone
+CONNECTION_LOST_ERRORS = (2006, 2013, 2014, 2045, 2055)
+
+# Client error code raised when the credentials are rejected
+ACCESS_DENIED_ERROR = 1045
+
+_connection = None
+_last_used = 0.0
+
+
+def get_connection() -> pymysql.connections.Connection:
+    """
+    Return the connection cached in the container, opening a new one when there is none,
+    when it has been idle for more than DB_MAX_IDLE_SECONDS or when it does not answer a ping
+
+    :return: pymysql.connections.Connection
+    """
+
+    global _connection, _last_used
+
+    now = time.monotonic()
+    idle = now - _last_used
+
+    if _connection is not None and idle > DB_MAX_IDLE_SECONDS:
+        close_connection()
+
+    # Under sustained traffic the ping is skipped, a dropped connection is handled by execute_with_retry:
+    # the reads are retried on a new connection, the writes fail
+    if _connection is not None and idle > DB_PING_AFTER_SECONDS:
+        try:
+            _connection.ping(reconnect=False)
+        except pymysql.MySQLError:
+            close_connection()
+
+    if _connection is None:
+        with timer('Connect'):
+            try:
+                _connection = connect(get_secret())
+            except pymysql.err.OperationalError as e:
+                if e.args[0] != ACCESS_DENIED_ERROR:
+                    raise
+
+                # The cached credentials may predate a rotation of the secret
+                _connection = connect(get_secret(force_refresh=True))
+
+        print('Connected to database')
+
+    _last_used = now
+
+    return _connection
+
+
+def connect(secret: dict, host: str = None) -> pymysql.connections.Connection:
+    """
+    Open a new connection with the credentials of the secret, to the given host (e.g. a read replica),
+    to DB_HOST or to the host of the secret
+
+    :param secret:
+    :param host:
+    :return: pymysql.connections.Connection
+    """
+
+    # autocommit avoids a warm connection keeping a stale REPEATABLE READ snapshot between invocations
+    return pymysql.connect(
+        host=host or DB_HOST or secret["host"],
+        port=secret["port"],
+        user=secret["username"],
+        password=secret["password"],
+        database=secret["dbname"],
+        connect_timeout=DB_CONNECT_TIMEOUT,
+        autocommit=True
+    )
+
+
+def close_connection() -> None:
+    """
+    Close the cached connection, ignoring errors from a connection that is already gone
+
+    :return:
+    """
+
+    global _connection
+
+    if _connection is None:
+        return
+
+    try:
+        _connection.close()
+    except pymysql.MySQLError:
+        pass
+
+    _connection = None
+
+
+def is_connection_lost(error: pymysql.MySQLError) -> bool:
+    """
+    Tell whether the error means the connection dropped, rather than the statement failing
+
+    :param error:
+    :return: bool
+    """
+
+    if isinstance(error, pymysql.err.InterfaceError):
+        return True
+
+    return isinstance(error, pymysql.err.OperationalError) and bool(error.args) and error.args[0] in CONNECTION_LOST_ERRORS
+
+
+def execute_with_retry(operation: Callable[[pymysql.connections.Connection], object], idempotent: bool):
+    """
+    Run the operation on the cached connection. When the connection was lost, an idempotent operation is
+    retried once on a new connection; any other one is not, its commit may have reached the server before
+    the connection dropped and the rows would be inserted twice: the error is raised, and the request is
+    retried by the client or the message delivered again by the queue
+
+    :param operation: function receiving the connection
+    :param idempotent: True for the reads and the statements that can run twice
+    :return: the value returned by the operation
+    """
+
+    try:
+        with timer('Query'):
+            return operation(get_connection())
+    except pymysql.MySQLError as e:
+        if not is_connection_lost(e):
+            raise
+
+        close_connection()
+
+        if not idempotent:
+            print(f'Lost connection to database ({e}), the write is not retried')
+            raise
+
+        print(f'Lost connection to database ({e}), reconnecting')
+
+    with timer('Query'):
+        return operation(get_connection())
+
+
+def run_in_transaction(conn: pymysql.connections.Connection,
+                       operation: Callable[[pymysql.cursors.Cursor], object]):
+    """
+    Run the operation in an explicit transaction, rolled back when it fails so that the
+    cached connection does not keep the aborted transaction open
+
+    :param conn:
+    :param operation: function receiving a cursor
+    :return: the value returned by the operation
+    """
+
+    conn.begin()
+
+    try:
+        with conn.cursor() as cur:
+            result = operation(cur)
+
+        conn.commit()
+    except pymysql.MySQLError:
+        try:
+            conn.rollback()
+        except pymysql.MySQLError:
+            pass
+
+        raise
+
+    return result
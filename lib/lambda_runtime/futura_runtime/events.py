@@ -0,0 +1,70 @@
+"""
+Events of the Lambda proxy integration
+
+The handlers are written for the events of the non-proxy integration, where the mapping template
+forwards the query string parameters, or the JSON body, as the event. A proxy event is turned into
+the same event, and the response of the handler into the one expected by the proxy integration.
+The REST API events (payload format 1.0) and the HTTP API events (payload format 2.0) share
+the fields used here.
+
+References:
+    - Input format of a Lambda function for proxy integration: https://docs.aws.amazon.com/apigateway/latest/developerguide/set-up-lambda-proxy-integrations.html#api-gateway-simple-proxy-for-lambda-input-format
+    - HTTP API payload format version: https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-develop-integrations-lambda.html#http-api-develop-integrations-lambda.proxy-format
+"""
+
+import json
+import base64
+import binascii
+import functools
+from typing import Callable
+
+from .responses import make_response, encode_response, is_proxy_event
+
+
+def parse_proxy_event(event: dict):
+    """
+    Return the query string parameters of a request without body, the decoded JSON body otherwise
+
+    :param event:
+    :return: dict or list
+    """
+
+    body = event.get('body')
+
+    if body is None:
+        return dict(event.get('queryStringParameters') or {})
+
+    # With binary media types configured, API Gateway base64 encodes the request bodies
+    if event.get('isBase64Encoded'):
+        try:
+            body = base64.b64decode(body)
+        except (binascii.Error, ValueError):
+            raise ValueError('The body of the request is not valid base64')
+
+    try:
+        return json.loads(body)
+    except ValueError:
+        raise ValueError('The body of the request is not valid JSON')
+
+
+def proxy_integration(handler: Callable) -> Callable:
+    """
+    Let a handler of the non-proxy integration serve the proxy integration as well
+
+    :param handler:
+    :return: handler
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        if not is_proxy_event(event):
+            return handler(event, context)
+
+        try:
+            request = parse_proxy_event(event)
+        except ValueError as e:
+            return encode_response(make_response(status_code=400, body=str(e)), event)
+
+        return encode_response(handler(request, context), event)
+
+    return wrapper
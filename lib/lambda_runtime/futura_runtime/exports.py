@@ -0,0 +1,270 @@
+"""
+Full-table exports streamed to S3
+
+An export outlasts the timeout of an API request: the read function answers the request with the key of
+the export and invokes itself asynchronously to stream the table to it. An upload that fails is aborted,
+the one of a function that times out is removed by the lifecycle rule of the bucket after a day.
+
+References:
+    - PyMySQL SSCursor: https://pymysql.readthedocs.io/en/latest/modules/cursors.html#pymysql.cursors.SSCursor
+    - Uploading an object using multipart upload: https://docs.aws.amazon.com/AmazonS3/latest/userguide/mpu-upload-object.html
+    - Invoke, InvocationType Event: https://docs.aws.amazon.com/lambda/latest/dg/API_Invoke.html
+"""
+
+import io
+import os
+import csv
+import json
+import time
+import uuid
+
+import pymysql
+
+from .aws import create_client
+from .db import close_connection
+from .tables import Table
+
+
+EXPORT_BUCKET = os.environ.get('EXPORT_BUCKET')
+EXPORT_BATCH_SIZE = int(os.environ.get('EXPORT_BATCH_SIZE', 1000))
+EXPORT_PART_SIZE = max(int(os.environ.get('EXPORT_PART_SIZE', 8 * 1024 * 1024)), 5 * 1024 * 1024)
+EXPORT_URL_EXPIRES = int(os.environ.get('EXPORT_URL_EXPIRES', 3600))
+EXPORT_FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv'
+}
+# The export runs in an asynchronous invocation of the function itself, set by the Lambda runtime
+EXPORT_FUNCTION = os.environ.get('AWS_LAMBDA_FUNCTION_NAME')
+# Key of the event of the asynchronous invocation
+EXPORT_JOB = 'export_job'
+
+# The invocation is queued by Lambda and answered at once, the request does not wait for the export
+LAMBDA_CLIENT_CONFIG = {
+    'connect_timeout': 1,
+    'read_timeout': 2,
+    'retries': {
+        'max_attempts': 2,
+        'mode': 'standard'
+    }
+}
+
+_s3_client = None
+_lambda_client = None
+
+
+def get_s3_client():
+    """
+    Return the S3 client, created once per container
+
+    :return: S3.Client
+    """
+
+    global _s3_client
+
+    if _s3_client is None:
+        _s3_client = create_client('s3')
+
+    return _s3_client
+
+
+def get_lambda_client():
+    """
+    Return the Lambda client, created once per container
+
+    :return: Lambda.Client
+    """
+
+    global _lambda_client
+
+    if _lambda_client is None:
+        _lambda_client = create_client('lambda', LAMBDA_CLIENT_CONFIG)
+
+    return _lambda_client
+
+
+def start_export(fields: tuple, export_format: str, key: str) -> None:
+    """
+    Invoke asynchronously EXPORT_FUNCTION to export the table to the key
+
+    :param fields:
+    :param export_format:
+    :param key:
+    :return:
+    """
+
+    get_lambda_client().invoke(
+        FunctionName=EXPORT_FUNCTION,
+        InvocationType='Event',
+        Payload=json.dumps({
+            EXPORT_JOB: {
+                'fields': list(fields),
+                'format': export_format,
+                'key': key
+            }
+        }).encode()
+    )
+
+
+def export_key(table: Table, export_format: str) -> str:
+    """
+    Build a unique key for an export of the table
+
+    :param table:
+    :param export_format:
+    :return: str
+    """
+
+    return f'exports/{table.name}/{time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())}-{uuid.uuid4().hex}.{export_format}'
+
+
+def export_rows(conn: pymysql.connections.Connection, table: Table, fields: tuple, export_format: str, key: str) -> int:
+    """
+    Read the table with an unbuffered server-side cursor, EXPORT_BATCH_SIZE rows at a time, and upload
+    them as they come: memory holds one batch and one upload part, whatever the size of the table
+
+    :param conn:
+    :param table:
+    :param fields:
+    :param export_format:
+    :param key:
+    :return: int number of exported rows
+    """
+
+    writer = S3MultipartWriter(
+        client=get_s3_client(),
+        bucket=EXPORT_BUCKET,
+        key=key,
+        content_type=EXPORT_FORMATS[export_format],
+        part_size=EXPORT_PART_SIZE
+    )
+
+    rows = 0
+
+    try:
+        with conn.cursor(pymysql.cursors.SSCursor) as cur:
+            cur.execute(f'SELECT {", ".join(fields)} FROM {table.name} ORDER BY {table.primary_key}')
+
+            if export_format == 'csv':
+                writer.write(encode_csv([fields]))
+
+            while True:
+                batch = cur.fetchmany(EXPORT_BATCH_SIZE)
+                if not batch:
+                    break
+
+                if export_format == 'csv':
+                    writer.write(encode_csv(batch))
+                else:
+                    writer.write(''.join(json.dumps(dict(zip(fields, row)), default=str) + '\n' for row in batch).encode())
+
+                rows += len(batch)
+
+        writer.close()
+    except BaseException:
+        writer.abort()
+
+        # An interrupted unbuffered read leaves the rest of the result set on the connection
+        close_connection()
+        raise
+
+    print(f'Exported {rows} rows to s3://{EXPORT_BUCKET}/{key}')
+
+    return rows
+
+
+def presigned_url(key: str) -> str:
+    """
+    Return a URL to download the export without AWS credentials, valid for EXPORT_URL_EXPIRES seconds.
+    It answers 404 until the export is complete
+
+    :param key:
+    :return: str
+    """
+
+    return get_s3_client().generate_presigned_url(
+        'get_object',
+        Params={
+            'Bucket': EXPORT_BUCKET,
+            'Key': key
+        },
+        ExpiresIn=EXPORT_URL_EXPIRES
+    )
+
+
+def encode_csv(rows) -> bytes:
+    """
+    Format rows as CSV lines
+
+    :param rows:
+    :return: bytes
+    """
+
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+
+    return buffer.getvalue().encode()
+
+
+class S3MultipartWriter:
+    """
+    File-like writer uploading what it receives as the parts of an S3 multipart upload,
+    so at most one part is kept in memory
+    """
+
+    def __init__(self, client, bucket: str, key: str, content_type: str, part_size: int):
+        self.__client = client
+        self.__bucket = bucket
+        self.__key = key
+        self.__part_size = part_size
+        self.__buffer = bytearray()
+        self.__parts = []
+
+        self.__upload_id = client.create_multipart_upload(
+            Bucket=bucket,
+            Key=key,
+            ContentType=content_type
+        )['UploadId']
+
+    def write(self, data: bytes) -> None:
+        self.__buffer += data
+
+        if len(self.__buffer) >= self.__part_size:
+            self.__upload_part()
+
+    def close(self) -> None:
+        # Only the last part may be smaller than 5 MB, and an upload needs at least one part
+        if self.__buffer or not self.__parts:
+            self.__upload_part()
+
+        self.__client.complete_multipart_upload(
+            Bucket=self.__bucket,
+            Key=self.__key,
+            UploadId=self.__upload_id,
+            MultipartUpload={
+                'Parts': self.__parts
+            }
+        )
+
+    def abort(self) -> None:
+        self.__client.abort_multipart_upload(
+            Bucket=self.__bucket,
+            Key=self.__key,
+            UploadId=self.__upload_id
+        )
+
+    def __upload_part(self) -> None:
+        part_number = len(self.__parts) + 1
+
+        response = self.__client.upload_part(
+            Bucket=self.__bucket,
+            Key=self.__key,
+            UploadId=self.__upload_id,
+            PartNumber=part_number,
+            Body=bytes(self.__buffer)
+        )
+
+        self.__parts.append({
+            'ETag': response['ETag'],
+            'PartNumber': part_number
+        })
+        self.__buffer.clear()
@@ -0,0 +1,317 @@
+"""
+Lambda handlers built from the definition of a table
+
+They serve both the non-proxy integration, with the event built by the mapping template,
+and the Lambda proxy integration. The handlers are built at import, during the init of the
+environment, where the provisioned environments open their connection (see warmup)
+"""
+
+from typing import Callable
+
+import pymysql
+
+from . import exports
+from .aws import aws_errors
+from .cache import invalidate_cache
+from .consumer import consume_batch
+from .db import execute_with_retry, run_in_transaction
+from .reads import parse_page_request, parse_fields, read_page
+from .replicas import execute_on_reader
+from .events import proxy_integration
+from .responses import make_response
+from .tables import Table
+from .timing import instrumented
+from .warmup import warm_up_on_init
+from .writes import parse_batch_request, validate_record, insert_batch, insert_rows
+
+
+def read_handler(table: Table) -> Callable:
+    """
+    Build the handler of the GET endpoint: a page of rows, read from a replica when DB_READER_HOSTS is set,
+    or an export of the whole table to S3 when the request has "export". The export itself runs in the
+    asynchronous invocation of the function with the "export_job" event
+
+    :param table:
+    :return: handler
+    """
+
+    @proxy_integration
+    def read_request(event, context):
+        return read(event, table)
+
+    @instrumented
+    def handler(event, context):
+        # Invoked by the function itself, the events of API Gateway have no such key
+        if isinstance(event, dict) and exports.EXPORT_JOB in event:
+            return run_export(event[exports.EXPORT_JOB], table)
+
+        return read_request(event, context)
+
+    warm_up_on_init(reader=True)
+
+    return handler
+
+
+def read(event: dict, table: Table) -> dict:
+    """
+    Read the page, or run the export, requested by the event
+
+    :param event:
+    :param table:
+    :return: dict
+    """
+
+    if (event or {}).get('export'):
+        return export(event, table)
+
+    try:
+        limit, after_id, fields = parse_page_request(event, table)
+    except ValueError as e:
+        return make_response(
+            status_code=400,
+            body=str(e)
+        )
+
+    try:
+        results, next_cursor = execute_on_reader(lambda conn: read_page(conn, table, limit, after_id, fields))
+    except pymysql.MySQLError as e:
+        return make_response(
+            status_code=500,
+            error=e
+        )
+
+    return make_response(
+        status_code=200,
+        body={
+            'items': results,
+            'next_cursor': next_cursor
+        }
+    )
+
+
+def export(event: dict, table: Table) -> dict:
+    """
+    Start the export of the whole table to an object of EXPORT_BUCKET, and return its key with a presigned URL
+    to it, valid once the export is complete
+
+    :param event: {"export": "ndjson" | "csv", "fields": ...}
+    :param table:
+    :return: dict
+    """
+
+    export_format = event['export']
+
+    if export_format not in exports.EXPORT_FORMATS:
+        return make_response(
+            status_code=400,
+            body=f'"export" must be one of: {", ".join(exports.EXPORT_FORMATS)}'
+        )
+
+    if exports.EXPORT_BUCKET is None:
+        return make_response(
+            status_code=500,
+            body='Exports are not enabled, EXPORT_BUCKET is not set'
+        )
+
+    try:
+        fields = parse_fields(event.get('fields'), table)
+    except ValueError as e:
+        return make_response(
+            status_code=400,
+            body=str(e)
+        )
+
+    key = exports.export_key(table, export_format)
+
+    try:
+        exports.start_export(fields, export_format, key)
+        url = exports.presigned_url(key)
+    except aws_errors() as e:
+        print(f'Cannot start the export: {e}')
+
+        return make_response(
+            status_code=500,
+            body='Cannot start the export'
+        )
+
+    return make_response(
+        status_code=202,
+        body={
+            'export': {
+                'format': export_format,
+                'bucket': exports.EXPORT_BUCKET,
+                'key': key,
+                'url': url,
+                'expires_in': exports.EXPORT_URL_EXPIRES
+            }
+        }
+    )
+
+
+def run_export(job: dict, table: Table) -> dict:
+    """
+    Stream the whole table to the key of the export. A failure is raised, for Lambda to retry the invocation:
+    the export is written again to the same key
+
+    :param job: {"fields": [...], "format": "ndjson" | "csv", "key": ...} of export
+    :param table:
+    :return: dict
+    """
+
+    rows = execute_with_retry(
+        lambda conn: exports.export_rows(conn, table, tuple(job['fields']), job['format'], job['key']),
+        idempotent=True
+    )
+
+    return make_response(
+        status_code=200,
+        body={
+            'export': {
+                'format': job['format'],
+                'rows': rows,
+                'bucket': exports.EXPORT_BUCKET,
+                'key': job['key']
+            }
+        }
+    )
+
+
+def write_handler(table: Table) -> Callable:
+    """
+    Build the handler of the POST endpoint: a single record {"name": ...}, or a batch of records
+    as a list or {"records": [...], "chunk_size": n}. The cache of the read endpoints is flushed
+    after the rows are inserted
+
+    :param table:
+    :return: handler
+    """
+
+    @instrumented
+    @proxy_integration
+    def handler(event, context):
+        # A single record keeps the original response
+        if isinstance(event, dict) and 'records' not in event:
+            return insert_single(event, table)
+
+        try:
+            records, chunk_size = parse_batch_request(event)
+        except ValueError as e:
+            return make_response(
+                status_code=400,
+                body=str(e)
+            )
+
+        result = insert_batch(table, records, chunk_size)
+
+        if result['inserted'] > 0:
+            invalidate_cache()
+
+        if result['inserted'] == 0 and result['failed'] > 0:
+            status_code = 500
+        elif result['failed'] > 0 or result['rejected']:
+            status_code = 207
+        else:
+            status_code = 200
+
+        return make_response(
+            status_code=status_code,
+            body=result
+        )
+
+    warm_up_on_init()
+
+    return handler
+
+
+def insert_single(record: dict, table: Table) -> dict:
+    """
+    Insert one record, as sent by the clients posting a single reading
+
+    :param record:
+    :param table:
+    :return: dict
+    """
+
+    error = validate_record(record, table)
+    if error is not None:
+        return make_response(
+            status_code=400,
+            body=error
+        )
+
+    row = tuple(record[field] for field in table.insert_fields)
+
+    try:
+        execute_with_retry(lambda conn: insert_rows(conn, table, [row]), idempotent=False)
+        print('Inserted data')
+        invalidate_cache()
+    except pymysql.MySQLError as e:
+        return make_response(
+            status_code=500,
+            error=e
+        )
+
+    return make_response(
+        status_code=200,
+        body='Successfully inserted data'
+    )
+
+
+def consume_handler(table: Table) -> Callable:
+    """
+    Build the handler of the SQS event source of the asynchronous POST endpoint: the records
+    of a batch of messages are inserted at once, the failed messages are reported back to the queue
+
+    :param table:
+    :return: handler
+    """
+
+    @instrumented
+    def handler(event, context):
+        return consume_batch(table, event.get('Records') or [])
+
+    warm_up_on_init()
+
+    return handler
+
+
+def init_handler(table: Table) -> Callable:
+    """
+    Build the handler creating ({"action": "create"}) or dropping ({"action": "delete"}) the table
+
+    :param table:
+    :return: handler
+    """
+
+    @instrumented
+    @proxy_integration
+    def handler(event, context):
+        action = event.get('action') if isinstance(event, dict) else None
+
+        if action == 'create':
+            sql = table.create_sql
+            action_message = 'Created table'
+        elif action == 'delete':
+            sql = f'DROP TABLE IF EXISTS {table.name}'
+            action_message = 'Deleted table'
+        else:
+            return make_response(
+                status_code=400,
+                body='Invalid action'
+            )
+
+        try:
+            # CREATE TABLE IF NOT EXISTS and DROP TABLE IF EXISTS can run twice
+            execute_with_retry(lambda conn: run_in_transaction(conn, lambda cur: cur.execute(sql)), idempotent=True)
+        except pymysql.MySQLError as e:
+            return make_response(
+                status_code=500,
+                error=e
+            )
+
+        return make_response(
+            status_code=200,
+            body=action_message
+        )
+
+    return handler
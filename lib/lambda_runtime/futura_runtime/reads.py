@@ -0,0 +1,95 @@
+"""
+Keyset paginated reads
+
+References:
+    - Keyset pagination: https://use-the-index-luke.com/no-offset
+"""
+
+import os
+from typing import Union
+
+import pymysql
+
+from .tables import Table
+
+
+DEFAULT_PAGE_SIZE = int(os.environ.get('DEFAULT_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = int(os.environ.get('MAX_PAGE_SIZE', 1000))
+
+
+def parse_page_request(event: dict, table: Table) -> tuple:
+    """
+    Read the pagination parameters of the request: "limit", "after_id" (the cursor, i.e. the last id
+    of the previous page) and "fields" (comma separated list of columns, the id is always returned)
+
+    :param event:
+    :param table:
+    :return: (limit, after_id, fields)
+    """
+
+    event = event or {}
+
+    # Missing query string parameters come as empty strings from the mapping template
+    limit = event.get('limit')
+    after_id = event.get('after_id')
+
+    try:
+        limit = int(limit) if limit not in (None, '') else DEFAULT_PAGE_SIZE
+        after_id = int(after_id) if after_id not in (None, '') else 0
+    except (TypeError, ValueError):
+        raise ValueError('"limit" and "after_id" must be integers')
+
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f'"limit" must be between 1 and {MAX_PAGE_SIZE}')
+
+    if after_id < 0:
+        raise ValueError('"after_id" must be non-negative')
+
+    return limit, after_id, parse_fields(event.get('fields'), table)
+
+
+def parse_fields(fields: Union[str, list, None], table: Table) -> tuple:
+    """
+    Validate the requested columns against the fields of the table, the primary key is always returned
+
+    :param fields: comma separated string or list, all the columns when empty
+    :param table:
+    :return: tuple of columns, in table order
+    """
+
+    fields = fields or table.fields
+    if isinstance(fields, str):
+        fields = [field.strip() for field in fields.split(',') if field.strip()]
+
+    unknown_fields = [field for field in fields if field not in table.fields]
+    if unknown_fields:
+        raise ValueError(f'Unknown fields: {", ".join(unknown_fields)}')
+
+    return tuple(field for field in table.fields if field == table.primary_key or field in fields)
+
+
+def read_page(conn: pymysql.connections.Connection, table: Table, limit: int, after_id: int, fields: tuple) -> tuple:
+    """
+    Read the rows of the table following after_id, walking the primary key index
+    instead of scanning and returning the whole table
+
+    :param conn:
+    :param table:
+    :param limit:
+    :param after_id:
+    :param fields: columns to select, validated by parse_fields
+    :return: (rows, cursor of the next page or None on the last page)
+    """
+
+    with conn.cursor() as cur:
+        sql = f'SELECT {", ".join(fields)} FROM {table.name} WHERE {table.primary_key} > %s ' \
+              f'ORDER BY {table.primary_key} LIMIT %s'
+
+        # One extra row tells whether there is a next page without a COUNT(*)
+        cur.execute(sql, (after_id, limit + 1))
+        rows = cur.fetchall()
+
+    results = [dict(zip(fields, row)) for row in rows[:limit]]
+    next_cursor = results[-1][table.primary_key] if len(rows) > limit else None
+
+    return results, next_cursor
@@ -0,0 +1,198 @@
+"""
+Routing of the read-only queries to the read replicas listed in DB_READER_HOSTS
+
+A replica is used while its replication lag stays within DB_MAX_REPLICA_LAG_SECONDS. A replica that
+lags behind, or cannot be reached, is skipped for DB_REPLICA_RETRY_SECONDS and the reads fall back
+to the primary, so that a read never fails only because of the replicas.
+
+References:
+    - Working with MySQL read replicas: https://docs.aws.amazon.com/AmazonRDS/latest/UserGuide/USER_MySQL.Replication.ReadReplicas.html
+    - SHOW REPLICA STATUS: https://dev.mysql.com/doc/refman/8.0/en/show-replica-status.html
+"""
+
+import os
+import random
+import time
+from typing import Callable
+
+import pymysql
+
+from .db import DB_MAX_IDLE_SECONDS, connect, execute_with_retry, is_connection_lost
+from .secret import get_secret
+from .timing import timer
+
+
+DB_READER_HOSTS = [host for host in os.environ.get('DB_READER_HOSTS', '').split(',') if host]
+DB_MAX_REPLICA_LAG_SECONDS = float(os.environ.get('DB_MAX_REPLICA_LAG_SECONDS', 30))
+DB_REPLICA_CHECK_SECONDS = float(os.environ.get('DB_REPLICA_CHECK_SECONDS', 10))
+DB_REPLICA_RETRY_SECONDS = float(os.environ.get('DB_REPLICA_RETRY_SECONDS', 60))
+
+_reader = None
+_reader_host = None
+_reader_checked_at = 0.0
+_reader_last_used = 0.0
+_skipped_until = {}
+
+
+def execute_on_reader(operation: Callable[[pymysql.connections.Connection], object]):
+    """
+    Run a read-only operation on a replica, or on the primary when there is no replica
+    within the staleness tolerance
+
+    :param operation: function receiving the connection
+    :return: the value returned by the operation
+    """
+
+    conn = get_reader_connection() if DB_READER_HOSTS else None
+
+    if conn is not None:
+        try:
+            with timer('Query'):
+                return operation(conn)
+        except pymysql.MySQLError as e:
+            if not is_connection_lost(e):
+                raise
+
+            print(f'Lost connection to replica {_reader_host} ({e}), reading from the primary')
+            skip_reader()
+
+    return execute_with_retry(operation, idempotent=True)
+
+
+def get_reader_connection():
+    """
+    Return the replica connection cached in the container, checking its lag every DB_REPLICA_CHECK_SECONDS,
+    or connect to the first replica that answers with a lag within DB_MAX_REPLICA_LAG_SECONDS
+
+    :return: pymysql.connections.Connection, or None when no replica is usable
+    """
+
+    global _reader, _reader_host, _reader_checked_at, _reader_last_used
+
+    now = time.monotonic()
+
+    if _reader is not None and now - _reader_last_used > DB_MAX_IDLE_SECONDS:
+        close_reader()
+
+    # The lag query also tells whether the connection is still alive
+    if _reader is not None and now - _reader_checked_at > DB_REPLICA_CHECK_SECONDS:
+        if not is_fresh(_reader, _reader_host):
+            skip_reader()
+        else:
+            _reader_checked_at = now
+
+    if _reader is None:
+        for host in candidate_hosts(now):
+            try:
+                with timer('Connect'):
+                    conn = connect(get_secret(), host=host)
+            except pymysql.MySQLError as e:
+                print(f'Cannot connect to replica {host} ({e})')
+                _skipped_until[host] = now + DB_REPLICA_RETRY_SECONDS
+                continue
+
+            if not is_fresh(conn, host):
+                _close(conn)
+                _skipped_until[host] = now + DB_REPLICA_RETRY_SECONDS
+                continue
+
+            print(f'Connected to replica {host}')
+            _reader, _reader_host, _reader_checked_at = conn, host, now
+            break
+
+    if _reader is None:
+        return None
+
+    _reader_last_used = now
+
+    return _reader
+
+
+def candidate_hosts(now: float) -> list:
+    """
+    Return the replicas that are not skipped, in random order to spread the containers over them
+
+    :param now:
+    :return: list
+    """
+
+    hosts = [host for host in DB_READER_HOSTS if _skipped_until.get(host, 0.0) <= now]
+
+    return random.sample(hosts, len(hosts))
+
+
+def replica_lag(conn: pymysql.connections.Connection):
+    """
+    Return the replication lag of the server in seconds, None when it does not replicate
+
+    :param conn:
+    :return: float or None
+    """
+
+    with conn.cursor(pymysql.cursors.DictCursor) as cur:
+        cur.execute('SHOW REPLICA STATUS')
+        status = cur.fetchone()
+
+    if status is None:
+        return None
+
+    return status['Seconds_Behind_Source']
+
+
+def is_fresh(conn: pymysql.connections.Connection, host: str) -> bool:
+    """
+    Tell whether the replica is reachable and within DB_MAX_REPLICA_LAG_SECONDS of the primary
+
+    :param conn:
+    :param host:
+    :return: bool
+    """
+
+    try:
+        lag = replica_lag(conn)
+    except pymysql.MySQLError as e:
+        print(f'Cannot check the lag of replica {host} ({e})')
+        return False
+
+    # A stopped replication reports no lag at all
+    if lag is None or lag > DB_MAX_REPLICA_LAG_SECONDS:
+        print(f'Replica {host} is stale (lag: {lag}), reading from the primary')
+        return False
+
+    return True
+
+
+def skip_reader() -> None:
+    """
+    Close the replica connection and skip its host for DB_REPLICA_RETRY_SECONDS
+
+    :return:
+    """
+
+    if _reader_host is not None:
+        _skipped_until[_reader_host] = time.monotonic() + DB_REPLICA_RETRY_SECONDS
+
+    close_reader()
+
+
+def close_reader() -> None:
+    """
+    Close the cached replica connection, ignoring errors from a connection that is already gone
+
+    :return:
+    """
+
+    global _reader, _reader_host
+
+    if _reader is not None:
+        _close(_reader)
+
+    _reader = None
+    _reader_host = None
+
+
+def _close(conn: pymysql.connections.Connection) -> None:
+    try:
+        conn.close()
+    except pymysql.MySQLError:
+        pass
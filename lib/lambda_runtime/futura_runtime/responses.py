@@ -0,0 +1,172 @@
+"""
+Responses of the Lambda handlers
+
+References:
+    - Handle Lambda errors in API Gateway: https://docs.aws.amazon.com/apigateway/latest/developerguide/handle-errors-in-lambda-integration.html
+    - Output format of a Lambda function for proxy integration: https://docs.aws.amazon.com/apigateway/latest/developerguide/set-up-lambda-proxy-integrations.html#api-gateway-simple-proxy-for-lambda-output-format
+    - orjson: https://github.com/ijl/orjson
+"""
+
+import os
+import gzip
+import json
+import base64
+from typing import Union, Optional
+
+import pymysql
+
+from .timing import timer
+
+# orjson and brotli are installed with the read functions, the runtime works without them
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*'
+}
+
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+GZIP_LEVEL = int(os.environ.get('GZIP_LEVEL', 6))
+BROTLI_QUALITY = int(os.environ.get('BROTLI_QUALITY', 5))
+
+
+def make_response(status_code: int, body: Union[dict, list, str] = None,
+                  error: Optional[pymysql.MySQLError] = None) -> dict:
+    """
+    Build the response of a handler, the message of the error is the body when there is one
+
+    :param status_code:
+    :param body:
+    :param error:
+    :return: dict
+    """
+
+    if error is not None:
+        print(f'etype: {type(error)}')
+        body = error.args[-1] if error.args else str(error)
+
+    return {
+        'isBase64Encoded': False,
+        'statusCode': status_code,
+        'headers': dict(HEADERS),
+        'body': body
+    }
+
+
+def is_proxy_event(event) -> bool:
+    """
+    Tell whether the event comes from a Lambda proxy integration, which expects the body as a string
+
+    :param event:
+    :return: bool
+    """
+
+    return isinstance(event, dict) and 'requestContext' in event and 'headers' in event
+
+
+def get_header(event: dict, name: str) -> Optional[str]:
+    """
+    Return a header of a proxy event, whatever the case of its name
+
+    :param event:
+    :param name:
+    :return: str or None
+    """
+
+    name = name.lower()
+
+    for key, value in (event.get('headers') or {}).items():
+        if key.lower() == name:
+            return value
+
+    return None
+
+
+def dumps(body) -> bytes:
+    """
+    Serialize the body to compact JSON, with orjson when it is installed
+
+    :param body:
+    :return: bytes
+    """
+
+    if orjson is not None:
+        return orjson.dumps(body, default=str)
+
+    return json.dumps(body, separators=(',', ':'), ensure_ascii=False, default=str).encode()
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick the content coding accepted by the client: br when brotli is installed, else gzip
+
+    :param accept_encoding: value of the Accept-Encoding header
+    :return: "br", "gzip" or None
+    """
+
+    accepted = {}
+
+    for item in (accept_encoding or '').split(','):
+        coding, _, params = item.strip().partition(';')
+        quality = 1.0
+
+        if params.strip().startswith('q='):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+
+        if coding:
+            accepted[coding.strip().lower()] = quality
+
+    for coding in ('br', 'gzip'):
+        if coding == 'br' and brotli is None:
+            continue
+
+        if accepted.get(coding, accepted.get('*', 0.0)) > 0:
+            return coding
+
+    return None
+
+
+def encode_response(response: dict, event) -> dict:
+    """
+    Serialize the body of the response for a Lambda proxy integration, compressed when the client
+    accepts it and the body has at least COMPRESSION_MIN_SIZE bytes. The responses of the other
+    integrations are serialized, and compressed, by API Gateway
+
+    :param response:
+    :param event:
+    :return: dict
+    """
+
+    if not is_proxy_event(event):
+        return response
+
+    with timer('Encode'):
+        data = dumps(response['body'])
+        coding = choose_encoding(get_header(event, 'Accept-Encoding')) if len(data) >= COMPRESSION_MIN_SIZE else None
+
+        if coding is None:
+            return dict(response, body=data.decode())
+
+        if coding == 'br':
+            data = brotli.compress(data, quality=BROTLI_QUALITY)
+        else:
+            data = gzip.compress(data, compresslevel=GZIP_LEVEL)
+
+    return dict(
+        response,
+        isBase64Encoded=True,
+        headers=dict(response['headers'], **{'Content-Encoding': coding, 'Vary': 'Accept-Encoding'}),
+        body=base64.b64encode(data).decode()
+    )
@@ -0,0 +1,63 @@
+"""
+Database secret, read from Secrets Manager and cached across warm invocations
+
+References:
+    - Secrets Manager caching best practices: https://docs.aws.amazon.com/secretsmanager/latest/userguide/retrieving-secrets.html
+"""
+
+import os
+import json
+import time
+
+from .aws import create_client
+
+
+# Secret kept across warm invocations of the same container
+SECRET_TTL_SECONDS = float(os.environ.get('SECRET_TTL_SECONDS', 300))
+
+_secrets_client = None
+_secret = None
+_secret_expires_at = 0.0
+
+
+def get_secrets_client():
+    """
+    Return the Secrets Manager client, created once per container
+
+    :return: SecretsManager.Client
+    """
+
+    global _secrets_client
+
+    if _secrets_client is None:
+        _secrets_client = create_client('secretsmanager')
+
+    return _secrets_client
+
+
+def get_secret(force_refresh: bool = False) -> dict:
+    """
+    Return the database secret, fetched from Secrets Manager only when the cached copy
+    is older than SECRET_TTL_SECONDS or when a refresh is forced
+
+    :param force_refresh: bypass the cache, e.g. after the credentials were rotated
+    :return: dict
+    """
+
+    global _secret, _secret_expires_at
+
+    now = time.monotonic()
+
+    if force_refresh or _secret is None or now >= _secret_expires_at:
+        # Get environment variables
+        db_secret_arn = os.environ['DB_SECRET_ARN']
+
+        # Get secret from Secrets Manager
+        get_secret_value_response = get_secrets_client().get_secret_value(
+            SecretId=db_secret_arn
+        )
+
+        _secret = json.loads(get_secret_value_response['SecretString'])
+        _secret_expires_at = now + SECRET_TTL_SECONDS
+
+    return _secret
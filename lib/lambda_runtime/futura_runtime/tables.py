@@ -0,0 +1,22 @@
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Table:
+    """
+    Definition of a table served by the handlers
+
+    :param name:
+    :param fields: columns that can be read, the first one is the auto-increment primary key used as cursor
+    :param insert_fields: columns written by the write handlers, with the maximum length of their VARCHAR
+    :param create_sql: statement run by the init handler
+    """
+
+    name: str
+    fields: tuple
+    insert_fields: dict = None
+    create_sql: str = None
+
+    @property
+    def primary_key(self) -> str:
+        return self.fields[0]
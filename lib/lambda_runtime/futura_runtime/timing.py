@@ -0,0 +1,95 @@
+"""
+Timing of the handlers, published as CloudWatch metrics through the embedded metric format
+
+References:
+    - Embedded metric format specification: https://docs.aws.amazon.com/AmazonCloudWatch/latest/monitoring/CloudWatch_Embedded_Metric_Format_Specification.html
+"""
+
+import os
+import json
+import time
+import functools
+from contextlib import contextmanager
+from typing import Callable
+
+
+METRICS_NAMESPACE = os.environ.get('METRICS_NAMESPACE', 'FuturaCity')
+FUNCTION_NAME = os.environ.get('AWS_LAMBDA_FUNCTION_NAME', 'local')
+
+# Durations in milliseconds of the steps of the current invocation
+_timings = {}
+_cold_start = True
+
+
+@contextmanager
+def timer(name: str):
+    """
+    Add the time spent in the block to the step "name" of the current invocation
+
+    :param name:
+    :return:
+    """
+
+    start = time.perf_counter()
+
+    try:
+        yield
+    finally:
+        _timings[name] = _timings.get(name, 0.0) + (time.perf_counter() - start) * 1000
+
+
+def get_timings() -> dict:
+    """
+    Return the durations in milliseconds of the steps of the current invocation
+
+    :return: dict
+    """
+
+    return dict(_timings)
+
+
+def instrumented(handler: Callable) -> Callable:
+    """
+    Decorate a Lambda handler to time it and log its steps (Connect, Query, ...) as metrics
+
+    :param handler:
+    :return: the decorated handler
+    """
+
+    @functools.wraps(handler)
+    def wrapper(event, context):
+        global _cold_start
+
+        _timings.clear()
+
+        try:
+            with timer('Duration'):
+                return handler(event, context)
+        finally:
+            emit_metrics(cold_start=_cold_start)
+            _cold_start = False
+
+    return wrapper
+
+
+def emit_metrics(cold_start: bool) -> None:
+    """
+    Print the timings of the invocation as an embedded metric format log line
+
+    :param cold_start:
+    :return:
+    """
+
+    print(json.dumps({
+        '_aws': {
+            'Timestamp': int(time.time() * 1000),
+            'CloudWatchMetrics': [{
+                'Namespace': METRICS_NAMESPACE,
+                'Dimensions': [['FunctionName']],
+                'Metrics': [{'Name': name, 'Unit': 'Milliseconds'} for name in _timings]
+            }]
+        },
+        'FunctionName': FUNCTION_NAME,
+        'ColdStart': cold_start,
+        **_timings
+    }))
@@ -0,0 +1,77 @@
+"""
+Warm-up of the execution environment during its init
+
+The environments of a provisioned concurrency alias are initialized before they receive requests
+(AWS_LAMBDA_INITIALIZATION_TYPE is "provisioned-concurrency"): the handlers then fetch the secret
+and open the connection at import, so that the first request finds them cached like a warm one.
+WARMUP_ON_INIT does the same for the on-demand environments, moving the work to the init phase
+without removing it from the cold start.
+
+References:
+    - Configuring provisioned concurrency: https://docs.aws.amazon.com/lambda/latest/dg/provisioned-concurrency.html
+    - Defined runtime environment variables: https://docs.aws.amazon.com/lambda/latest/dg/configuration-envvars.html#configuration-envvars-runtime
+"""
+
+import os
+import time
+
+import pymysql
+
+from . import replicas
+from .aws import aws_errors
+from .db import get_connection
+
+
+WARMUP_ON_INIT = os.environ.get('WARMUP_ON_INIT', '').lower() in ('1', 'true', 'yes')
+
+PROVISIONED_CONCURRENCY = 'provisioned-concurrency'
+
+
+def should_warm_up() -> bool:
+    """
+    Tell whether the environment warms up during its init: provisioned, or WARMUP_ON_INIT set
+
+    :return: bool
+    """
+
+    initialization_type = os.environ.get('AWS_LAMBDA_INITIALIZATION_TYPE')
+
+    return WARMUP_ON_INIT or initialization_type == PROVISIONED_CONCURRENCY
+
+
+def warm_up(reader: bool = False) -> bool:
+    """
+    Fetch the secret and open the connection cached in the container. A failure is only logged,
+    the first invocation then connects as in a cold environment
+
+    :param reader: open the replica connection of the reads, the primary one when no replica is usable
+    :return: bool, whether the connection is open
+    """
+
+    start = time.perf_counter()
+
+    try:
+        if not (reader and replicas.DB_READER_HOSTS and replicas.get_reader_connection() is not None):
+            get_connection()
+    except (pymysql.MySQLError, KeyError, *aws_errors()) as e:
+        print(f'Warm-up failed: {e}')
+
+        return False
+
+    print(f'Warmed up in {(time.perf_counter() - start) * 1000:.1f} ms')
+
+    return True
+
+
+def warm_up_on_init(reader: bool = False) -> bool:
+    """
+    Warm up the environment when it should, called by the handlers built at import
+
+    :param reader:
+    :return: bool, whether the environment was warmed up
+    """
+
+    if not should_warm_up():
+        return False
+
+    return warm_up(reader)
@@ -0,0 +1,150 @@
+"""
+Batch inserts
+
+References:
+    - PyMySQL Cursor.executemany: https://pymysql.readthedocs.io/en/latest/modules/cursors.html#pymysql.cursors.Cursor.executemany
+"""
+
+import os
+from typing import Union, Optional
+
+import pymysql
+
+from .db import execute_with_retry, run_in_transaction
+from .tables import Table
+
+
+WRITE_CHUNK_SIZE = int(os.environ.get('WRITE_CHUNK_SIZE', 500))
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 10000))
+
+
+def parse_batch_request(event: Union[dict, list]) -> tuple:
+    """
+    Read a batch request, either a list of records or {"records": [...], "chunk_size": n}
+
+    :param event:
+    :return: (records, chunk_size)
+    """
+
+    if isinstance(event, list):
+        records, chunk_size = event, None
+    else:
+        records, chunk_size = event.get('records'), event.get('chunk_size')
+
+    if not isinstance(records, list) or not records:
+        raise ValueError('"records" must be a non empty list')
+
+    if len(records) > MAX_BATCH_SIZE:
+        raise ValueError(f'A batch can contain at most {MAX_BATCH_SIZE} records')
+
+    try:
+        chunk_size = int(chunk_size) if chunk_size not in (None, '') else WRITE_CHUNK_SIZE
+    except (TypeError, ValueError):
+        raise ValueError('"chunk_size" must be an integer')
+
+    if chunk_size < 1:
+        raise ValueError('"chunk_size" must be positive')
+
+    return records, chunk_size
+
+
+def validate_record(record, table: Table) -> Optional[str]:
+    """
+    Check a record against the insert fields of the table
+
+    :param record:
+    :param table:
+    :return: the reason the record is rejected, None if it is valid
+    """
+
+    if not isinstance(record, dict):
+        return 'A record must be an object'
+
+    for field, max_length in table.insert_fields.items():
+        if not isinstance(record.get(field), str):
+            return f'"{field}" must be a string'
+
+        if len(record[field]) > max_length:
+            return f'"{field}" must be at most {max_length} characters'
+
+    return None
+
+
+def insert_batch(table: Table, records: list, chunk_size: int) -> dict:
+    """
+    Insert the valid records, one transaction per chunk of chunk_size records: a failing chunk
+    is rolled back and reported while the other chunks are still written
+
+    :param table:
+    :param records:
+    :param chunk_size:
+    :return: dict with the number of inserted and failed records, the result of each chunk
+             and the records rejected by the validation, identified by their index in the request
+    """
+
+    rejected = []
+    valid = []
+
+    for index, record in enumerate(records):
+        error = validate_record(record, table)
+
+        if error is None:
+            valid.append((index, tuple(record[field] for field in table.insert_fields)))
+        else:
+            rejected.append({
+                'index': index,
+                'error': error
+            })
+
+    chunks = []
+    inserted = 0
+    failed = 0
+
+    for start in range(0, len(valid), chunk_size):
+        chunk = valid[start:start + chunk_size]
+        rows = [row for _, row in chunk]
+        chunk_result = {
+            'chunk': len(chunks),
+            'first_index': chunk[0][0],
+            'last_index': chunk[-1][0],
+            'size': len(chunk)
+        }
+
+        try:
+            execute_with_retry(lambda conn: insert_rows(conn, table, rows), idempotent=False)
+            inserted += len(chunk)
+            chunk_result['status'] = 'inserted'
+        except pymysql.MySQLError as e:
+            print(f'Chunk {chunk_result["chunk"]} failed: {e}')
+            failed += len(chunk)
+            chunk_result['status'] = 'failed'
+            chunk_result['error'] = e.args[-1] if e.args else str(e)
+            chunk_result['indexes'] = [index for index, _ in chunk]
+
+        chunks.append(chunk_result)
+
+    print(f'Inserted {inserted} records, {failed} failed, {len(rejected)} rejected')
+
+    return {
+        'inserted': inserted,
+        'failed': failed,
+        'chunks': chunks,
+        'rejected': rejected
+    }
+
+
+def insert_rows(conn: pymysql.connections.Connection, table: Table, rows: list) -> int:
+    """
+    Insert rows in a single transaction, executemany sends them as one multi-row INSERT statement
+
+    :param conn:
+    :param table:
+    :param rows: tuples of values, in the order of the insert fields
+    :return: int number of inserted rows
+    """
+
+    columns = ', '.join(table.insert_fields)
+    placeholders = ', '.join(['%s'] * len(table.insert_fields))
+    sql = f'INSERT INTO {table.name} ({columns}) VALUES ({placeholders})'
+
+    return run_in_transaction(conn, lambda cur: cur.executemany(sql, rows))
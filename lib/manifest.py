@@ -0,0 +1,189 @@
+"""
+Deployment manifest of the cities of a rollout
+
+A manifest lists the cities, the region of each one, the stacks it deploys and their capacity:
+
+    {
+      "cities": [
+        {
+          "name": "Milan",
+          "region": "eu-south-1",
+          "stacks": ["EnergyEfficiencyStack", "SmartTrafficStack"],
+          "capacity": {"db_instance_size": "XLARGE", "lambda_memory_size": 512, "ec2_max_capacity": 8}
+        },
+        {"name": "Oslo", "region": "eu-north-1"}
+      ]
+    }
+
+app.py expands it, with `cdk synth -c manifest=cities.json`, into a stack of each city for each of its stacks
+(MilanEnergyEfficiencyStack, ...) deployed to the region of the city. The resources of a city are prefixed
+with its name (milan-ee-..., MilanEe...), so that the cities share an account and a region. The capacity
+keys are passed to the stacks that take them: the sizes are the names of ec2.InstanceSize, and the EC2
+counts deploy the roles as Auto Scaling groups. The instance types are checked against the catalog of the
+region of the city, see lib/instance_catalog.py.
+
+References:
+  - AWS Doc:
+      - aws_cdk.Environment: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk/Environment.html
+      - aws_ec2.InstanceSize: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/InstanceSize.html
+"""
+
+import re
+import json
+import inspect
+import importlib
+
+from aws_cdk import (
+    Stack,
+    Environment,
+    aws_ec2 as ec2
+)
+from constructs import Construct
+
+from lib.dataclasses import CityConfig, ServicePrefix
+from lib.synth import STACKS, get_stack_class
+
+
+# Keyword arguments of the stacks a city can set, and their type in JSON
+CAPACITY = {
+    'db_instance_size': str,
+    'db_read_replicas': int,
+    'lambda_memory_size': int,
+    'lambda_reserved_concurrency': int,
+    'ec2_min_capacity': int,
+    'ec2_max_capacity': int,
+    'graviton': bool
+}
+
+# The name is the prefix of the names of the resources, its lowercase the one of the bucket names
+CITY_NAME = re.compile(r'^[A-Z][A-Za-z0-9]{0,15}$')
+
+
+def load_manifest(path: str) -> list[CityConfig]:
+    """
+    Read and check a deployment manifest
+
+    :param path:
+    :return: list of the cities, in the order of the manifest
+    """
+
+    with open(path) as f:
+        manifest = json.load(f)
+
+    try:
+        cities = [CityConfig(**city) for city in manifest['cities']]
+    except TypeError as e:
+        raise ValueError(f'Invalid city in {path}: {e}') from None
+
+    names = set()
+
+    for city in cities:
+        if not CITY_NAME.match(city.name):
+            raise ValueError(f'City name "{city.name}" must match {CITY_NAME.pattern}')
+
+        if city.name.lower() in names:
+            raise ValueError(f'City "{city.name}" is listed more than once')
+        names.add(city.name.lower())
+
+        for stack_name in city.stacks or []:
+            if stack_name not in STACKS:
+                raise ValueError(f'Unknown stack "{stack_name}" for {city.name}, expected one of {", ".join(STACKS)}')
+
+        for key, value in (city.capacity or {}).items():
+            if key not in CAPACITY:
+                raise ValueError(f'Unknown capacity "{key}" for {city.name}, expected one of {", ".join(CAPACITY)}')
+
+            capacity_value(city, key, value)
+
+    return cities
+
+
+def capacity_value(city: CityConfig, key: str, value):
+    """
+    Check the type of a capacity value of the city, values are not cast: "false" is not a bool
+
+    :param city:
+    :param key: key of CAPACITY
+    :param value: as read from the manifest
+    :return: the keyword argument of the stacks
+    """
+
+    expected = CAPACITY[key]
+
+    # bool is a subclass of int, true is not a count
+    if not isinstance(value, expected) or (expected is int and isinstance(value, bool)):
+        raise ValueError(f'Invalid {key} {json.dumps(value)} for {city.name}, expected a JSON {expected.__name__}')
+
+    if key == 'db_instance_size':
+        try:
+            return ec2.InstanceSize[value.upper()]
+        except KeyError:
+            raise ValueError(f'Invalid {key} "{value}" for {city.name}, expected a name of ec2.InstanceSize') from None
+
+    return value
+
+
+def city_service_prefix(city: CityConfig, service_prefix: ServicePrefix) -> ServicePrefix:
+    """
+    Prefix of the resources of a stack of the city: st- of Milan is milan-st-, St is MilanSt
+
+    :param city:
+    :param service_prefix: default prefix of the stack
+    :return: ServicePrefix
+    """
+
+    return ServicePrefix(
+        id=f'{city.name.lower()}-{service_prefix.id}',
+        name=city.name + service_prefix.name
+    )
+
+
+def city_stack_kwargs(city: CityConfig, stack_class: type) -> dict:
+    """
+    Keyword arguments of the stack for the capacity of the city, the ones the stack does not take are left out
+
+    :param city:
+    :param stack_class:
+    :return: dict
+    """
+
+    parameters = inspect.signature(stack_class.__init__).parameters
+    kwargs = {
+        key: capacity_value(city, key, value)
+        for key, value in (city.capacity or {}).items()
+        if key in parameters
+    }
+
+    if ('ec2_min_capacity' in kwargs or 'ec2_max_capacity' in kwargs) and 'ec2_autoscaling' in parameters:
+        kwargs['ec2_autoscaling'] = True
+
+    return kwargs
+
+
+def expand_manifest(scope: Construct, cities: list[CityConfig]) -> list[Stack]:
+    """
+    Create the stacks of each city, in its region
+
+    :param scope: app
+    :param cities: of load_manifest
+    :return: list of the stacks, in the order of the cities then of their stacks
+    """
+
+    stacks = []
+
+    for city in cities:
+        for stack_name in city.stacks or list(STACKS):
+            stack_class = get_stack_class(stack_name)
+            default_service_prefix = importlib.import_module(STACKS[stack_name]).default_service_prefix
+
+            stacks.append(
+                stack_class(
+                    scope=scope,
+                    construct_id=city.name + stack_name,
+                    env=Environment(region=city.region),
+                    service_prefix=city_service_prefix(city, default_service_prefix),
+                    **city_stack_kwargs(city, stack_class)
+                )
+            )
+
+    return stacks
@@ -10,21 +10,50 @@ References:
         - aws_ec2.InstanceType: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/InstanceType.html
         - aws_rds.DatabaseInstance: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/DatabaseInstance.html#aws_cdk.aws_rds.DatabaseInstance.vpc
         - aws_rds.DatabaseInstanceEngine: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/DatabaseInstanceEngine.html
-        - aws_lambda_python_alpha.PythonFunction: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_lambda_python_alpha/PythonFunction.html#aws_cdk.aws_lambda_python_alpha.PythonFunction.env
+        - aws_rds.DatabaseProxy: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/DatabaseProxy.html
+        - aws_rds.DatabaseInstanceReadReplica: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/DatabaseInstanceReadReplica.html
+        - aws_lambda.Function: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_lambda/Function.html
+        - aws_lambda.LayerVersion: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_lambda/LayerVersion.html
         - aws_ec2.BastionHostLinux: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/BastionHostLinux.html#aws_cdk.aws_ec2.BastionHostLinux.instance
         - aws_ec2.Instance: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/Instance.html#aws_cdk.aws_ec2.Instance
         - aws_ec2.InstanceType: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/InstanceType.html#aws_cdk.aws_ec2.InstanceType
         - aws_ec2.MachineImage: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/MachineImage.html#aws_cdk.aws_ec2.MachineImage
         - aws_ec2.IMachineImage: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/IMachineImage.html#aws_cdk.aws_ec2.IMachineImage
+        - aws_ec2.LaunchTemplate: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/LaunchTemplate.html
+        - aws_autoscaling.AutoScalingGroup: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_autoscaling/AutoScalingGroup.html
+        - Target tracking scaling policies: https://docs.aws.amazon.com/autoscaling/ec2/userguide/as-scaling-target-tracking.html
+        - aws_elasticloadbalancingv2.NetworkLoadBalancer: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_elasticloadbalancingv2/NetworkLoadBalancer.html
+        - aws_imagebuilder: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_imagebuilder.html
+        - Image Builder component document: https://docs.aws.amazon.com/imagebuilder/latest/userguide/toe-use-documents.html
+        - aws_sqs.Queue: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_sqs/Queue.html
+        - aws_sqs.DeadLetterQueue: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_sqs/DeadLetterQueue.html
+        - aws_kinesis.Stream: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_kinesis/Stream.html
+        - aws_kinesisfirehose.CfnDeliveryStream: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_kinesisfirehose/CfnDeliveryStream.html
+        - aws_lambda.Alias: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_lambda/Alias.html
+        - Lambda provisioned concurrency: https://docs.aws.amazon.com/lambda/latest/dg/provisioned-concurrency.html
+        - Scheduled scaling for Application Auto Scaling: https://docs.aws.amazon.com/autoscaling/application/userguide/application-auto-scaling-scheduled-scaling.html
 """
 
+import os
+import json
+import functools
+from typing import Optional
+
 from aws_cdk import (
     CfnOutput,
+    Stack,
+    Token,
     aws_ec2 as ec2,
     aws_rds as rds,
     aws_iam as iam,
-    aws_lambda_python_alpha as lambda_python,
-    aws_s3 as s3
+    aws_lambda as lambda_,
+    aws_s3 as s3,
+    aws_sqs as sqs,
+    aws_kinesis as kinesis,
+    aws_kinesisfirehose as firehose,
+    aws_autoscaling as autoscaling,
+    aws_elasticloadbalancingv2 as elbv2,
+    aws_imagebuilder as imagebuilder
 )
 
 from lib.dataclasses import (
@@ -33,14 +62,26 @@ from lib.dataclasses import (
     VpcConfig,
     SubnetConfig,
     DbConfig,
+    DbProxyConfig,
     LambdaConfig,
+    LambdaLayerConfig,
+    LambdaAliasConfig,
     Ec2Config,
+    AsgConfig,
+    LoadBalancerConfig,
+    ImagePipelineConfig,
     BastionHostConfig,
     IamRoleConfig,
     S3Config,
+    SqsConfig,
+    KinesisStreamConfig,
+    FirehoseConfig,
     SshKeyConfig
 )
 
+from lib.bundling import get_code, get_requirements_code, requirements_hash
+from lib.instance_catalog import validate_instance_type
+
 
 def create_security_group(instance_class, service_prefix: ServicePrefix,
                           sg_config: SecurityGroupConfig) -> ec2.SecurityGroup:
@@ -121,6 +162,12 @@ def create_rds_mysql(instance_class, service_prefix: ServicePrefix, db_config: D
     db_name = service_prefix.name + 'RdsMysql'
     db_engine_version = db_config.engine_version
     db_subnet_id = service_prefix.id + db_config.vpc_subnet_id
+    db_instance_type = ec2.InstanceType.of(
+        db_config.instance_class,
+        db_config.instance_size
+    )
+
+    validate_instance_type(instance_class, db_instance_type, service='rds')
 
     return rds.DatabaseInstance(
         instance_class,
@@ -134,10 +181,7 @@ def create_rds_mysql(instance_class, service_prefix: ServicePrefix, db_config: D
         vpc_subnets=ec2.SubnetSelection(
             subnet_group_name=db_subnet_id
         ),
-        instance_type=ec2.InstanceType.of(
-            db_config.instance_class,
-            db_config.instance_size
-        ),
+        instance_type=db_instance_type,
         allocated_storage=db_config.allocated_storage,
         deletion_protection=db_config.deletion_protection,
         delete_automated_backups=db_config.delete_automated_backups,
@@ -146,10 +190,87 @@ def create_rds_mysql(instance_class, service_prefix: ServicePrefix, db_config: D
     )
 
 
+def create_rds_read_replicas(instance_class, service_prefix: ServicePrefix, db_config: DbConfig,
+                             source_db_instance: rds.DatabaseInstance) -> list[rds.DatabaseInstanceReadReplica]:
+    """
+    Create db_config.read_replicas read replicas of an RDS MySQL instance, in the same subnets
+    and security groups, so that they accept the same clients as the source instance
+
+    :param instance_class:
+    :param service_prefix:
+    :param db_config:
+    :param source_db_instance:
+    :return: list[rds.DatabaseInstanceReadReplica]
+    """
+
+    db_id = service_prefix.id + db_config.id
+    db_subnet_id = service_prefix.id + db_config.vpc_subnet_id
+    db_instance_type = ec2.InstanceType.of(
+        db_config.instance_class,
+        db_config.instance_size
+    )
+
+    if db_config.read_replicas > 0:
+        validate_instance_type(instance_class, db_instance_type, service='rds')
+
+    return [
+        rds.DatabaseInstanceReadReplica(
+            instance_class,
+            id=f'{db_id}-replica-{i}',
+            source_database_instance=source_db_instance,
+            vpc=db_config.vpc,
+            vpc_subnets=ec2.SubnetSelection(
+                subnet_group_name=db_subnet_id
+            ),
+            instance_type=db_instance_type,
+            deletion_protection=db_config.deletion_protection,
+            delete_automated_backups=db_config.delete_automated_backups,
+            security_groups=db_config.security_groups
+        )
+        for i in range(1, db_config.read_replicas + 1)
+    ]
+
+
+def create_rds_proxy(instance_class, service_prefix: ServicePrefix, proxy_config: DbProxyConfig) -> rds.DatabaseProxy:
+    """
+    Create an RDS Proxy in front of an RDS instance, pooling and sharing the database connections
+    of the clients so that bursts of Lambda invocations do not exhaust max_connections
+
+    :param instance_class:
+    :param service_prefix:
+    :param proxy_config:
+    :return: rds.DatabaseProxy
+    """
+
+    proxy_id = service_prefix.id + proxy_config.id
+    proxy_name = service_prefix.name + proxy_config.name
+    proxy_subnet_id = service_prefix.id + proxy_config.vpc_subnet_id
+
+    # ProxyTarget.from_instance also opens the port of the instance to the proxy
+    return rds.DatabaseProxy(
+        instance_class,
+        id=proxy_id,
+        db_proxy_name=proxy_name,
+        proxy_target=rds.ProxyTarget.from_instance(proxy_config.db_instance),
+        secrets=[proxy_config.db_instance.secret],
+        vpc=proxy_config.vpc,
+        vpc_subnets=ec2.SubnetSelection(
+            subnet_group_name=proxy_subnet_id
+        ),
+        security_groups=proxy_config.security_groups,
+        max_connections_percent=proxy_config.max_connections_percent,
+        max_idle_connections_percent=proxy_config.max_idle_connections_percent,
+        borrow_timeout=proxy_config.borrow_timeout,
+        idle_client_timeout=proxy_config.idle_client_timeout,
+        require_tls=proxy_config.require_tls
+    )
+
+
 def create_lambda(instance_class, service_prefix: ServicePrefix,
-                  lambda_config: LambdaConfig) -> lambda_python.PythonFunction:
+                  lambda_config: LambdaConfig) -> lambda_.Function:
     """
-    Create a Lambda function with custom dependencies
+    Create a Lambda function with custom dependencies, bundled on the host when pip can install them
+    and in the bundling image of the runtime otherwise
 
     :param instance_class:
     :param service_prefix:
@@ -160,15 +281,30 @@ def create_lambda(instance_class, service_prefix: ServicePrefix,
     lambda_id = service_prefix.id + lambda_config.id
     lambda_function_name = service_prefix.name + lambda_config.name
     lambda_subnet_id = service_prefix.id + lambda_config.vpc_subnet_id
+    environment = lambda_config.environment
+
+    if lambda_config.warmup_on_init:
+        environment = {**(environment or {}), 'WARMUP_ON_INIT': 'true'}
 
-    base_lambda = lambda_python.PythonFunction(
+    layers = lambda_config.layers
+    requirements_path = os.path.join(lambda_config.code_folder_path, 'requirements.txt')
+    with_requirements = not (lambda_config.requirements_layer and os.path.isfile(requirements_path))
+
+    if not with_requirements:
+        layers = (layers or []) + [
+            create_requirements_layer(
+                instance_class, service_prefix, requirements_path, lambda_config.runtime, lambda_config.architecture
+            )
+        ]
+
+    base_lambda = lambda_.Function(
         instance_class,
         id=lambda_id,
         function_name=lambda_function_name,
         description=lambda_config.description,
-        entry=lambda_config.code_folder_path,
-        index=lambda_config.index_file_name,
-        handler=lambda_config.handler,
+        code=get_code(lambda_config.code_folder_path, lambda_config.runtime, lambda_config.architecture,
+                      with_requirements=with_requirements),
+        handler=os.path.splitext(lambda_config.index_file_name)[0] + '.' + lambda_config.handler,
         runtime=lambda_config.runtime,
         vpc=lambda_config.vpc,
         vpc_subnets=ec2.SubnetSelection(
@@ -177,13 +313,162 @@ def create_lambda(instance_class, service_prefix: ServicePrefix,
         security_groups=lambda_config.security_groups,
         timeout=lambda_config.timeout,
         memory_size=lambda_config.memory_size,
-        environment=lambda_config.environment,
-        role=lambda_config.role
+        environment=environment,
+        role=lambda_config.role,
+        layers=layers,
+        # Caps the concurrent executions, hence the database connections, of the function
+        reserved_concurrent_executions=lambda_config.reserved_concurrent_executions,
+        architecture=lambda_config.architecture
     )
 
     return base_lambda
 
 
+def create_lambda_alias(instance_class, service_prefix: ServicePrefix, lambda_function: lambda_.Function,
+                        alias_config: LambdaAliasConfig) -> lambda_.Alias:
+    """
+    Create an alias of the current version of a Lambda function, with its provisioned concurrency
+    and the scheduled scaling of it. The callers must invoke the alias to use the provisioned environments
+
+    :param instance_class:
+    :param service_prefix:
+    :param lambda_function:
+    :param alias_config:
+    :return: lambda_.Alias
+    """
+
+    alias = lambda_.Alias(
+        instance_class,
+        id=service_prefix.id + alias_config.id,
+        alias_name=alias_config.name,
+        description=alias_config.description,
+        version=lambda_function.current_version,
+        provisioned_concurrent_executions=alias_config.provisioned_concurrency or None
+    )
+
+    schedules = alias_config.schedules or []
+
+    if schedules or alias_config.utilization_target is not None:
+        scaling = alias.add_auto_scaling(
+            min_capacity=alias_config.provisioned_concurrency,
+            max_capacity=alias_config.max_provisioned_concurrency or max(
+                [alias_config.provisioned_concurrency] +
+                [schedule.max_capacity or schedule.min_capacity for schedule in schedules]
+            )
+        )
+
+        for schedule in schedules:
+            scaling.scale_on_schedule(
+                schedule.id,
+                schedule=schedule.schedule,
+                min_capacity=schedule.min_capacity,
+                max_capacity=schedule.max_capacity
+            )
+
+        if alias_config.utilization_target is not None:
+            scaling.scale_on_utilization(
+                utilization_target=alias_config.utilization_target
+            )
+
+    return alias
+
+
+def create_lambda_layer(instance_class, service_prefix: ServicePrefix,
+                        layer_config: LambdaLayerConfig) -> lambda_.LayerVersion:
+    """
+    Create a Lambda layer from a folder of Python packages, installed under /opt/python
+
+    :param instance_class:
+    :param service_prefix:
+    :param layer_config:
+    :return: lambda_.LayerVersion
+    """
+
+    compatible_runtimes = layer_config.compatible_runtimes or [LambdaConfig.runtime]
+    compatible_architectures = layer_config.compatible_architectures or [lambda_.Architecture.X86_64]
+
+    return lambda_.LayerVersion(
+        instance_class,
+        id=service_prefix.id + layer_config.id,
+        layer_version_name=service_prefix.name + layer_config.name,
+        description=layer_config.description,
+        code=get_code(layer_config.code_folder_path, compatible_runtimes[0], compatible_architectures[0],
+                      output_path_suffix='python'),
+        compatible_runtimes=compatible_runtimes,
+        compatible_architectures=compatible_architectures
+    )
+
+
+def create_requirements_layer(instance_class, service_prefix: ServicePrefix, requirements_path: str,
+                              runtime: lambda_.Runtime, architecture: lambda_.Architecture) -> lambda_.LayerVersion:
+    """
+    Create the layer of the packages of a requirements.txt, or return the one of the stack with the same
+    requirements. The asset of the layer only depends on the requirements, the runtime and the architecture:
+    the layers of the same requirements in other stacks share it, and it is uploaded once
+
+    :param instance_class:
+    :param service_prefix:
+    :param requirements_path:
+    :param runtime:
+    :param architecture:
+    :return: lambda_.LayerVersion
+    """
+
+    stack = Stack.of(instance_class)
+    key = requirements_hash(requirements_path, runtime, architecture)[:12]
+    layer_id = service_prefix.id + 'requirements-' + key
+
+    layer = stack.node.try_find_child(layer_id)
+    if layer is not None:
+        return layer
+
+    with open(requirements_path) as f:
+        requirements = ', '.join(line.strip() for line in f if line.strip() and not line.startswith('#'))
+
+    return lambda_.LayerVersion(
+        stack,
+        id=layer_id,
+        layer_version_name=service_prefix.name + 'Requirements-' + key,
+        description=f'Packages of the Lambda functions: {requirements}'[:256],
+        code=get_requirements_code(requirements_path, runtime, architecture),
+        compatible_runtimes=[runtime],
+        compatible_architectures=[architecture]
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def read_user_data(path: str) -> str:
+    """
+    Read a user data script, once per process, when a stack is built with it rather than at the import of
+    the stack module: synthesizing a subset of the stacks does not read the scripts of the others
+
+    :param path: relative to the root of the repository
+    :return: str
+    """
+
+    with open(path) as f:
+        return f.read()
+
+
+def get_machine_image(instance_type: ec2.InstanceType) -> ec2.IMachineImage:
+    """
+    Return the latest Amazon Linux 2023 image for the architecture of the instance type,
+    arm64 for the Graviton families (e.g. T4G, M7G)
+
+    :param instance_type:
+    :return: ec2.IMachineImage
+    """
+
+    if instance_type.architecture == ec2.InstanceArchitecture.ARM_64:
+        cpu_type = ec2.AmazonLinuxCpuType.ARM_64
+    else:
+        cpu_type = ec2.AmazonLinuxCpuType.X86_64
+
+    return ec2.MachineImage.latest_amazon_linux2023(
+        cpu_type=cpu_type
+    )
+
+
 def create_ec2(instance_class, service_prefix: ServicePrefix, ec2_config: Ec2Config) -> ec2.Instance:
     """
     Create an EC2 instance
@@ -196,15 +481,18 @@ def create_ec2(instance_class, service_prefix: ServicePrefix, ec2_config: Ec2Con
 
     ec2_id = service_prefix.id + ec2_config.id
     ec2_subnet_id = service_prefix.id + ec2_config.vpc_subnet_id
+    ec2_instance_type = ec2.InstanceType.of(
+        ec2_config.instance_class,
+        ec2_config.instance_size
+    )
+
+    validate_instance_type(instance_class, ec2_instance_type)
 
     instance = ec2.Instance(
         instance_class,
         id=ec2_id,
-        instance_type=ec2.InstanceType.of(
-            ec2_config.instance_class,
-            ec2_config.instance_size
-        ),
-        machine_image=ec2_config.machine_image,
+        instance_type=ec2_instance_type,
+        machine_image=ec2_config.machine_image or get_machine_image(ec2_instance_type),
         vpc=ec2_config.vpc,
         vpc_subnets=ec2.SubnetSelection(
             subnet_group_name=ec2_subnet_id
@@ -220,6 +508,261 @@ def create_ec2(instance_class, service_prefix: ServicePrefix, ec2_config: Ec2Con
     return instance
 
 
+def create_autoscaling_group(instance_class, service_prefix: ServicePrefix,
+                             asg_config: AsgConfig) -> autoscaling.AutoScalingGroup:
+    """
+    Create an Auto Scaling group launching the instances from a launch template, scaled by target tracking
+
+    :param instance_class:
+    :param service_prefix:
+    :param asg_config:
+    :return: autoscaling.AutoScalingGroup
+    """
+
+    asg_id = service_prefix.id + asg_config.id
+    asg_subnet_id = service_prefix.id + asg_config.vpc_subnet_id
+    asg_instance_type = ec2.InstanceType.of(
+        asg_config.instance_class,
+        asg_config.instance_size
+    )
+
+    validate_instance_type(instance_class, asg_instance_type)
+
+    launch_template = ec2.LaunchTemplate(
+        instance_class,
+        id=asg_id + '-lt',
+        instance_type=asg_instance_type,
+        machine_image=asg_config.machine_image or get_machine_image(asg_instance_type),
+        role=asg_config.role,
+        security_group=asg_config.security_group,
+        key_name=asg_config.key_name,
+        # The user data of the group is the one of its launch template
+        user_data=ec2.UserData.for_linux()
+    )
+
+    asg = autoscaling.AutoScalingGroup(
+        instance_class,
+        id=asg_id,
+        vpc=asg_config.vpc,
+        vpc_subnets=ec2.SubnetSelection(
+            subnet_group_name=asg_subnet_id
+        ),
+        launch_template=launch_template,
+        min_capacity=asg_config.min_capacity,
+        max_capacity=asg_config.max_capacity,
+        desired_capacity=asg_config.desired_capacity,
+        default_instance_warmup=asg_config.default_instance_warmup,
+        health_check=autoscaling.HealthCheck.elb(
+            grace=asg_config.health_check_grace_period
+        ) if asg_config.elb_health_check else autoscaling.HealthCheck.ec2(
+            grace=asg_config.health_check_grace_period
+        )
+    )
+
+    if asg_config.target_cpu_utilization is not None:
+        asg.scale_on_cpu_utilization(
+            id=asg_id + '-cpu-scaling',
+            target_utilization_percent=asg_config.target_cpu_utilization
+        )
+
+    if asg_config.scaling_metric is not None:
+        asg.scale_to_track_metric(
+            id=asg_id + '-metric-scaling',
+            metric=asg_config.scaling_metric,
+            target_value=asg_config.scaling_metric_target
+        )
+
+    return asg
+
+
+def create_internal_load_balancer(instance_class, service_prefix: ServicePrefix,
+                                  lb_config: LoadBalancerConfig) -> elbv2.NetworkLoadBalancer:
+    """
+    Create an internal Network Load Balancer forwarding a TCP port to Auto Scaling groups
+
+    :param instance_class:
+    :param service_prefix:
+    :param lb_config:
+    :return: elbv2.NetworkLoadBalancer
+    """
+
+    lb_id = service_prefix.id + lb_config.id
+
+    load_balancer = elbv2.NetworkLoadBalancer(
+        instance_class,
+        id=lb_id,
+        vpc=lb_config.vpc,
+        vpc_subnets=ec2.SubnetSelection(
+            subnet_group_name=service_prefix.id + lb_config.vpc_subnet_id
+        ),
+        internet_facing=False,
+        cross_zone_enabled=True
+    )
+
+    listener = load_balancer.add_listener(
+        id=lb_id + '-listener',
+        port=lb_config.port,
+        protocol=elbv2.Protocol.TCP
+    )
+
+    listener.add_targets(
+        id=lb_id + '-targets',
+        port=lb_config.port,
+        protocol=elbv2.Protocol.TCP,
+        targets=lb_config.targets,
+        deregistration_delay=lb_config.deregistration_delay,
+        health_check=elbv2.HealthCheck(
+            protocol=elbv2.Protocol.TCP,
+            interval=lb_config.health_check_interval
+        )
+    )
+
+    return load_balancer
+
+
+def create_image_pipeline(instance_class, service_prefix: ServicePrefix,
+                          image_config: ImagePipelineConfig) -> imagebuilder.CfnImagePipeline:
+    """
+    Create an EC2 Image Builder pipeline baking an AMI: the parent image with the build commands already run
+
+    :param instance_class:
+    :param service_prefix:
+    :param image_config:
+    :return: imagebuilder.CfnImagePipeline
+    """
+
+    image_id = service_prefix.id + image_config.id
+    image_name = service_prefix.name + image_config.name
+
+    role = iam.Role(
+        instance_class,
+        id=image_id + '-role',
+        assumed_by=iam.ServicePrincipal('ec2.amazonaws.com'),
+        managed_policies=[
+            iam.ManagedPolicy.from_aws_managed_policy_name('EC2InstanceProfileForImageBuilder'),
+            iam.ManagedPolicy.from_aws_managed_policy_name('AmazonSSMManagedInstanceCore')
+        ]
+    )
+
+    for statement in image_config.policy_statements or []:
+        role.add_to_policy(statement)
+
+    instance_profile = iam.CfnInstanceProfile(
+        instance_class,
+        id=image_id + '-instance-profile',
+        roles=[role.role_name]
+    )
+
+    # JSON is valid YAML, the format of the component documents
+    component = imagebuilder.CfnComponent(
+        instance_class,
+        id=image_id + '-component',
+        name=image_name + 'Component',
+        platform='Linux',
+        version=image_config.version,
+        description=image_config.description,
+        data=json.dumps({
+            'name': image_name,
+            'description': image_config.description,
+            'schemaVersion': 1.0,
+            'phases': [
+                {
+                    'name': 'build',
+                    'steps': [
+                        {
+                            'name': 'Bake',
+                            'action': 'ExecuteBash',
+                            'inputs': {
+                                'commands': image_config.build_commands
+                            }
+                        }
+                    ]
+                }
+            ]
+        }, indent=2)
+    )
+
+    recipe = imagebuilder.CfnImageRecipe(
+        instance_class,
+        id=image_id + '-recipe',
+        name=image_name + 'Recipe',
+        version=image_config.version,
+        parent_image=image_config.parent_image.get_image(instance_class).image_id,
+        components=[
+            imagebuilder.CfnImageRecipe.ComponentConfigurationProperty(
+                component_arn=component.attr_arn
+            )
+        ]
+    )
+
+    subnet_id = None
+    if image_config.vpc is not None:
+        subnet_id = image_config.vpc.select_subnets(
+            subnet_group_name=service_prefix.id + image_config.vpc_subnet_id
+        ).subnet_ids[0]
+
+    infrastructure = imagebuilder.CfnInfrastructureConfiguration(
+        instance_class,
+        id=image_id + '-infrastructure',
+        name=image_name + 'Infrastructure',
+        instance_profile_name=instance_profile.ref,
+        instance_types=image_config.instance_types,
+        subnet_id=subnet_id,
+        security_group_ids=[image_config.security_group.security_group_id] if image_config.security_group else None,
+        terminate_instance_on_failure=True
+    )
+
+    # The build instance cannot start before its role has its permissions
+    infrastructure.node.add_dependency(role)
+
+    pipeline = imagebuilder.CfnImagePipeline(
+        instance_class,
+        id=image_id,
+        name=image_name,
+        description=image_config.description,
+        image_recipe_arn=recipe.attr_arn,
+        infrastructure_configuration_arn=infrastructure.attr_arn,
+        schedule=imagebuilder.CfnImagePipeline.ScheduleProperty(
+            schedule_expression=image_config.schedule_expression,
+            pipeline_execution_start_condition='EXPRESSION_MATCH_ONLY'
+        ) if image_config.schedule_expression else None
+    )
+
+    CfnOutput(
+        instance_class,
+        id=image_id + '-arn',
+        value=pipeline.attr_arn
+    )
+
+    return pipeline
+
+
+def get_baked_image(instance_class, context_key: str) -> Optional[ec2.IMachineImage]:
+    """
+    Return the image baked by a pipeline, given in the context as an AMI id or as a map of AMI ids
+    per region (e.g. cdk deploy -c st-ec2-wr-ami=ami-0123456789abcdef0), None when it is not
+
+    :param instance_class:
+    :param context_key:
+    :return: ec2.IMachineImage or None
+    """
+
+    ami = instance_class.node.try_get_context(context_key)
+
+    if not ami:
+        return None
+
+    if isinstance(ami, dict):
+        return ec2.MachineImage.generic_linux(ami)
+
+    region = Stack.of(instance_class).region
+
+    if Token.is_unresolved(region):
+        raise ValueError(f'"{context_key}" must map the regions to their AMI ids for a stack without region')
+
+    return ec2.MachineImage.generic_linux({region: ami})
+
+
 def create_bastion_host(instance_class, service_prefix: ServicePrefix,
                         bh_config: BastionHostConfig) -> ec2.BastionHostLinux:
     """
@@ -231,6 +774,13 @@ def create_bastion_host(instance_class, service_prefix: ServicePrefix,
     :return:
     """
 
+    bh_instance_type = ec2.InstanceType.of(
+        bh_config.instance_class,
+        bh_config.instance_size
+    )
+
+    validate_instance_type(instance_class, bh_instance_type)
+
     bh = ec2.BastionHostLinux(
         instance_class,
         id=service_prefix.id + bh_config.id,
@@ -239,10 +789,7 @@ def create_bastion_host(instance_class, service_prefix: ServicePrefix,
             subnet_group_name=service_prefix.id + bh_config.vpc_subnet_id
         ),
         instance_name=service_prefix.name + bh_config.name,
-        instance_type=ec2.InstanceType.of(
-            bh_config.instance_class,
-            bh_config.instance_size
-        ),
+        instance_type=bh_instance_type,
         security_group=bh_config.security_group
     )
 
@@ -327,9 +874,117 @@ def create_s3_bucket(instance_class, service_prefix: ServicePrefix,
         bucket_name=s3_id,
         removal_policy=s3_config.removal_policy,
         block_public_access=s3_config.block_public_access,
-        auto_delete_objects=s3_config.auto_delete_objects
+        auto_delete_objects=s3_config.auto_delete_objects,
+        lifecycle_rules=s3_config.lifecycle_rules
+    )
+
+
+def create_sqs_queue(instance_class, service_prefix: ServicePrefix,
+                     sqs_config: SqsConfig) -> sqs.Queue:
+    """
+    Create an SQS queue, with a dead-letter queue receiving the messages that failed max_receive_count times
+
+    :param instance_class:
+    :param service_prefix:
+    :param sqs_config:
+    :return: sqs.Queue
+    """
+
+    queue_id = service_prefix.id + sqs_config.id
+
+    dead_letter_queue = sqs.Queue(
+        instance_class,
+        id=queue_id + '-dlq',
+        queue_name=service_prefix.name + sqs_config.name + 'Dlq',
+        retention_period=sqs_config.dlq_retention_period
+    )
+
+    return sqs.Queue(
+        instance_class,
+        id=queue_id,
+        queue_name=service_prefix.name + sqs_config.name,
+        visibility_timeout=sqs_config.visibility_timeout,
+        retention_period=sqs_config.retention_period,
+        dead_letter_queue=sqs.DeadLetterQueue(
+            queue=dead_letter_queue,
+            max_receive_count=sqs_config.max_receive_count
+        )
+    )
+
+
+def create_kinesis_stream(instance_class, service_prefix: ServicePrefix,
+                          stream_config: KinesisStreamConfig) -> kinesis.Stream:
+    """
+    Create a Kinesis data stream
+
+    :param instance_class:
+    :param service_prefix:
+    :param stream_config:
+    :return: kinesis.Stream
+    """
+
+    provisioned = stream_config.stream_mode == kinesis.StreamMode.PROVISIONED
+
+    return kinesis.Stream(
+        instance_class,
+        id=service_prefix.id + stream_config.id,
+        stream_name=service_prefix.name + stream_config.name,
+        stream_mode=stream_config.stream_mode,
+        shard_count=stream_config.shard_count if provisioned else None,
+        retention_period=stream_config.retention_period,
+        encryption=stream_config.encryption
+    )
+
+
+def create_firehose_delivery_stream(instance_class, service_prefix: ServicePrefix,
+                                    firehose_config: FirehoseConfig) -> firehose.CfnDeliveryStream:
+    """
+    Create a Firehose delivery stream reading a Kinesis data stream and writing its records to an S3 bucket
+
+    :param instance_class:
+    :param service_prefix:
+    :param firehose_config:
+    :return: firehose.CfnDeliveryStream
+    """
+
+    firehose_id = service_prefix.id + firehose_config.id
+
+    role = iam.Role(
+        instance_class,
+        id=firehose_id + '-role',
+        assumed_by=iam.ServicePrincipal('firehose.amazonaws.com')
+    )
+
+    firehose_config.source_stream.grant_read(role)
+    firehose_config.destination_bucket.grant_read_write(role)
+
+    delivery_stream = firehose.CfnDeliveryStream(
+        instance_class,
+        id=firehose_id,
+        delivery_stream_name=service_prefix.name + firehose_config.name,
+        delivery_stream_type='KinesisStreamAsSource',
+        kinesis_stream_source_configuration=firehose.CfnDeliveryStream.KinesisStreamSourceConfigurationProperty(
+            kinesis_stream_arn=firehose_config.source_stream.stream_arn,
+            role_arn=role.role_arn
+        ),
+        extended_s3_destination_configuration=firehose.CfnDeliveryStream.ExtendedS3DestinationConfigurationProperty(
+            bucket_arn=firehose_config.destination_bucket.bucket_arn,
+            role_arn=role.role_arn,
+            prefix=firehose_config.prefix or None,
+            error_output_prefix=firehose_config.error_output_prefix,
+            compression_format=firehose_config.compression_format,
+            buffering_hints=firehose.CfnDeliveryStream.BufferingHintsProperty(
+                interval_in_seconds=int(firehose_config.buffering_interval.to_seconds()),
+                size_in_m_bs=firehose_config.buffering_size_mib
+            )
+        )
     )
 
+    # Firehose checks its permissions when the delivery stream is created
+    delivery_stream.node.add_dependency(role)
+
+    return delivery_stream
+
 
 # TODO
 def create_ssh_key(instance_class, service_prefix: ServicePrefix, ssh_key_config: SshKeyConfig) -> None:
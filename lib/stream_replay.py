@@ -0,0 +1,261 @@
+"""
+Local replay of recorded sensor events through a Kinesis consumer
+
+The events of a newline-delimited JSON file are assigned to the shards of a simulated stream the way
+Kinesis does it (MD5 of the partition key), then delivered in order, shard by shard, to a consumer
+receiving the events of the Lambda Kinesis event source: {"Records": [...]}. The shards are consumed
+in parallel by a pool of workers, one worker per shard at a time, as the Lambda event source and the
+KCL do. A consumer may return {"batchItemFailures": [{"itemIdentifier": sequenceNumber}]}: the batch
+is then delivered again from the first failed record.
+
+    python -m lib.stream_replay events.ndjson --shards 4 --workers 4 --consumer module:function
+
+References:
+    - Kinesis partition keys and shards: https://docs.aws.amazon.com/streams/latest/dev/key-concepts.html
+    - Using Lambda with Kinesis: https://docs.aws.amazon.com/lambda/latest/dg/with-kinesis.html
+    - Reporting batch item failures for Kinesis: https://docs.aws.amazon.com/lambda/latest/dg/with-kinesis.html#services-kinesis-batchfailurereporting
+"""
+
+import argparse
+import base64
+import hashlib
+import importlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Optional
+
+
+HASH_KEY_SPACE = 2 ** 128
+
+STREAM_ARN = 'arn:aws:kinesis:eu-north-1:000000000000:stream/StSensorStream'
+
+
+def load_events(path: str) -> list:
+    """
+    Read the events recorded as newline-delimited JSON, blank lines are skipped
+
+    :param path:
+    :return: list of events
+    """
+
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def shard_for(partition_key: str, shard_count: int) -> int:
+    """
+    Index of the shard receiving the partition key, for a stream whose hash key range is evenly split
+
+    :param partition_key:
+    :param shard_count:
+    :return: int
+    """
+
+    hash_key = int(hashlib.md5(partition_key.encode('utf-8')).hexdigest(), 16)
+
+    return hash_key * shard_count // HASH_KEY_SPACE
+
+
+def to_kinesis_record(event, partition_key: str, shard_id: str, sequence_number: str) -> dict:
+    """
+    Record of the Lambda Kinesis event source carrying the event as its base64 JSON data
+
+    :param event:
+    :param partition_key:
+    :param shard_id:
+    :param sequence_number:
+    :return: dict
+    """
+
+    return {
+        'kinesis': {
+            'kinesisSchemaVersion': '1.0',
+            'partitionKey': partition_key,
+            'sequenceNumber': sequence_number,
+            'data': base64.b64encode(json.dumps(event).encode('utf-8')).decode(),
+            'approximateArrivalTimestamp': time.time()
+        },
+        'eventSource': 'aws:kinesis',
+        'eventVersion': '1.0',
+        'eventID': f'{shard_id}:{sequence_number}',
+        'eventName': 'aws:kinesis:record',
+        'eventSourceARN': STREAM_ARN
+    }
+
+
+def decode_record(record: dict):
+    """
+    Event carried by a record of the Lambda Kinesis event source
+
+    :param record:
+    :return: the decoded event
+    """
+
+    return json.loads(base64.b64decode(record['kinesis']['data']))
+
+
+def partition(events: Iterable, shard_count: int, partition_key_field: str = 'sensor_id') -> list:
+    """
+    Put the events in the shards of the stream, keeping their order within each shard
+
+    :param events:
+    :param shard_count:
+    :param partition_key_field: field of the events used as partition key
+    :return: list of records per shard
+    """
+
+    shards = [[] for _ in range(shard_count)]
+
+    for index, event in enumerate(events):
+        partition_key = str(event.get(partition_key_field, index)) if isinstance(event, dict) else str(index)
+        shard = shard_for(partition_key, shard_count)
+        shard_id = f'shardId-{shard:012d}'
+        # Increasing within a shard, as the sequence numbers of Kinesis
+        sequence_number = f'{len(shards[shard]) + 1:056d}'
+
+        shards[shard].append(to_kinesis_record(event, partition_key, shard_id, sequence_number))
+
+    return shards
+
+
+def consume_shard(records: list, consumer: Callable, batch_size: int, max_retries: int) -> dict:
+    """
+    Deliver the records of a shard to the consumer in batches, in order
+
+    :param records:
+    :param consumer:
+    :param batch_size:
+    :param max_retries: deliveries of a failing batch before its failed records are skipped
+    :return: dict with the number of batches, delivered and failed records
+    """
+
+    batches = 0
+    failed = 0
+    position = 0
+    retries = 0
+
+    while position < len(records):
+        batch = records[position:position + batch_size]
+        batches += 1
+
+        response = consumer({'Records': batch}, None) or {}
+        failed_sequence_numbers = [failure['itemIdentifier'] for failure in response.get('batchItemFailures') or []]
+
+        if not failed_sequence_numbers:
+            position += len(batch)
+            retries = 0
+            continue
+
+        sequence_numbers = [record['kinesis']['sequenceNumber'] for record in batch]
+        first_failed = min(sequence_numbers.index(sequence_number) for sequence_number in failed_sequence_numbers)
+
+        if retries < max_retries:
+            # The records before the first failure are checkpointed, the others are delivered again
+            position += first_failed
+            retries += 1
+        else:
+            failed += len(batch) - first_failed
+            position += len(batch)
+            retries = 0
+
+    return {
+        'batches': batches,
+        'records': len(records),
+        'failed': failed
+    }
+
+
+def replay(events: Iterable, consumer: Callable, shard_count: int = 1, workers: Optional[int] = None,
+           batch_size: int = 100, max_retries: int = 2, partition_key_field: str = 'sensor_id') -> dict:
+    """
+    Replay the events through the consumer, the shards being consumed in parallel by the workers
+
+    :param events:
+    :param consumer: handler receiving the Lambda Kinesis events
+    :param shard_count:
+    :param workers: defaults to one worker per shard
+    :param batch_size:
+    :param max_retries:
+    :param partition_key_field:
+    :return: dict with the statistics of the replay and of each shard
+    """
+
+    shards = partition(events, shard_count, partition_key_field)
+
+    started = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=workers or shard_count) as executor:
+        results = list(executor.map(lambda records: consume_shard(records, consumer, batch_size, max_retries), shards))
+
+    elapsed = time.perf_counter() - started
+    delivered = sum(result['records'] for result in results)
+
+    return {
+        'events': delivered,
+        'failed': sum(result['failed'] for result in results),
+        'batches': sum(result['batches'] for result in results),
+        'shards': results,
+        'elapsed_seconds': elapsed,
+        'events_per_second': delivered / elapsed if elapsed > 0 else None
+    }
+
+
+class CountingConsumer:
+    """
+    Consumer decoding the records and counting the events, to measure the replay itself
+    """
+
+    def __init__(self):
+        self.events = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, event, context):
+        count = len([decode_record(record) for record in event['Records']])
+
+        with self._lock:
+            self.events += count
+
+
+def load_consumer(spec: str) -> Callable:
+    """
+    Import the consumer given as "module:function", e.g. a Lambda handler
+
+    :param spec:
+    :return: consumer
+    """
+
+    module_name, _, attribute = spec.partition(':')
+
+    return getattr(importlib.import_module(module_name), attribute or 'handler')
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description='Replay recorded sensor events through a Kinesis consumer')
+    parser.add_argument('events', help='newline-delimited JSON file of recorded events')
+    parser.add_argument('--shards', type=int, default=1)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--max-retries', type=int, default=2)
+    parser.add_argument('--partition-key', default='sensor_id')
+    parser.add_argument('--consumer', default=None, help='module:function, the events are only decoded by default')
+    args = parser.parse_args(argv)
+
+    consumer = load_consumer(args.consumer) if args.consumer else CountingConsumer()
+
+    result = replay(
+        load_events(args.events),
+        consumer,
+        shard_count=args.shards,
+        workers=args.workers,
+        batch_size=args.batch_size,
+        max_retries=args.max_retries,
+        partition_key_field=args.partition_key
+    )
+
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,207 @@
+"""
+Synthesis of the stacks in a process pool, one cloud assembly per stack and region
+
+app.py builds the stacks one after the other in a single app. Here each stack of each region is built and
+synthesized by a worker of a process pool, in its own app and cloud assembly (cdk.out/<stack>-<region>),
+so that the regions of a rollout are synthesized side by side, then deployed from their assembly:
+
+    python -m lib.synth --stacks EnergyEfficiencyStack SmartTrafficStack --regions eu-north-1 eu-central-1
+    python -m lib.synth --stacks SmartTrafficStack --deploy
+
+The resources of a region are prefixed with its name (eu-north-1-st-..., EuNorth1St...), as the ones of a city
+in lib/manifest.py: the names of the IAM roles are unique in the account and the ones of the buckets in S3,
+the regions of a rollout share them otherwise. The assemblies are deployed one after the other, cdk deploy
+asks on the terminal for the approval of their IAM and security group changes.
+
+The module of a stack is only imported by the workers building it: a subset of the stacks does not import
+the others, nor read their user data. The workers are spawned rather than forked, each one starts its own
+jsii runtime.
+
+References:
+  - AWS Doc:
+      - Cloud assemblies: https://docs.aws.amazon.com/cdk/v2/guide/apps.html#apps_cloud_assembly
+      - cdk deploy --app: https://docs.aws.amazon.com/cdk/v2/guide/cli.html
+  - concurrent.futures.ProcessPoolExecutor: https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor
+"""
+
+import os
+import time
+import argparse
+import importlib
+import subprocess
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+# Module of each stack of app.py
+STACKS = {
+    'DataAnalyticsStack': 'stacks.data_analytics.data_analytics_stack',
+    'EnergyEfficiencyStack': 'stacks.energy_efficiency.energy_efficiency_stack',
+    'SmartTrafficStack': 'stacks.smart_traffic.smart_traffic_stack'
+}
+
+DEFAULT_REGIONS = ['eu-north-1']
+
+OUTDIR = 'cdk.out'
+
+DEPLOY_COMMAND = ['cdk', 'deploy', '--all', '--app']
+
+
+def get_stack_class(stack_name: str) -> type:
+    """
+    Import the module of a stack, and only this one
+
+    :param stack_name: key of STACKS
+    :return: class of the stack
+    """
+
+    if stack_name not in STACKS:
+        raise ValueError(f'Unknown stack "{stack_name}", expected one of {", ".join(STACKS)}')
+
+    return getattr(importlib.import_module(STACKS[stack_name]), stack_name)
+
+
+def region_service_prefix(region: str, service_prefix):
+    """
+    Prefix of the resources of a stack in the region: st- in eu-north-1 is eu-north-1-st-, St is EuNorth1St
+
+    :param region:
+    :param service_prefix: default prefix of the stack
+    :return: ServicePrefix
+    """
+
+    from lib.dataclasses import ServicePrefix
+
+    return ServicePrefix(
+        id=f'{region}-{service_prefix.id}',
+        name=''.join(part.capitalize() for part in region.split('-')) + service_prefix.name
+    )
+
+
+def assembly_dir(outdir: str, stack_name: str, region: str) -> str:
+    return os.path.join(outdir, f'{stack_name}-{region}')
+
+
+def synth_stack(stack_name: str, region: str, outdir: str = OUTDIR, bundling: bool = True) -> dict:
+    """
+    Build and synthesize a stack in its own app, in the calling process
+
+    :param stack_name: key of STACKS
+    :param region:
+    :param outdir: parent folder of the cloud assemblies
+    :param bundling: False skips the bundling of the assets, their hash is the one of their sources
+    :return: {"stack", "region", "assembly", "template", "import_s", "construct_s", "synth_s"}
+    """
+
+    import aws_cdk as cdk
+
+    start = time.perf_counter()
+    stack_class = get_stack_class(stack_name)
+    imported = time.perf_counter()
+
+    app = cdk.App(
+        outdir=assembly_dir(outdir, stack_name, region),
+        context=None if bundling else {'aws:cdk:bundling-stacks': []}
+    )
+    stack = stack_class(
+        scope=app,
+        construct_id=stack_name,
+        env=cdk.Environment(region=region),
+        service_prefix=region_service_prefix(region, importlib.import_module(STACKS[stack_name]).default_service_prefix)
+    )
+    constructed = time.perf_counter()
+
+    assembly = app.synth()
+    synthesized = time.perf_counter()
+
+    return {
+        'stack': stack_name,
+        'region': region,
+        'assembly': assembly.directory,
+        'template': assembly.get_stack_artifact(stack.artifact_id).template_full_path,
+        'import_s': imported - start,
+        'construct_s': constructed - imported,
+        'synth_s': synthesized - constructed
+    }
+
+
+def synthesize(stack_names: list = None, regions: list = None, outdir: str = OUTDIR, workers: int = None,
+               bundling: bool = True) -> list:
+    """
+    Synthesize each stack of each region in a worker of a process pool
+
+    :param stack_names: defaults to every stack of STACKS
+    :param regions: defaults to DEFAULT_REGIONS
+    :param outdir: parent folder of the cloud assemblies
+    :param workers: 1 synthesizes the stacks one after the other in the calling process
+    :param bundling:
+    :return: list of the results of synth_stack, in the order of the regions then of the stacks
+    """
+
+    stack_names = stack_names or list(STACKS)
+    jobs = [(stack_name, region) for region in regions or DEFAULT_REGIONS for stack_name in stack_names]
+
+    # Fail before starting a worker
+    for stack_name in stack_names:
+        if stack_name not in STACKS:
+            raise ValueError(f'Unknown stack "{stack_name}", expected one of {", ".join(STACKS)}')
+
+    if workers == 1:
+        return [synth_stack(stack_name, region, outdir, bundling) for stack_name, region in jobs]
+
+    with ProcessPoolExecutor(
+        max_workers=workers or min(len(jobs), os.cpu_count() or 1),
+        mp_context=multiprocessing.get_context('spawn')
+    ) as executor:
+        futures = [
+            executor.submit(synth_stack, stack_name, region, outdir, bundling)
+            for stack_name, region in jobs
+        ]
+
+        return [future.result() for future in futures]
+
+
+def deploy(results: list) -> list:
+    """
+    Deploy the cloud assemblies with the CDK CLI, one after the other: the approvals of the changes
+    are asked on the terminal
+
+    :param results: of synthesize
+    :return: list of the exit codes of cdk deploy
+    """
+
+    exit_codes = []
+
+    for result in results:
+        print(f'Deploying {result["stack"]} to {result["region"]}')
+        exit_codes.append(subprocess.run(DEPLOY_COMMAND + [result['assembly']]).returncode)
+
+    return exit_codes
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description='Synthesize the stacks in a process pool, one assembly per stack and region')
+    parser.add_argument('--stacks', nargs='+', choices=list(STACKS), default=None, help='defaults to every stack')
+    parser.add_argument('--regions', nargs='+', default=DEFAULT_REGIONS)
+    parser.add_argument('--outdir', default=OUTDIR)
+    parser.add_argument('--workers', type=int, default=None, help='1 synthesizes the stacks in this process')
+    parser.add_argument('--no-bundling', action='store_true', help='skip the bundling of the assets')
+    parser.add_argument('--deploy', action='store_true', help='deploy the assemblies with cdk deploy')
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    results = synthesize(args.stacks, args.regions, args.outdir, args.workers, not args.no_bundling)
+    elapsed = time.perf_counter() - start
+
+    print(f'{"stack":<24}{"region":<16}{"import s":>10}{"construct s":>13}{"synth s":>10}  assembly')
+    for result in results:
+        print(f'{result["stack"]:<24}{result["region"]:<16}{result["import_s"]:>10.2f}'
+              f'{result["construct_s"]:>13.2f}{result["synth_s"]:>10.2f}  {result["assembly"]}')
+    print(f'{len(results)} assemblies in {elapsed:.2f} s')
+
+    if args.deploy and any(deploy(results)):
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,17 @@
+#!/bin/bash
+# Boot of an instance launched from a baked image: the dependencies and the code are already
+# in the image, the user data only sets the configuration before this script starts the service
+
+WORKING_DIR="/tmp/repos"
+APP_DIR="/opt/futura"
+
+mkdir -p "$WORKING_DIR"
+
+if [ -d "$APP_DIR/$REPO_NAME" ]; then
+  cd "$APP_DIR/$REPO_NAME"
+
+  su ec2-user -c "nohup make local-dev" >>"$WORKING_DIR"/be.log 2>>"$WORKING_DIR"/error.log &
+else
+  echo "$APP_DIR/$REPO_NAME is not in the image" >> "$WORKING_DIR"/error.log
+  exit 1
+fi
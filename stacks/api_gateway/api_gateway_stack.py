@@ -7,7 +7,20 @@ References:
       - aws_apigateway.MethodResponse: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_apigateway/MethodResponse.html
       - aws_apigateway.LambdaIntegration: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_apigateway/LambdaIntegration.html
       - aws_apigateway.IntegrationResponse: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_apigateway/IntegrationResponse.html
+      - Mapping template reference: https://docs.aws.amazon.com/apigateway/latest/developerguide/api-gateway-mapping-template-reference.html
       - aws_lambda.Function: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_lambda/Function.html#aws_cdk.aws_lambda.Function
+      - aws_apigateway.StageOptions: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_apigateway/StageOptions.html
+      - aws_apigateway.MethodDeploymentOptions: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_apigateway/MethodDeploymentOptions.html
+      - Enabling API caching: https://docs.aws.amazon.com/apigateway/latest/developerguide/api-gateway-caching.html
+      - Payload compression for REST APIs: https://docs.aws.amazon.com/apigateway/latest/developerguide/api-gateway-gzip-compression-decompression.html
+      - Binary media types for REST APIs: https://docs.aws.amazon.com/apigateway/latest/developerguide/api-gateway-payload-encodings.html
+      - Lambda proxy integrations: https://docs.aws.amazon.com/apigateway/latest/developerguide/set-up-lambda-proxy-integrations.html
+      - aws_apigateway.UsagePlan: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_apigateway/UsagePlan.html
+      - Throttle API requests for better throughput: https://docs.aws.amazon.com/apigateway/latest/developerguide/api-gateway-request-throttling.html
+      - aws_apigateway.AwsIntegration: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_apigateway/AwsIntegration.html
+      - Tutorial: Build a REST API as an Amazon SQS proxy: https://docs.aws.amazon.com/apigateway/latest/developerguide/integrating-api-with-aws-services-sqs.html
+      - Override the response status code with $context.responseOverride: https://docs.aws.amazon.com/apigateway/latest/developerguide/apigateway-override-request-response-parameters.html
+      - FlushStageCache: https://docs.aws.amazon.com/apigateway/latest/api/API_FlushStageCache.html
 """
 
 from dataclasses import dataclass
@@ -15,20 +28,85 @@ from dataclasses import dataclass
 from constructs import Construct
 from aws_cdk import (
     CfnOutput,
+    Duration,
     NestedStack,
+    Size,
+    aws_iam as iam,
     aws_lambda as lambda_,
+    aws_sqs as sqs,
     aws_apigateway as apigw_
 )
 
+from lib.bundling import get_code
 from lib.dataclasses import (
+    LambdaConfig,
     ServicePrefix
 )
 
 
+# Forward the query string parameters of the read endpoints (?limit=&after_id=&fields=&export=) to the Lambda as the event
+READ_REQUEST_TEMPLATES = {
+    'application/json': """{
+        "limit": "$util.escapeJavaScript($input.params('limit'))",
+        "after_id": "$util.escapeJavaScript($input.params('after_id'))",
+        "fields": "$util.escapeJavaScript($input.params('fields'))",
+        "export": "$util.escapeJavaScript($input.params('export'))"
+    }"""
+}
+
+# Known before deployment, the functions of the parent stack cannot reference the stage of the nested stack
+STAGE_NAME = 'prod'
+
+# Query string parameters making a cached response of the read endpoints, the pagination cursor included
+READ_CACHE_KEY_PARAMETERS = ['limit', 'after_id', 'fields', 'export']
+
+# The non-proxy integration answers 200 whatever the function returns: the status code of the response
+# of the function overrides it, so that the errors are neither returned nor cached as 200 responses
+LAMBDA_RESPONSE_TEMPLATES = {
+    'application/json': """#set($statusCode = $input.path('$.statusCode'))
+#if($statusCode && $statusCode != 200)
+#set($context.responseOverride.status = $statusCode)
+#end
+$input.json('$')"""
+}
+
+# Status codes returned by the handlers of the non-proxy integration
+LAMBDA_STATUS_CODES = ('200', '202', '207', '400', '500')
+
+# Flushes the cache of the stage for the write functions, which cannot reach the management API from the VPC
+CACHE_FLUSH_CODE_PATH = 'stacks/api_gateway/lambda_cache_flush'
+
+
 @dataclass
 class ApiGatewayModel:
     method: str
-    lambda_integration: lambda_.Function
+    # A function, or an alias of it, e.g. the one with provisioned concurrency
+    lambda_integration: lambda_.IFunction
+    request_templates: dict = None
+    # Responses are cached for cache_ttl, keyed by the query string parameters in cache_key_parameters
+    cache_ttl: Duration = None
+    cache_key_parameters: list[str] = None
+    # The function flushes the cache of the stage after its writes
+    invalidates_cache: bool = False
+    # The function receives the whole request and returns the status code, headers and body,
+    # request_templates are not used
+    proxy: bool = False
+    # Requests per second, and bursts, above which the method answers 429 Too Many Requests
+    throttling_rate_limit: float = None
+    throttling_burst_limit: int = None
+    # The method is only available to the API keys of the usage plan of the stack
+    api_key_required: bool = False
+    # The request body is sent to the queue and the method answers 202 Accepted,
+    # lambda_integration, request_templates and proxy are not used
+    queue: sqs.IQueue = None
+
+
+@dataclass
+class ApiUsagePlan:
+    rate_limit: float
+    burst_limit: int
+    quota_limit: int = None
+    quota_period: apigw_.Period = apigw_.Period.DAY
 
 
 class ApiGatewayStack(NestedStack):
@@ -41,18 +119,58 @@ class ApiGatewayStack(NestedStack):
             endpoint: str,
             allowed_methods: list,
             api_models: list[ApiGatewayModel],
+            cache_cluster_size: str = '0.5',
+            minimum_compression_size: int = 1024,
+            binary_media_types: list[str] = None,
+            usage_plan: ApiUsagePlan = None,
             **kwargs
     ):
         super().__init__(scope, construct_id, **kwargs)
 
         self.__service_prefix = service_prefix
         self.__endpoint = endpoint
+        self.__rest_api_name = self.__service_prefix.name + 'ApiGateway'
+        self.__cache_flush_function = None
+        # Known before deployment, the functions of the parent stack cannot reference the ones of the nested stack
+        self.__cache_flush_function_name = self.__service_prefix.name + 'LambdaCacheFlush'
+        cached = any(api_model.cache_ttl is not None for api_model in api_models)
+        self.__cached = cached
+
+        method_options = {}
+        for api_model in api_models:
+            options = {}
+
+            if api_model.cache_ttl is not None:
+                options.update(caching_enabled=True, cache_ttl=api_model.cache_ttl)
+
+            if api_model.throttling_rate_limit is not None:
+                options.update(throttling_rate_limit=api_model.throttling_rate_limit)
+
+            if api_model.throttling_burst_limit is not None:
+                options.update(throttling_burst_limit=api_model.throttling_burst_limit)
+
+            if options:
+                method_options[f'/{endpoint}/{api_model.method}'] = apigw_.MethodDeploymentOptions(**options)
+
+        # The cache cluster is billed per hour, it is only created when a method is cached
+        deploy_options = apigw_.StageOptions(
+            stage_name=STAGE_NAME,
+            cache_cluster_enabled=True if cached else None,
+            cache_cluster_size=cache_cluster_size if cached else None,
+            method_options=method_options or None
+        )
 
         self.__api_gateway = apigw_.RestApi(
             self,
             id=self.__service_prefix.id + 'api-gateway',
-            rest_api_name=self.__service_prefix.name + 'ApiGateway',
-            description=description
+            rest_api_name=self.__rest_api_name,
+            description=description,
+            deploy_options=deploy_options,
+            # Responses of at least minimum_compression_size bytes are compressed when the client accepts it,
+            # None disables the compression
+            min_compression_size=Size.bytes(minimum_compression_size) if minimum_compression_size is not None else None,
+            # Content types returned as binary, e.g. the base64 bodies of the functions compressing their responses
+            binary_media_types=binary_media_types
         )
 
         self.__entity = self.__api_gateway.root.add_resource(
@@ -63,35 +181,263 @@ class ApiGatewayStack(NestedStack):
             )
         )
 
+        # With binary media types matching the request, the payloads of the integrations without content handling
+        # pass through as binary and their mapping templates are not applied: the ones of the preflight mock and
+        # of the queue get the payload as text, base64 encoded when it is binary
+        self.__binary_requests = '*/*' in (binary_media_types or [])
+
+        if binary_media_types:
+            preflight = self.__entity.node.find_child('OPTIONS').node.default_child
+            preflight.add_property_override('Integration.ContentHandling', 'CONVERT_TO_TEXT')
+
         for api_model in api_models:
-            self.__entity.add_method(
-                api_model.method,
-                self._lambda_integration(api_model.lambda_integration),
-                method_responses=[
+            cache_key_parameters = [
+                f'method.request.querystring.{parameter}'
+                for parameter in api_model.cache_key_parameters or []
+            ]
+
+            if api_model.queue is not None:
+                integration = self._sqs_integration(api_model.queue)
+                method_responses = [
+                    apigw_.MethodResponse(
+                        status_code=status_code,
+                        response_parameters={
+                            'method.response.header.Access-Control-Allow-Origin': True,
+                        }
+                    )
+                    for status_code in ('202', '500')
+                ]
+            elif api_model.proxy:
+                integration = self._lambda_proxy_integration(api_model.lambda_integration, cache_key_parameters)
+                method_responses = None
+            else:
+                integration = self._lambda_integration(api_model.lambda_integration, api_model.request_templates, cache_key_parameters)
+                method_responses = [
                     apigw_.MethodResponse(
-                        status_code='200',
+                        status_code=status_code,
                         response_parameters={
                             'method.response.header.Access-Control-Allow-Origin': True,
                         }
                     )
+                    for status_code in LAMBDA_STATUS_CODES
                 ]
+
+            self.__entity.add_method(
+                api_model.method,
+                integration,
+                request_parameters={parameter: False for parameter in cache_key_parameters} or None,
+                method_responses=method_responses,
+                api_key_required=api_model.api_key_required or None
             )
 
+            if api_model.invalidates_cache and api_model.queue is None:
+                self.grant_cache_invalidation(api_model.lambda_integration)
+
+        if usage_plan is not None:
+            self._add_usage_plan(usage_plan)
+
     @staticmethod
-    def _lambda_integration(lambda_function: lambda_.Function) -> apigw_.LambdaIntegration:
+    def _lambda_integration(lambda_function: lambda_.IFunction,
+                            request_templates: dict = None,
+                            cache_key_parameters: list[str] = None) -> apigw_.LambdaIntegration:
         return apigw_.LambdaIntegration(
             lambda_function,
             proxy=False,
+            request_templates=request_templates,
+            cache_key_parameters=cache_key_parameters or None,
             integration_responses=[
                 apigw_.IntegrationResponse(
                     status_code='200',
                     response_parameters={
                         'method.response.header.Access-Control-Allow-Origin': "'*'",
-                    }
+                    },
+                    response_templates=LAMBDA_RESPONSE_TEMPLATES
                 )
             ]
         )
 
+    @staticmethod
+    def _lambda_proxy_integration(lambda_function: lambda_.IFunction,
+                                  cache_key_parameters: list[str] = None) -> apigw_.LambdaIntegration:
+        return apigw_.LambdaIntegration(
+            lambda_function,
+            proxy=True,
+            cache_key_parameters=cache_key_parameters or None
+        )
+
+    def _sqs_integration(self, queue: sqs.IQueue) -> apigw_.AwsIntegration:
+        """
+        Send the body of the request to the queue with the SendMessage action of the SQS query API,
+        API Gateway answers as soon as the message is stored
+
+        :param queue:
+        :return: apigw_.AwsIntegration
+        """
+
+        role = iam.Role(
+            self,
+            id=self.__service_prefix.id + 'apigw-sqs-role',
+            assumed_by=iam.ServicePrincipal('apigateway.amazonaws.com')
+        )
+
+        queue.grant_send_messages(role)
+
+        # Every request body is binary with */*, converted to base64 text for the template
+        body = '$util.base64Decode($input.body)' if self.__binary_requests else '$input.body'
+
+        return apigw_.AwsIntegration(
+            service='sqs',
+            path=f'{self.account}/{queue.queue_name}',
+            integration_http_method='POST',
+            options=apigw_.IntegrationOptions(
+                credentials_role=role,
+                request_parameters={
+                    'integration.request.header.Content-Type': "'application/x-www-form-urlencoded'"
+                },
+                request_templates={
+                    'application/json': f'Action=SendMessage&MessageBody=$util.urlEncode({body})'
+                },
+                passthrough_behavior=apigw_.PassthroughBehavior.NEVER,
+                content_handling=apigw_.ContentHandling.CONVERT_TO_TEXT,
+                integration_responses=[
+                    apigw_.IntegrationResponse(
+                        status_code='202',
+                        response_parameters={
+                            'method.response.header.Access-Control-Allow-Origin': "'*'",
+                        },
+                        response_templates={
+                            'application/json': '{"message_id": "$input.path(\'$.SendMessageResponse.SendMessageResult.MessageId\')"}'
+                        }
+                    ),
+                    apigw_.IntegrationResponse(
+                        status_code='500',
+                        selection_pattern='[45]\\d{2}',
+                        response_parameters={
+                            'method.response.header.Access-Control-Allow-Origin': "'*'",
+                        },
+                        response_templates={
+                            'application/json': '"The request could not be queued"'
+                        }
+                    )
+                ]
+            )
+        )
+
+    def _add_usage_plan(self, usage_plan: ApiUsagePlan) -> None:
+        """
+        Create the usage plan of the stage and an API key subscribed to it, the key is read
+        from the console or with "aws apigateway get-api-key --include-value"
+
+        :param usage_plan:
+        :return:
+        """
+
+        plan = self.__api_gateway.add_usage_plan(
+            id=self.__service_prefix.id + 'usage-plan',
+            name=self.__service_prefix.name + 'UsagePlan',
+            throttle=apigw_.ThrottleSettings(
+                rate_limit=usage_plan.rate_limit,
+                burst_limit=usage_plan.burst_limit
+            ),
+            quota=apigw_.QuotaSettings(
+                limit=usage_plan.quota_limit,
+                period=usage_plan.quota_period
+            ) if usage_plan.quota_limit is not None else None
+        )
+
+        plan.add_api_stage(
+            stage=self.__api_gateway.deployment_stage
+        )
+
+        api_key = self.__api_gateway.add_api_key(
+            id=self.__service_prefix.id + 'api-key',
+            api_key_name=self.__service_prefix.name + 'ApiKey'
+        )
+
+        plan.add_api_key(api_key)
+
+        CfnOutput(
+            self,
+            id=self.__service_prefix.id + 'api-key-id',
+            value=api_key.key_id
+        )
+
+    def grant_cache_invalidation(self, lambda_function: lambda_.Function) -> None:
+        """
+        Allow the function to flush the cache of the stage: the runtime invokes asynchronously the flush
+        function of the stack, by its name. Nothing to flush when no method is cached
+
+        :param lambda_function:
+        :return:
+        """
+
+        if not self.__cached:
+            return
+
+        cache_flush_function = self._cache_flush_function()
+
+        lambda_function.add_environment('CACHE_FLUSH_FUNCTION', self.__cache_flush_function_name)
+
+        iam.Policy(
+            self,
+            id=self.__service_prefix.id + 'apigw-cache-invalidation-' + lambda_function.node.id,
+            roles=[lambda_function.role],
+            statements=[
+                iam.PolicyStatement(
+                    actions=[
+                        'lambda:InvokeFunction'
+                    ],
+                    resources=[
+                        cache_flush_function.function_arn
+                    ]
+                )
+            ]
+        )
+
+    def _cache_flush_function(self) -> lambda_.Function:
+        """
+        Create, once, the function flushing the cache of the stage. It is not in the VPC: the API Gateway
+        management API has no VPC endpoint, and the isolated subnets no route to it
+
+        :return: lambda_.Function
+        """
+
+        if self.__cache_flush_function is not None:
+            return self.__cache_flush_function
+
+        runtime = LambdaConfig.runtime
+        architecture = lambda_.Architecture.X86_64
+
+        self.__cache_flush_function = lambda_.Function(
+            self,
+            id=self.__service_prefix.id + 'lambda-cache-flush',
+            function_name=self.__cache_flush_function_name,
+            description='Flush the cache of the stage of the API after the writes',
+            code=get_code(CACHE_FLUSH_CODE_PATH, runtime, architecture, with_requirements=False),
+            handler='lambda-handler.handler',
+            runtime=runtime,
+            architecture=architecture,
+            timeout=Duration.seconds(30),
+            memory_size=128,
+            environment={
+                'CACHE_REST_API_ID': self.__api_gateway.rest_api_id,
+                'CACHE_STAGE_NAME': STAGE_NAME
+            }
+        )
+
+        self.__cache_flush_function.add_to_role_policy(
+            statement=iam.PolicyStatement(
+                actions=[
+                    'apigateway:DELETE'
+                ],
+                resources=[
+                    f'arn:{self.partition}:apigateway:{self.region}::/restapis/{self.__api_gateway.rest_api_id}/stages/{STAGE_NAME}/cache/data'
+                ]
+            )
+        )
+
+        return self.__cache_flush_function
+
     def get_rest_url(self) -> str:
         url = self.__api_gateway.url + self.__endpoint
 
@@ -0,0 +1,154 @@
+"""
+References:
+  - AWS Doc:
+      - aws_apigatewayv2_alpha.HttpApi: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_apigatewayv2_alpha/HttpApi.html
+      - aws_apigatewayv2_alpha.CorsPreflightOptions: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_apigatewayv2_alpha/CorsPreflightOptions.html
+      - aws_apigatewayv2_integrations_alpha.HttpLambdaIntegration: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_apigatewayv2_integrations_alpha/HttpLambdaIntegration.html
+      - Choosing between REST APIs and HTTP APIs: https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-vs-rest.html
+      - Lambda integrations for HTTP APIs: https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-develop-integrations-lambda.html
+      - Throttling requests to your HTTP API: https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-throttling.html
+      - AWS service integrations for HTTP APIs (SQS-SendMessage): https://docs.aws.amazon.com/apigateway/latest/developerguide/http-api-develop-integrations-aws-services-reference.html#SQS-SendMessage
+"""
+
+from constructs import Construct
+from aws_cdk import (
+    CfnOutput,
+    NestedStack,
+    aws_iam as iam,
+    aws_sqs as sqs,
+    aws_apigatewayv2 as apigwv2_l1_,
+    aws_apigatewayv2_alpha as apigwv2_,
+    aws_apigatewayv2_integrations_alpha as apigwv2_integrations_
+)
+
+from lib.dataclasses import (
+    ServicePrefix
+)
+
+from .api_gateway_stack import ApiGatewayModel
+
+
+class HttpApiGatewayStack(NestedStack):
+    """
+    HTTP API alternative to ApiGatewayStack, with the same endpoint and models.
+
+    The functions always receive the proxy events (payload format 2.0). HTTP APIs have no stage cache,
+    no mapping templates, no compression and no API keys: request_templates, cache_ttl, cache_key_parameters,
+    invalidates_cache and api_key_required of the models are not used. The routes of the models with a queue
+    send the body to it and answer with the SendMessage result
+    """
+
+    def __init__(
+            self,
+            scope: Construct,
+            construct_id: str,
+            description: str,
+            service_prefix: ServicePrefix,
+            endpoint: str,
+            allowed_methods: list,
+            api_models: list[ApiGatewayModel],
+            **kwargs
+    ):
+        super().__init__(scope, construct_id, **kwargs)
+
+        self.__service_prefix = service_prefix
+        self.__endpoint = endpoint
+
+        self.__api_gateway = apigwv2_.HttpApi(
+            self,
+            id=self.__service_prefix.id + 'http-api',
+            api_name=self.__service_prefix.name + 'HttpApi',
+            description=description,
+            cors_preflight=apigwv2_.CorsPreflightOptions(
+                allow_origins=['*'],
+                allow_methods=[apigwv2_.CorsHttpMethod[method] for method in allowed_methods],
+                allow_headers=['Content-Type']
+            )
+        )
+
+        route_settings = {}
+
+        for api_model in api_models:
+            if api_model.queue is not None:
+                routes = [self._sqs_route(api_model)]
+            else:
+                routes = self.__api_gateway.add_routes(
+                    path='/' + endpoint,
+                    methods=[apigwv2_.HttpMethod[api_model.method]],
+                    integration=self._lambda_integration(api_model)
+                )
+
+            throttling = {}
+
+            if api_model.throttling_rate_limit is not None:
+                throttling['ThrottlingRateLimit'] = api_model.throttling_rate_limit
+
+            if api_model.throttling_burst_limit is not None:
+                throttling['ThrottlingBurstLimit'] = api_model.throttling_burst_limit
+
+            if throttling:
+                route_settings[f'{api_model.method} /{endpoint}'] = throttling
+                self.__api_gateway.default_stage.node.add_dependency(*routes)
+
+        # The stage construct has no route settings, they are set on the underlying CfnStage
+        if route_settings:
+            self.__api_gateway.default_stage.node.default_child.add_property_override('RouteSettings', route_settings)
+
+    def _lambda_integration(self, api_model: ApiGatewayModel) -> apigwv2_integrations_.HttpLambdaIntegration:
+        return apigwv2_integrations_.HttpLambdaIntegration(
+            self.__service_prefix.id + api_model.method.lower() + '-integration',
+            handler=api_model.lambda_integration,
+            payload_format_version=apigwv2_.PayloadFormatVersion.VERSION_2_0
+        )
+
+    def _sqs_route(self, api_model: ApiGatewayModel) -> apigwv2_l1_.CfnRoute:
+        """
+        Route sending the body of the request to the queue of the model, the alpha module
+        has no construct for the AWS service integrations
+
+        :param api_model:
+        :return: apigwv2_l1_.CfnRoute
+        """
+
+        id_prefix = self.__service_prefix.id + api_model.method.lower()
+
+        role = iam.Role(
+            self,
+            id=id_prefix + '-sqs-role',
+            assumed_by=iam.ServicePrincipal('apigateway.amazonaws.com')
+        )
+
+        api_model.queue.grant_send_messages(role)
+
+        integration = apigwv2_l1_.CfnIntegration(
+            self,
+            id=id_prefix + '-sqs-integration',
+            api_id=self.__api_gateway.api_id,
+            integration_type='AWS_PROXY',
+            integration_subtype='SQS-SendMessage',
+            credentials_arn=role.role_arn,
+            payload_format_version='1.0',
+            request_parameters={
+                'QueueUrl': api_model.queue.queue_url,
+                'MessageBody': '$request.body'
+            }
+        )
+
+        return apigwv2_l1_.CfnRoute(
+            self,
+            id=id_prefix + '-sqs-route',
+            api_id=self.__api_gateway.api_id,
+            route_key=f'{api_model.method} /{self.__endpoint}',
+            target='integrations/' + integration.ref
+        )
+
+    def get_rest_url(self) -> str:
+        url = self.__api_gateway.url + self.__endpoint
+
+        CfnOutput(
+            self,
+            id=self.__service_prefix.id + 'apigw-url',
+            value=url
+        )
+
+        return url
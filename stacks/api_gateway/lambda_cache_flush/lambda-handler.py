@@ -0,0 +1,50 @@
+"""
+Flush the cache of the stage of the REST API, invoked asynchronously by the write functions
+
+It runs outside of the VPC: the API Gateway management API has no VPC endpoint. The id of the API is
+passed in CACHE_REST_API_ID, the function is created by the API stack. Lambda retries a failed asynchronous
+invocation twice, the client fails fast and leaves the retries to it
+"""
+
+import os
+
+
+CACHE_REST_API_ID = os.environ.get('CACHE_REST_API_ID')
+CACHE_STAGE_NAME = os.environ.get('CACHE_STAGE_NAME', 'prod')
+
+CLIENT_CONFIG = {
+    'connect_timeout': 2,
+    'read_timeout': 5,
+    'retries': {
+        'max_attempts': 2,
+        'mode': 'standard'
+    }
+}
+
+_apigateway_client = None
+
+
+def get_apigateway_client():
+    global _apigateway_client
+
+    if _apigateway_client is None:
+        # Provided by the Lambda runtime, imported with the first flush
+        import boto3
+        from botocore.config import Config
+
+        _apigateway_client = boto3.client('apigateway', config=Config(**CLIENT_CONFIG))
+
+    return _apigateway_client
+
+
+def handler(event, context):
+    get_apigateway_client().flush_stage_cache(
+        restApiId=CACHE_REST_API_ID,
+        stageName=CACHE_STAGE_NAME
+    )
+
+    print(f'Flushed the cache of {CACHE_REST_API_ID}/{CACHE_STAGE_NAME}')
+
+    return {
+        'flushed': True
+    }
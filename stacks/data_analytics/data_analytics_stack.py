@@ -4,6 +4,8 @@ References:
       - aws_ec2.SubnetType: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/SubnetType.html
       - aws_ec2.InterfaceVpcEndpointAwsService: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/InterfaceVpcEndpointAwsService.html#interfacevpcendpointawsservice
       - aws_ec2.SubnetSelection: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/SubnetSelection.html#subnetselection
+      - aws_autoscaling.AutoScalingGroup: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_autoscaling/AutoScalingGroup.html
+      - EC2 Image Builder: https://docs.aws.amazon.com/imagebuilder/latest/userguide/what-is-image-builder.html
 
   - Examples:
       - aws-cdk-rfcs: https://github.com/aws/aws-cdk-rfcs/blob/main/text/0340-firehose-l2.md
@@ -22,6 +24,8 @@ from lib.dataclasses import (
     SubnetConfig,
     S3Config,
     Ec2Config,
+    AsgConfig,
+    ImagePipelineConfig,
     SecurityGroupConfig,
     IamRoleConfig
 )
@@ -30,25 +34,35 @@ from lib.services import (
     create_vpc,
     create_s3_bucket,
     create_ec2,
+    create_autoscaling_group,
+    create_image_pipeline,
+    get_baked_image,
     create_security_group as create_sg,
     create_role_inline_policy,
-    get_secret_value_access_policy
+    get_secret_value_access_policy,
+    read_user_data
 )
 
 
-service_prefix = ServicePrefix(
+# Prefix of the stack of app.py, the cities of a deployment manifest have their own
+default_service_prefix = ServicePrefix(
     id='da-',
     name='Da'
 )
 
-gh_token_id = f'GH_TOKEN_ID={service_prefix.id}gh-token'
+# Repository of the service of the EC2 role
+EC2_REPOSITORY = 'da-ec2'
 
-with open('./stacks/data_analytics/userdata/ec2_init.sh') as f:
-    ec2_init = f.read()
+# User data of the EC2 roles, read when the stack is built instead of at import
+EC2_BAKE_PATH = './lib/userdata/ec2_bake.sh'
+EC2_START_PATH = './lib/userdata/ec2_start.sh'
+EC2_INIT_PATH = './stacks/data_analytics/userdata/ec2_init.sh'
 
 
 class DataAnalyticsStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, ec2_autoscaling: bool = False,
+                 ec2_min_capacity: int = 1, ec2_max_capacity: int = 4, image_pipeline: bool = False,
+                 graviton: bool = False, service_prefix: ServicePrefix = None, **kwargs) -> None:
         super().__init__(
             scope,
             construct_id,
@@ -56,6 +70,12 @@ class DataAnalyticsStack(Stack):
             **kwargs
         )
 
+        service_prefix = service_prefix or default_service_prefix
+        gh_token_id = f'GH_TOKEN_ID={service_prefix.id}gh-token'
+
+        # With graviton the instances run on arm64 (Graviton) processors, and boot from an arm64 image
+        ec2_instance_class = ec2.InstanceClass.T4G if graviton else ec2.InstanceClass.T3
+
         # ---------------------------------------- #
         # VPC
         # ---------------------------------------- #
@@ -144,24 +164,82 @@ class DataAnalyticsStack(Stack):
             )
         )
 
+        # ---------------------------------------- #
+        # Image Builder
+        # ---------------------------------------- #
+        # Deployed with the id of the baked AMI in the context (-c da-ec2-ami=ami-...), the instances boot from it
+        if image_pipeline:
+            create_image_pipeline(
+                instance_class=self,
+                service_prefix=service_prefix,
+                image_config=ImagePipelineConfig(
+                    id='ec2-image',
+                    name='Ec2Image',
+                    description=f'Image of the EC2 role with {EC2_REPOSITORY} and its dependencies installed',
+                    build_commands=[
+                        gh_token_id,
+                        f'REPO_NAME={EC2_REPOSITORY}',
+                        read_user_data(EC2_BAKE_PATH)
+                    ],
+                    parent_image=ec2.MachineImage.latest_amazon_linux2023(
+                        cpu_type=ec2.AmazonLinuxCpuType.ARM_64 if graviton else ec2.AmazonLinuxCpuType.X86_64
+                    ),
+                    instance_types=['t4g.medium'] if graviton else None,
+                    vpc=self.__vpc,
+                    vpc_subnet_id=public_subnet_config.subnet_id,
+                    security_group=ec2_sg,
+                    policy_statements=[
+                        get_secret_value_access_policy(
+                            resources=[f'arn:aws:secretsmanager:*:*:secret:{service_prefix.id}gh-token*']
+                        )
+                    ]
+                )
+            )
+
+        ec2_image = get_baked_image(self, service_prefix.id + 'ec2-ami')
+
         # ---------------------------------------- #
         # EC2 Instances
         # ---------------------------------------- #
-        self.__ec2 = create_ec2(
-            instance_class=self,
-            service_prefix=service_prefix,
-            ec2_config=Ec2Config(
-                id='ec2',
-                vpc=self.__vpc,
-                vpc_subnet_id=public_subnet_config.subnet_id,
-                security_group=ec2_sg,
-                role=ec2_role
+        if ec2_autoscaling:
+            self.__ec2 = create_autoscaling_group(
+                instance_class=self,
+                service_prefix=service_prefix,
+                asg_config=AsgConfig(
+                    id='asg',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=public_subnet_config.subnet_id,
+                    security_group=ec2_sg,
+                    role=ec2_role,
+                    instance_class=ec2_instance_class,
+                    machine_image=ec2_image,
+                    min_capacity=ec2_min_capacity,
+                    max_capacity=ec2_max_capacity
+                )
+            )
+        else:
+            self.__ec2 = create_ec2(
+                instance_class=self,
+                service_prefix=service_prefix,
+                ec2_config=Ec2Config(
+                    id='ec2',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=public_subnet_config.subnet_id,
+                    security_group=ec2_sg,
+                    role=ec2_role,
+                    instance_class=ec2_instance_class,
+                    machine_image=ec2_image
+                )
             )
-        )
 
         self.__ec2.user_data.add_commands(gh_token_id)
         self.__ec2.user_data.add_commands(f'S3_BUCKET={self.__data_lake.bucket_name}')
-        self.__ec2.user_data.add_commands(ec2_init)
+
+        if ec2_image is not None:
+            self.__ec2.user_data.add_commands(f'REPO_NAME={EC2_REPOSITORY}')
+            self.__ec2.user_data.add_commands(read_user_data(EC2_START_PATH))
+        else:
+            self.__ec2.user_data.add_commands(read_user_data(EC2_INIT_PATH))
 
         self.__ec2.add_to_role_policy(
             statement=iam.PolicyStatement(
@@ -6,6 +6,9 @@ References:
       - aws_ec2.SubnetSelection: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/SubnetSelection.html#subnetselection
       - aws_rds.Credentials: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/Credentials.html#aws_cdk.aws_rds.Credentials
       - aws_iam.PolicyStatement: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_iam/PolicyStatement.html#aws_cdk.aws_iam.PolicyStatement
+      - aws_rds.DatabaseProxy: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/DatabaseProxy.html
+      - aws_rds.DatabaseInstanceReadReplica: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/DatabaseInstanceReadReplica.html
+      - aws_lambda_event_sources.SqsEventSource: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_lambda_event_sources/SqsEventSource.html
 
   - Examples:
       - Creating AWS VPC using CDK with Python: https://stories.fylehq.com/p/creating-aws-vpc-using-cdk-with-python
@@ -25,14 +28,25 @@ References:
 from constructs import Construct
 from aws_cdk import (
     Stack,
+    ArnFormat,
+    CfnOutput,
+    Duration,
+    Fn,
     aws_ec2 as ec2,
+    aws_lambda as lambda_,
     aws_rds as rds,
-    aws_iam as iam
+    aws_iam as iam,
+    aws_s3 as s3,
+    aws_lambda_event_sources as lambda_event_sources
 )
 
+from ..api_gateway.http_api_gateway_stack import HttpApiGatewayStack
 from ..api_gateway.api_gateway_stack import (
     ApiGatewayStack,
-    ApiGatewayModel
+    ApiGatewayModel,
+    ApiUsagePlan,
+    READ_REQUEST_TEMPLATES,
+    READ_CACHE_KEY_PARAMETERS
 )
 
 from lib.dataclasses import (
@@ -41,14 +55,23 @@ from lib.dataclasses import (
     VpcConfig,
     SubnetConfig,
     DbConfig,
-    LambdaConfig
+    DbProxyConfig,
+    LambdaConfig,
+    LambdaLayerConfig,
+    S3Config,
+    SqsConfig
 )
 
 from lib.services import (
     create_security_group as create_sg,
     create_vpc,
     create_rds_mysql,
-    create_lambda
+    create_rds_read_replicas,
+    create_rds_proxy,
+    create_lambda,
+    create_lambda_layer,
+    create_s3_bucket,
+    create_sqs_queue
 )
 
 
@@ -57,8 +80,23 @@ from lib.services import (
 # TODO: Add Amplify (?)
 
 
+# Prefix of the stack of app.py, the cities of a deployment manifest have their own
+default_service_prefix = ServicePrefix(
+    id='ee-',
+    name='Ee'
+)
+
+
 class EnergyEfficiencyStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, enable_db_proxy: bool = False,
+                 db_read_replicas: int = 0, api_cache_ttl: Duration = None,
+                 api_proxy: bool = False, http_api: bool = False, api_rate_limit: float = None,
+                 api_burst_limit: int = None, api_usage_plan: ApiUsagePlan = None,
+                 lambda_reserved_concurrency: int = None, async_writes: bool = False,
+                 async_batch_size: int = 100, async_batching_window: Duration = Duration.seconds(5),
+                 graviton: bool = False, service_prefix: ServicePrefix = None,
+                 db_instance_size: ec2.InstanceSize = ec2.InstanceSize.LARGE, lambda_memory_size: int = 256,
+                 **kwargs) -> None:
         super().__init__(
             scope,
             construct_id,
@@ -66,10 +104,11 @@ class EnergyEfficiencyStack(Stack):
             **kwargs
         )
 
-        service_prefix = ServicePrefix(
-            id='ee-',
-            name='Ee'
-        )
+        service_prefix = service_prefix or default_service_prefix
+
+        # With graviton the functions and the database run on arm64 (Graviton) processors
+        lambda_architecture = lambda_.Architecture.ARM_64 if graviton else lambda_.Architecture.X86_64
+        db_instance_class = ec2.InstanceClass.M6G if graviton else ec2.InstanceClass.M6I
 
         # ---------------------------------------- #
         # VPC
@@ -101,6 +140,9 @@ class EnergyEfficiencyStack(Stack):
             )
         )
 
+        # The write functions invoke the function of the API stack flushing the cache of the stage after their
+        # writes: the API Gateway management API has no VPC endpoint (APIGATEWAY is execute-api, the invoke API).
+        # The read function invokes itself to run the exports
         self.__vpc.add_interface_endpoint(
             id=vpc_endpoint_id_prefix + 'lambda',
             service=ec2.InterfaceVpcEndpointAwsService.LAMBDA_,
@@ -109,6 +151,16 @@ class EnergyEfficiencyStack(Stack):
             )
         )
 
+        self.__vpc.add_gateway_endpoint(
+            id=vpc_endpoint_id_prefix + 's3',
+            service=ec2.GatewayVpcEndpointAwsService.S3,
+            subnets=[
+                ec2.SubnetSelection(
+                    subnet_type=private_subnet_config.subnet_type
+                )
+            ]
+        )
+
         # ---------------------------------------- #
         # Security Groups
         # ---------------------------------------- #
@@ -137,22 +189,27 @@ class EnergyEfficiencyStack(Stack):
         # ---------------------------------------- #
         # RDS - MySQL
         # ---------------------------------------- #
+        db_config = DbConfig(
+            vpc=self.__vpc,
+            vpc_subnet_id=private_subnet_config.subnet_id,
+            security_groups=[mysql_sg],
+            # FIXME: The following instance_class and instance_size are not working
+            # instance_class=ec2.InstanceClass.D3EN,  # Storage-optimized instances, 3rd generation.
+            # instance_size=ec2.InstanceSize.LARGE,
+            # instance_class=ec2.InstanceClass.D2,  # Storage-optimized instances in eu-north-1
+            # instance_size=ec2.InstanceSize.XLARGE,
+            instance_class=db_instance_class,
+            instance_size=db_instance_size,
+            credentials=rds.Credentials.from_generated_secret(
+                username='admin'
+            ),
+            read_replicas=db_read_replicas
+        )
+
         self.__mysql = create_rds_mysql(
             instance_class=self,
             service_prefix=service_prefix,
-            db_config=DbConfig(
-                vpc=self.__vpc,
-                vpc_subnet_id=private_subnet_config.subnet_id,
-                security_groups=[mysql_sg],
-                # FIXME: The following instance_class and instance_size are not working
-                # instance_class=ec2.InstanceClass.D3EN,  # Storage-optimized instances, 3rd generation.
-                # instance_size=ec2.InstanceSize.LARGE,
-                # instance_class=ec2.InstanceClass.D2,  # Storage-optimized instances in eu-north-1
-                # instance_size=ec2.InstanceSize.XLARGE,
-                credentials=rds.Credentials.from_generated_secret(
-                    username='admin'
-                )
-            )
+            db_config=db_config
         )
 
         # OPT_1
@@ -167,9 +224,92 @@ class EnergyEfficiencyStack(Stack):
         #     connection=ec2.Port.tcp(3306)
         # )
 
+        # ---------------------------------------- #
+        # RDS - Read Replicas
+        # ---------------------------------------- #
+        # The read Lambda sends its SELECTs to the replicas listed in DB_READER_HOSTS
+        self.__mysql_replicas = create_rds_read_replicas(
+            instance_class=self,
+            service_prefix=service_prefix,
+            db_config=db_config,
+            source_db_instance=self.__mysql
+        )
+
+        reader_environment = {}
+
+        if self.__mysql_replicas:
+            reader_hosts = Fn.join(',', [replica.db_instance_endpoint_address for replica in self.__mysql_replicas])
+
+            CfnOutput(
+                self,
+                id=service_prefix.id + 'rds-reader-hosts',
+                value=reader_hosts,
+                export_name=service_prefix.id + 'rds-reader-hosts'
+            )
+
+            reader_environment['DB_READER_HOSTS'] = reader_hosts
+
+        # ---------------------------------------- #
+        # RDS Proxy
+        # ---------------------------------------- #
+        # The Lambda functions read the credentials from the secret of the instance
+        # and, when DB_HOST is set, connect to the proxy endpoint instead of its host
+        db_environment = {
+            'DB_SECRET_ARN': self.__mysql.secret.secret_arn
+        }
+
+        if enable_db_proxy:
+            self.__db_proxy = create_rds_proxy(
+                instance_class=self,
+                service_prefix=service_prefix,
+                proxy_config=DbProxyConfig(
+                    db_instance=self.__mysql,
+                    vpc=self.__vpc,
+                    vpc_subnet_id=private_subnet_config.subnet_id
+                )
+            )
+
+            # The proxy listens on the port of the instance, it has no default port of its own
+            self.__db_proxy.connections.allow_from(
+                other=lambda_sg,
+                port_range=self.__mysql.connections.default_port,
+                description='Allow Lambda to access RDS Proxy'
+            )
+
+            db_environment['DB_HOST'] = self.__db_proxy.endpoint
+
+        # ---------------------------------------- #
+        # S3 Buckets
+        # ---------------------------------------- #
+        self.__exports_bucket = create_s3_bucket(
+            instance_class=self,
+            service_prefix=service_prefix,
+            s3_config=S3Config(
+                id='exports-bucket',
+                lifecycle_rules=[
+                    s3.LifecycleRule(
+                        expiration=Duration.days(7),
+                        abort_incomplete_multipart_upload_after=Duration.days(1)
+                    )
+                ]
+            )
+        )
+
         # ---------------------------------------- #
         # Lambda Functions
         # ---------------------------------------- #
+        runtime_layer = create_lambda_layer(
+            instance_class=self,
+            service_prefix=service_prefix,
+            layer_config=LambdaLayerConfig(
+                id='lambda-runtime',
+                name='LambdaRuntime',
+                description='Shared runtime of the Lambda functions: connection, secret, responses, metrics',
+                code_folder_path='lib/lambda_runtime',
+                compatible_architectures=[lambda_architecture]
+            )
+        )
+
         # TODO: find a way to start the lambda_init only once to initialize the db
         self.__lambda_init = create_lambda(
             instance_class=self,
@@ -183,9 +323,10 @@ class EnergyEfficiencyStack(Stack):
                 vpc=self.__vpc,
                 vpc_subnet_id=private_subnet_config.subnet_id,
                 security_groups=[lambda_sg],
-                environment={
-                    'DB_SECRET_ARN': self.__mysql.secret.secret_arn
-                }
+                layers=[runtime_layer],
+                architecture=lambda_architecture,
+                memory_size=lambda_memory_size,
+                environment=dict(db_environment)
             )
         )
 
@@ -200,25 +341,66 @@ class EnergyEfficiencyStack(Stack):
             )
         )
 
-        self.__lambda_wr = create_lambda(
+        # The queued writes are inserted by the consumer, no method routes to the write function
+        self.__lambda_wr = None
+
+        if not async_writes:
+            self.__lambda_wr = create_lambda(
+                instance_class=self,
+                service_prefix=service_prefix,
+                lambda_config=LambdaConfig(
+                    id='lambda-write',
+                    name='LambdaWrite',
+                    description='Write data to the database table "energy_efficiency"',
+                    code_folder_path='stacks/energy_efficiency/lambda_write',
+                    index_file_name='lambda-handler.py',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=private_subnet_config.subnet_id,
+                    security_groups=[lambda_sg],
+                    layers=[runtime_layer],
+                    architecture=lambda_architecture,
+                    memory_size=lambda_memory_size,
+                    reserved_concurrent_executions=lambda_reserved_concurrency,
+                    environment=dict(db_environment)
+                )
+            )
+
+            self.__lambda_wr.add_to_role_policy(
+                statement=iam.PolicyStatement(
+                    actions=[
+                        'secretsmanager:GetSecretValue'
+                    ],
+                    resources=[
+                        self.__mysql.secret.secret_arn
+                    ]
+                )
+            )
+
+        self.__lambda_rd = create_lambda(
             instance_class=self,
             service_prefix=service_prefix,
             lambda_config=LambdaConfig(
-                id='lambda-write',
-                name='LambdaWrite',
-                description='Write data to the database table "energy_efficiency"',
-                code_folder_path='stacks/energy_efficiency/lambda_write',
+                id='lambda-read',
+                name='LambdaRead',
+                description='Read a page of data from the database table "energy_efficiency"',
+                code_folder_path='stacks/energy_efficiency/lambda_read',
                 index_file_name='lambda-handler.py',
                 vpc=self.__vpc,
                 vpc_subnet_id=private_subnet_config.subnet_id,
                 security_groups=[lambda_sg],
+                layers=[runtime_layer],
+                architecture=lambda_architecture,
+                memory_size=lambda_memory_size,
+                reserved_concurrent_executions=lambda_reserved_concurrency,
                 environment={
-                    'DB_SECRET_ARN': self.__mysql.secret.secret_arn
+                    **db_environment,
+                    **reader_environment,
+                    'EXPORT_BUCKET': self.__exports_bucket.bucket_name
                 }
             )
         )
 
-        self.__lambda_wr.add_to_role_policy(
+        self.__lambda_rd.add_to_role_policy(
             statement=iam.PolicyStatement(
                 actions=[
                     'secretsmanager:GetSecretValue'
@@ -229,53 +411,161 @@ class EnergyEfficiencyStack(Stack):
             )
         )
 
-        self.__lambda_rd = create_lambda(
-            instance_class=self,
-            service_prefix=service_prefix,
-            lambda_config=LambdaConfig(
-                id='lambda-read',
-                name='LambdaRead',
-                description='Read all data from the database table "energy_efficiency"',
-                code_folder_path='stacks/energy_efficiency/lambda_read',
-                index_file_name='lambda-handler.py',
-                vpc=self.__vpc,
-                vpc_subnet_id=private_subnet_config.subnet_id,
-                security_groups=[lambda_sg],
-                environment={
-                    'DB_SECRET_ARN': self.__mysql.secret.secret_arn
-                }
+        self.__lambda_rd.add_to_role_policy(
+            statement=iam.PolicyStatement(
+                actions=[
+                    's3:PutObject',
+                    's3:GetObject',
+                    's3:AbortMultipartUpload'
+                ],
+                resources=[
+                    self.__exports_bucket.arn_for_objects('exports/*')
+                ]
             )
         )
 
+        # The function runs the exports in an asynchronous invocation of itself, its ARN is built from
+        # its name: the policy of its role cannot reference the function
         self.__lambda_rd.add_to_role_policy(
             statement=iam.PolicyStatement(
                 actions=[
-                    'secretsmanager:GetSecretValue'
+                    'lambda:InvokeFunction'
                 ],
                 resources=[
-                    self.__mysql.secret.secret_arn
+                    self.format_arn(
+                        service='lambda',
+                        resource='function',
+                        resource_name=service_prefix.name + 'LambdaRead',
+                        arn_format=ArnFormat.COLON_RESOURCE_NAME
+                    )
                 ]
             )
         )
 
         # ---------------------------------------- #
-        # Api Gateway
+        # SQS - Asynchronous writes
         # ---------------------------------------- #
-        self.__api_gateway = ApiGatewayStack(
-            self,
-            construct_id=service_prefix.id + 'api-gateway',
-            description='Energy Efficiency Api Gateway',
-            service_prefix=service_prefix,
-            endpoint='energy-efficiency',
-            allowed_methods=['GET', 'POST'],
-            api_models=[
-                ApiGatewayModel(
-                    method='GET',
-                    lambda_integration=self.__lambda_rd
-                ),
-                ApiGatewayModel(
-                    method='POST',
-                    lambda_integration=self.__lambda_wr
+        # API Gateway queues the POST requests, the consumer inserts them in batches
+        # and the write latency and throughput no longer depend on MySQL
+        self.__write_queue = None
+
+        if async_writes:
+            self.__write_queue = create_sqs_queue(
+                instance_class=self,
+                service_prefix=service_prefix,
+                sqs_config=SqsConfig(
+                    id='write-queue',
+                    name='WriteQueue'
                 )
-            ]
-        )
+            )
+
+            self.__lambda_consume = create_lambda(
+                instance_class=self,
+                service_prefix=service_prefix,
+                lambda_config=LambdaConfig(
+                    id='lambda-consume',
+                    name='LambdaConsume',
+                    description='Write the queued data to the database table "energy_efficiency"',
+                    code_folder_path='stacks/energy_efficiency/lambda_consume',
+                    index_file_name='lambda-handler.py',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=private_subnet_config.subnet_id,
+                    security_groups=[lambda_sg],
+                    layers=[runtime_layer],
+                    architecture=lambda_architecture,
+                    memory_size=lambda_memory_size,
+                    # The visibility timeout of the queue is 6 times this timeout
+                    timeout=Duration.seconds(60),
+                    reserved_concurrent_executions=lambda_reserved_concurrency,
+                    environment=dict(db_environment)
+                )
+            )
+
+            self.__lambda_consume.add_to_role_policy(
+                statement=iam.PolicyStatement(
+                    actions=[
+                        'secretsmanager:GetSecretValue'
+                    ],
+                    resources=[
+                        self.__mysql.secret.secret_arn
+                    ]
+                )
+            )
+
+            # Only the failed messages of a batch go back to the queue
+            self.__lambda_consume.add_event_source(
+                lambda_event_sources.SqsEventSource(
+                    self.__write_queue,
+                    batch_size=async_batch_size,
+                    max_batching_window=async_batching_window,
+                    report_batch_item_failures=True
+                )
+            )
+
+        # ---------------------------------------- #
+        # Api Gateway
+        # ---------------------------------------- #
+        # Throttling and reserved concurrency are off by default, they are sized together: a function serving
+        # api_rate_limit requests per second of L seconds each keeps api_rate_limit * L environments busy
+        # (50 requests of 200 ms: 10), and the stage lets api_burst_limit requests through at once. A reserved
+        # concurrency under the burst limit throttles requests the stage accepted, which the non-proxy
+        # integration answers with 500 instead of the 429 of the stage
+        if lambda_reserved_concurrency is not None and api_burst_limit is not None \
+                and api_burst_limit > lambda_reserved_concurrency:
+            raise ValueError(
+                f'The burst limit of the API ({api_burst_limit}) cannot exceed the reserved concurrency '
+                f'of its functions ({lambda_reserved_concurrency})'
+            )
+
+        api_models = [
+            ApiGatewayModel(
+                method='GET',
+                lambda_integration=self.__lambda_rd,
+                request_templates=READ_REQUEST_TEMPLATES,
+                cache_ttl=api_cache_ttl,
+                cache_key_parameters=READ_CACHE_KEY_PARAMETERS,
+                proxy=api_proxy,
+                throttling_rate_limit=api_rate_limit,
+                throttling_burst_limit=api_burst_limit,
+                api_key_required=api_usage_plan is not None
+            ),
+            ApiGatewayModel(
+                method='POST',
+                lambda_integration=self.__lambda_wr,
+                invalidates_cache=True,
+                queue=self.__write_queue,
+                proxy=api_proxy,
+                throttling_rate_limit=api_rate_limit,
+                throttling_burst_limit=api_burst_limit,
+                api_key_required=api_usage_plan is not None
+            )
+        ]
+
+        # HTTP APIs cost less and add less latency per request, REST APIs cache and compress the responses
+        if http_api:
+            self.__api_gateway = HttpApiGatewayStack(
+                self,
+                construct_id=service_prefix.id + 'api-gateway',
+                description='Energy Efficiency Api Gateway',
+                service_prefix=service_prefix,
+                endpoint='energy-efficiency',
+                allowed_methods=['GET', 'POST'],
+                api_models=api_models
+            )
+        else:
+            self.__api_gateway = ApiGatewayStack(
+                self,
+                construct_id=service_prefix.id + 'api-gateway',
+                description='Energy Efficiency Api Gateway',
+                service_prefix=service_prefix,
+                endpoint='energy-efficiency',
+                allowed_methods=['GET', 'POST'],
+                # The proxy functions return their compressed bodies base64 encoded, API Gateway sends them as binary
+                binary_media_types=['*/*'] if api_proxy else None,
+                usage_plan=api_usage_plan,
+                api_models=api_models
+            )
+
+        # The queued writes are inserted by the consumer, which flushes the cache instead of the write function
+        if async_writes and not http_api:
+            self.__api_gateway.grant_cache_invalidation(self.__lambda_consume)
@@ -0,0 +1,18 @@
+"""
+Write the records queued by the asynchronous POST endpoint to the table "energy_efficiency"
+
+The query handling comes from the shared runtime layer (lib/lambda_runtime)
+"""
+
+from futura_runtime import Table, consume_handler
+
+
+TABLE = Table(
+    name='energy_efficiency',
+    fields=('id', 'name'),
+    insert_fields={
+        'name': 255
+    }
+)
+
+handler = consume_handler(TABLE)
@@ -6,6 +6,15 @@ References:
       - aws_ec2.SubnetSelection: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/SubnetSelection.html#subnetselection
       - aws_rds.Credentials: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/Credentials.html#aws_cdk.aws_rds.Credentials
       - aws_iam.PolicyStatement: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_iam/PolicyStatement.html#aws_cdk.aws_iam.PolicyStatement
+      - aws_rds.DatabaseProxy: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/DatabaseProxy.html
+      - aws_rds.DatabaseInstanceReadReplica: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_rds/DatabaseInstanceReadReplica.html
+      - aws_kinesis.Stream: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_kinesis/Stream.html
+      - Amazon Kinesis Data Firehose, Kinesis data stream as source: https://docs.aws.amazon.com/firehose/latest/dev/writing-with-kinesis-streams.html
+      - Custom prefixes for Amazon S3 objects: https://docs.aws.amazon.com/firehose/latest/dev/s3-prefixes.html
+      - aws_autoscaling.AutoScalingGroup: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_autoscaling/AutoScalingGroup.html
+      - aws_elasticloadbalancingv2.NetworkLoadBalancer: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_elasticloadbalancingv2/NetworkLoadBalancer.html
+      - EC2 Image Builder: https://docs.aws.amazon.com/imagebuilder/latest/userguide/what-is-image-builder.html
+      - Lambda provisioned concurrency: https://docs.aws.amazon.com/lambda/latest/dg/provisioned-concurrency.html
 
   - Examples:
 """
@@ -13,10 +22,17 @@ References:
 from constructs import Construct
 from aws_cdk import (
     Stack,
+    ArnFormat,
+    CfnOutput,
+    Duration,
+    Fn,
     SecretValue,
     aws_ec2 as ec2,
+    aws_lambda as lambda_,
     aws_rds as rds,
     aws_iam as iam,
+    aws_s3 as s3,
+    aws_applicationautoscaling as appscaling,
     aws_amplify_alpha as amplify
 )
 
@@ -26,49 +42,127 @@ from lib.dataclasses import (
     VpcConfig,
     SubnetConfig,
     DbConfig,
+    DbProxyConfig,
     LambdaConfig,
+    LambdaLayerConfig,
+    LambdaAliasConfig,
+    ProvisionedConcurrencySchedule,
     Ec2Config,
+    AsgConfig,
+    LoadBalancerConfig,
+    ImagePipelineConfig,
     BastionHostConfig,
     IamRoleConfig,
-    S3Config
+    S3Config,
+    KinesisStreamConfig,
+    FirehoseConfig
 )
 
 from lib.services import (
     create_security_group as create_sg,
     create_vpc,
     create_rds_mysql,
+    create_rds_read_replicas,
+    create_rds_proxy,
     create_lambda,
+    create_lambda_layer,
+    create_lambda_alias,
     create_ec2,
+    create_autoscaling_group,
+    create_internal_load_balancer,
+    create_image_pipeline,
+    get_baked_image,
     create_bastion_host,
     create_role_inline_policy,
     get_secret_value_access_policy,
-    create_s3_bucket
+    create_s3_bucket,
+    create_kinesis_stream,
+    create_firehose_delivery_stream,
+    read_user_data
 )
 
+from stacks.api_gateway.http_api_gateway_stack import HttpApiGatewayStack
 from stacks.api_gateway.api_gateway_stack import (
     ApiGatewayStack,
-    ApiGatewayModel
+    ApiGatewayModel,
+    ApiUsagePlan,
+    READ_REQUEST_TEMPLATES,
+    READ_CACHE_KEY_PARAMETERS
 )
 
-service_prefix = ServicePrefix(
+# Prefix of the stack of app.py, the cities of a deployment manifest have their own
+default_service_prefix = ServicePrefix(
     id='st-',
     name='St'
 )
 
-gh_token_id = f'GH_TOKEN_ID={service_prefix.id}gh-token'
-
-with open('./stacks/smart_traffic/userdata/ec2_wr_init.sh') as f:
-    ec2_wr_init = f.read()
-
-with open('./stacks/smart_traffic/userdata/ec2_ai_engine_init.sh') as f:
-    ec2_ai_engine_init = f.read()
-
-with open('./stacks/smart_traffic/userdata/ec2_sensor_listener_init.sh') as f:
-    ec2_sensors_listener_init = f.read()
+# Port of the services of the EC2 roles, the one their peers and the load balancers connect to
+EC2_SERVICE_PORT = 8000
+
+# Repository of the service of each EC2 role
+EC2_REPOSITORIES = {
+    'ec2-wr': 'fc-st-ec2-wr',
+    'ec2-ai-engine': 'fc-st-ec2-ai-engine',
+    'ec2-sensor-listener': 'fc-st-ec2-sensor-listener'
+}
+
+# Rush hours of the dashboard reads on weekdays, in UTC: (name, (start hour, minute), (end hour, minute)).
+# The provisioned environments of the read function are raised at the start and lowered at the end
+RUSH_HOURS = [
+    ('morning', (5, 45), (9, 0)),
+    ('evening', (14, 45), (18, 0))
+]
+
+# User data of the EC2 roles, read when the stack is built instead of at import
+EC2_BAKE_PATH = './lib/userdata/ec2_bake.sh'
+EC2_START_PATH = './lib/userdata/ec2_start.sh'
+EC2_WR_INIT_PATH = './stacks/smart_traffic/userdata/ec2_wr_init.sh'
+EC2_AI_ENGINE_INIT_PATH = './stacks/smart_traffic/userdata/ec2_ai_engine_init.sh'
+EC2_SENSORS_LISTENER_INIT_PATH = './stacks/smart_traffic/userdata/ec2_sensor_listener_init.sh'
+
+
+def rush_hour_schedules(base_concurrency: int, rush_hour_concurrency: int) -> list[ProvisionedConcurrencySchedule]:
+    """
+    Scheduled actions setting the provisioned concurrency to rush_hour_concurrency during the RUSH_HOURS,
+    and back to base_concurrency after them
+
+    :param base_concurrency:
+    :param rush_hour_concurrency:
+    :return: list[ProvisionedConcurrencySchedule]
+    """
+
+    schedules = []
+
+    for name, (start_hour, start_minute), (end_hour, end_minute) in RUSH_HOURS:
+        schedules.append(ProvisionedConcurrencySchedule(
+            id=f'{name}-rush-start',
+            schedule=appscaling.Schedule.cron(minute=str(start_minute), hour=str(start_hour), week_day='MON-FRI'),
+            min_capacity=rush_hour_concurrency,
+            max_capacity=rush_hour_concurrency
+        ))
+        # Setting the max is what lowers the capacity, the min alone keeps the current one
+        schedules.append(ProvisionedConcurrencySchedule(
+            id=f'{name}-rush-end',
+            schedule=appscaling.Schedule.cron(minute=str(end_minute), hour=str(end_hour), week_day='MON-FRI'),
+            min_capacity=base_concurrency,
+            max_capacity=base_concurrency
+        ))
+
+    return schedules
 
 
 class SmartTrafficStack(Stack):
-    def __init__(self, scope: Construct, construct_id: str, **kwargs) -> None:
+    def __init__(self, scope: Construct, construct_id: str, enable_db_proxy: bool = False,
+                 db_read_replicas: int = 0, api_cache_ttl: Duration = None,
+                 api_proxy: bool = False, http_api: bool = False, api_rate_limit: float = None,
+                 api_burst_limit: int = None, api_usage_plan: ApiUsagePlan = None,
+                 lambda_reserved_concurrency: int = None, sensor_stream_shards: int = 0,
+                 sensor_events_archive: bool = False, ec2_autoscaling: bool = False,
+                 ec2_min_capacity: int = 1, ec2_max_capacity: int = 4, image_pipelines: bool = False,
+                 graviton: bool = False, lambda_provisioned_concurrency: int = 0,
+                 lambda_rush_hour_concurrency: int = 0, service_prefix: ServicePrefix = None,
+                 db_instance_size: ec2.InstanceSize = ec2.InstanceSize.LARGE, lambda_memory_size: int = 256,
+                 **kwargs) -> None:
         super().__init__(
             scope,
             construct_id,
@@ -76,6 +170,14 @@ class SmartTrafficStack(Stack):
             **kwargs
         )
 
+        service_prefix = service_prefix or default_service_prefix
+        gh_token_id = f'GH_TOKEN_ID={service_prefix.id}gh-token'
+
+        # With graviton the functions, the instances and the database run on arm64 (Graviton) processors
+        lambda_architecture = lambda_.Architecture.ARM_64 if graviton else lambda_.Architecture.X86_64
+        ec2_instance_class = ec2.InstanceClass.T4G if graviton else ec2.InstanceClass.T3
+        db_instance_class = ec2.InstanceClass.M6G if graviton else ec2.InstanceClass.M6I
+
         # ---------------------------------------- #
         # VPC
         # ---------------------------------------- #
@@ -118,6 +220,12 @@ class SmartTrafficStack(Stack):
             ]
         )
 
+        # Keep the S3 traffic of the private subnets off the NAT gateway
+        self.__vpc.add_gateway_endpoint(
+            id=service_prefix.id + 'vpc-ep-s3',
+            service=ec2.GatewayVpcEndpointAwsService.S3
+        )
+
         # ---------------------------------------- #
         # Security Groups
         # ---------------------------------------- #
@@ -180,7 +288,7 @@ class SmartTrafficStack(Stack):
 
         ec2_sg.add_ingress_rule(
             peer=ec2.Peer.any_ipv4(),
-            connection=ec2.Port.tcp(8000),
+            connection=ec2.Port.tcp(EC2_SERVICE_PORT),
             description='Allow access to the web server from anywhere'
         )
 
@@ -217,20 +325,25 @@ class SmartTrafficStack(Stack):
         # ---------------------------------------- #
         # RDS - MySQL
         # ---------------------------------------- #
+        db_config = DbConfig(
+            vpc=self.__vpc,
+            vpc_subnet_id=storage_subnet_config.subnet_id,
+            security_groups=[mysql_sg],
+            # FIXME: The following instance_class and instance_size are not working
+            # instance_class=ec2.InstanceClass.I4I,  # I/O-optimized instances with local NVME drive: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/InstanceClass.html#aws_cdk.aws_ec2.InstanceClass
+            # instance_size=ec2.InstanceSize.LARGE,  # instances in eu-north-1
+            instance_class=db_instance_class,
+            instance_size=db_instance_size,
+            credentials=rds.Credentials.from_generated_secret(
+                username='admin'
+            ),
+            read_replicas=db_read_replicas
+        )
+
         self.__mysql = create_rds_mysql(
             instance_class=self,
             service_prefix=service_prefix,
-            db_config=DbConfig(
-                vpc=self.__vpc,
-                vpc_subnet_id=storage_subnet_config.subnet_id,
-                security_groups=[mysql_sg],
-                # FIXME: The following instance_class and instance_size are not working
-                # instance_class=ec2.InstanceClass.I4I,  # I/O-optimized instances with local NVME drive: https://docs.aws.amazon.com/cdk/api/v2/python/aws_cdk.aws_ec2/InstanceClass.html#aws_cdk.aws_ec2.InstanceClass
-                # instance_size=ec2.InstanceSize.LARGE,  # instances in eu-north-1
-                credentials=rds.Credentials.from_generated_secret(
-                    username='admin'
-                )
-            )
+            db_config=db_config
         )
 
         self.__mysql.connections.allow_default_port_from(
@@ -243,6 +356,60 @@ class SmartTrafficStack(Stack):
             description='Allow EC2 to access RDS'
         )
 
+        # ---------------------------------------- #
+        # RDS - Read Replicas
+        # ---------------------------------------- #
+        # The read Lambda sends its SELECTs to the replicas listed in DB_READER_HOSTS
+        self.__mysql_replicas = create_rds_read_replicas(
+            instance_class=self,
+            service_prefix=service_prefix,
+            db_config=db_config,
+            source_db_instance=self.__mysql
+        )
+
+        reader_environment = {}
+
+        if self.__mysql_replicas:
+            reader_hosts = Fn.join(',', [replica.db_instance_endpoint_address for replica in self.__mysql_replicas])
+
+            CfnOutput(
+                self,
+                id=service_prefix.id + 'rds-reader-hosts',
+                value=reader_hosts,
+                export_name=service_prefix.id + 'rds-reader-hosts'
+            )
+
+            reader_environment['DB_READER_HOSTS'] = reader_hosts
+
+        # ---------------------------------------- #
+        # RDS Proxy
+        # ---------------------------------------- #
+        # The Lambda functions read the credentials from the secret of the instance
+        # and, when DB_HOST is set, connect to the proxy endpoint instead of its host
+        db_environment = {
+            'DB_SECRET_ARN': self.__mysql.secret.secret_arn
+        }
+
+        if enable_db_proxy:
+            self.__db_proxy = create_rds_proxy(
+                instance_class=self,
+                service_prefix=service_prefix,
+                proxy_config=DbProxyConfig(
+                    db_instance=self.__mysql,
+                    vpc=self.__vpc,
+                    vpc_subnet_id=storage_subnet_config.subnet_id
+                )
+            )
+
+            # The proxy listens on the port of the instance, it has no default port of its own
+            self.__db_proxy.connections.allow_from(
+                other=lambda_sg,
+                port_range=self.__mysql.connections.default_port,
+                description='Allow Lambda to access RDS Proxy'
+            )
+
+            db_environment['DB_HOST'] = self.__db_proxy.endpoint
+
         # ---------------------------------------- #
         # S3 Buckets
         # ---------------------------------------- #
@@ -254,9 +421,83 @@ class SmartTrafficStack(Stack):
             )
         )
 
+        self.__exports_bucket = create_s3_bucket(
+            instance_class=self,
+            service_prefix=service_prefix,
+            s3_config=S3Config(
+                id='exports-bucket',
+                lifecycle_rules=[
+                    s3.LifecycleRule(
+                        expiration=Duration.days(7),
+                        abort_incomplete_multipart_upload_after=Duration.days(1)
+                    )
+                ]
+            )
+        )
+
+        # ---------------------------------------- #
+        # Kinesis - Sensor events
+        # ---------------------------------------- #
+        # The sensor listener puts its events in the stream, partitioned by sensor, and the AI engine workers
+        # read the shards in parallel instead of receiving every event on a single private IP
+        self.__sensor_stream = None
+
+        if sensor_stream_shards > 0:
+            self.__sensor_stream = create_kinesis_stream(
+                instance_class=self,
+                service_prefix=service_prefix,
+                stream_config=KinesisStreamConfig(
+                    id='sensor-stream',
+                    name='SensorStream',
+                    shard_count=sensor_stream_shards
+                )
+            )
+
+            # Keep the stream traffic of the private subnets off the NAT gateway
+            self.__vpc.add_interface_endpoint(
+                id=service_prefix.id + 'vpc-ep-kinesis',
+                service=ec2.InterfaceVpcEndpointAwsService.KINESIS_STREAMS,
+                subnets=ec2.SubnetSelection(
+                    subnet_group_name=service_prefix.id + sensor_subnet_config.subnet_id
+                )
+            )
+
+            CfnOutput(
+                self,
+                id=service_prefix.id + 'sensor-stream-name',
+                value=self.__sensor_stream.stream_name
+            )
+
+            # Firehose archives the raw events in the image backups bucket, one prefix per hour
+            if sensor_events_archive:
+                self.__sensor_events_archive = create_firehose_delivery_stream(
+                    instance_class=self,
+                    service_prefix=service_prefix,
+                    firehose_config=FirehoseConfig(
+                        id='sensor-events-archive',
+                        name='SensorEventsArchive',
+                        source_stream=self.__sensor_stream,
+                        destination_bucket=self.__image_backups_bucket,
+                        prefix='sensor-events/!{timestamp:yyyy/MM/dd/HH}/',
+                        error_output_prefix='sensor-events-errors/!{firehose:error-output-type}/!{timestamp:yyyy/MM/dd}/'
+                    )
+                )
+
         # ---------------------------------------- #
         # Lambda Functions
         # ---------------------------------------- #
+        runtime_layer = create_lambda_layer(
+            instance_class=self,
+            service_prefix=service_prefix,
+            layer_config=LambdaLayerConfig(
+                id='lambda-runtime',
+                name='LambdaRuntime',
+                description='Shared runtime of the Lambda functions: connection, secret, responses, metrics',
+                code_folder_path='lib/lambda_runtime',
+                compatible_architectures=[lambda_architecture]
+            )
+        )
+
         # TODO: find a way to start the lambda_init only once to initialize the db
         self.__lambda_init = create_lambda(
             instance_class=self,
@@ -270,9 +511,10 @@ class SmartTrafficStack(Stack):
                 vpc=self.__vpc,
                 vpc_subnet_id=storage_subnet_config.subnet_id,
                 security_groups=[lambda_sg],
-                environment={
-                    'DB_SECRET_ARN': self.__mysql.secret.secret_arn
-                }
+                layers=[runtime_layer],
+                architecture=lambda_architecture,
+                memory_size=lambda_memory_size,
+                environment=dict(db_environment)
             )
         )
 
@@ -293,14 +535,20 @@ class SmartTrafficStack(Stack):
             lambda_config=LambdaConfig(
                 id='lambda-read',
                 name='LambdaRead',
-                description='Read all data from the database table "energy_efficiency"',
+                description='Read a page of data from the database table "smart_traffic"',
                 code_folder_path='stacks/smart_traffic/lambda_read',
                 index_file_name='lambda-handler.py',
                 vpc=self.__vpc,
                 vpc_subnet_id=storage_subnet_config.subnet_id,
                 security_groups=[lambda_sg],
+                layers=[runtime_layer],
+                architecture=lambda_architecture,
+                memory_size=lambda_memory_size,
+                reserved_concurrent_executions=lambda_reserved_concurrency,
                 environment={
-                    'DB_SECRET_ARN': self.__mysql.secret.secret_arn
+                    **db_environment,
+                    **reader_environment,
+                    'EXPORT_BUCKET': self.__exports_bucket.bucket_name
                 }
             )
         )
@@ -316,6 +564,67 @@ class SmartTrafficStack(Stack):
             )
         )
 
+        self.lambda_rd.add_to_role_policy(
+            statement=iam.PolicyStatement(
+                actions=[
+                    's3:PutObject',
+                    's3:GetObject',
+                    's3:AbortMultipartUpload'
+                ],
+                resources=[
+                    self.__exports_bucket.arn_for_objects('exports/*')
+                ]
+            )
+        )
+
+        # The function runs the exports in an asynchronous invocation of itself, its ARN is built from
+        # its name: the policy of its role cannot reference the function
+        self.lambda_rd.add_to_role_policy(
+            statement=iam.PolicyStatement(
+                actions=[
+                    'lambda:InvokeFunction'
+                ],
+                resources=[
+                    self.format_arn(
+                        service='lambda',
+                        resource='function',
+                        resource_name=service_prefix.name + 'LambdaRead',
+                        arn_format=ArnFormat.COLON_RESOURCE_NAME
+                    )
+                ]
+            )
+        )
+
+        # The dashboard reads go through an alias with environments initialized ahead of the requests,
+        # which open their connection during the init (see futura_runtime.warmup)
+        read_integration = self.lambda_rd
+
+        if lambda_provisioned_concurrency > 0:
+            peak_concurrency = max(lambda_provisioned_concurrency, lambda_rush_hour_concurrency)
+
+            if lambda_reserved_concurrency is not None and peak_concurrency > lambda_reserved_concurrency:
+                raise ValueError(
+                    f'The provisioned concurrency ({peak_concurrency}) of the read function cannot exceed '
+                    f'its reserved concurrency ({lambda_reserved_concurrency})'
+                )
+
+            self.lambda_rd_alias = create_lambda_alias(
+                instance_class=self,
+                service_prefix=service_prefix,
+                lambda_function=self.lambda_rd,
+                alias_config=LambdaAliasConfig(
+                    id='lambda-read-alias',
+                    description='Provisioned environments of the dashboard reads',
+                    provisioned_concurrency=lambda_provisioned_concurrency,
+                    schedules=rush_hour_schedules(
+                        lambda_provisioned_concurrency,
+                        lambda_rush_hour_concurrency
+                    ) if lambda_rush_hour_concurrency > lambda_provisioned_concurrency else None
+                )
+            )
+
+            read_integration = self.lambda_rd_alias
+
         # ---------------------------------------- #
         # Bastion Host
         # ---------------------------------------- #
@@ -326,29 +635,115 @@ class SmartTrafficStack(Stack):
                 vpc=self.__vpc,
                 vpc_subnet_id=public_subnet_config.subnet_id,
                 security_group=bh_sg,
+                instance_class=ec2_instance_class,
                 ssh_key_path='./stacks/smart_traffic/userdata/ec2-bastion-host.pem'
             )
         )
 
+        # ---------------------------------------- #
+        # Image Builder
+        # ---------------------------------------- #
+        # The pipelines bake the dependencies and the code of each role in an AMI. Deployed with the id
+        # of the AMI in the context (-c st-ec2-wr-ami=ami-...), a role boots from it and its user data only
+        # sets the configuration and starts the service
+        if image_pipelines:
+            for role, repository in EC2_REPOSITORIES.items():
+                create_image_pipeline(
+                    instance_class=self,
+                    service_prefix=service_prefix,
+                    image_config=ImagePipelineConfig(
+                        id=role + '-image',
+                        name=''.join(word.capitalize() for word in role.split('-')) + 'Image',
+                        description=f'Image of the {role} role with {repository} and its dependencies installed',
+                        build_commands=[
+                            gh_token_id,
+                            f'REPO_NAME={repository}',
+                            read_user_data(EC2_BAKE_PATH)
+                        ],
+                        parent_image=ec2.MachineImage.latest_amazon_linux2023(
+                            cpu_type=ec2.AmazonLinuxCpuType.ARM_64 if graviton else ec2.AmazonLinuxCpuType.X86_64
+                        ),
+                        instance_types=['t4g.medium'] if graviton else None,
+                        vpc=self.__vpc,
+                        vpc_subnet_id=sensor_subnet_config.subnet_id,
+                        security_group=ec2_sg,
+                        policy_statements=[
+                            get_secret_value_access_policy(
+                                resources=[f'arn:aws:secretsmanager:*:*:secret:{service_prefix.id}gh-token*']
+                            )
+                        ]
+                    )
+                )
+
+        ec2_images = {
+            role: get_baked_image(self, f'{service_prefix.id}{role}-ami')
+            for role in EC2_REPOSITORIES
+        }
+
         # ---------------------------------------- #
         # EC2 Instances
         # ---------------------------------------- #
-        self.__ec2_wr = create_ec2(
-            instance_class=self,
-            service_prefix=service_prefix,
-            ec2_config=Ec2Config(
-                id='ec2-wr',
-                vpc=self.__vpc,
-                vpc_subnet_id=storage_subnet_config.subnet_id,
-                security_group=ec2_sg,
-                role=ec2_role,
-                key_name='ec2-bastion-host'
+        # With ec2_autoscaling each role is an Auto Scaling group, and the peers reach the AI engine and the writer
+        # through internal load balancers instead of the private IP of a single instance
+        if ec2_autoscaling:
+            self.__ec2_wr = create_autoscaling_group(
+                instance_class=self,
+                service_prefix=service_prefix,
+                asg_config=AsgConfig(
+                    id='asg-wr',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=storage_subnet_config.subnet_id,
+                    security_group=ec2_sg,
+                    role=ec2_role,
+                    key_name='ec2-bastion-host',
+                    instance_class=ec2_instance_class,
+                    machine_image=ec2_images['ec2-wr'],
+                    min_capacity=ec2_min_capacity,
+                    max_capacity=ec2_max_capacity,
+                    elb_health_check=True
+                )
             )
-        )
+
+            self.__ec2_wr_lb = create_internal_load_balancer(
+                instance_class=self,
+                service_prefix=service_prefix,
+                lb_config=LoadBalancerConfig(
+                    id='nlb-wr',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=storage_subnet_config.subnet_id,
+                    port=EC2_SERVICE_PORT,
+                    targets=[self.__ec2_wr]
+                )
+            )
+
+            ec2_wr_host = self.__ec2_wr_lb.load_balancer_dns_name
+        else:
+            self.__ec2_wr = create_ec2(
+                instance_class=self,
+                service_prefix=service_prefix,
+                ec2_config=Ec2Config(
+                    id='ec2-wr',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=storage_subnet_config.subnet_id,
+                    security_group=ec2_sg,
+                    role=ec2_role,
+                    key_name='ec2-bastion-host',
+                    instance_class=ec2_instance_class,
+                    machine_image=ec2_images['ec2-wr']
+                )
+            )
+
+            ec2_wr_host = self.__ec2_wr.instance_private_ip
 
         self.__ec2_wr.user_data.add_commands(gh_token_id)
         self.__ec2_wr.user_data.add_commands(f'DB_SECRET_ARN={self.__mysql.secret.secret_arn}')
-        self.__ec2_wr.user_data.add_commands(ec2_wr_init)
+
+        if ec2_images['ec2-wr'] is not None:
+            self.__ec2_wr.user_data.add_commands(f'REPO_NAME={EC2_REPOSITORIES["ec2-wr"]}')
+            self.__ec2_wr.user_data.add_commands(read_user_data(EC2_START_PATH))
+        else:
+            self.__ec2_wr.user_data.add_commands(read_user_data(EC2_WR_INIT_PATH))
+
         self.__ec2_wr.add_to_role_policy(
             statement=iam.PolicyStatement(
                 actions=[
@@ -360,42 +755,124 @@ class SmartTrafficStack(Stack):
             )
         )
 
-        self.__ec2_ai_engine = create_ec2(
-            instance_class=self,
-            service_prefix=service_prefix,
-            ec2_config=Ec2Config(
-                id='ec2-ai-engine',
-                vpc=self.__vpc,
-                vpc_subnet_id=ai_subnet_config.subnet_id,
-                security_group=ec2_sg,
-                role=ec2_role,
-                key_name='ec2-bastion-host'
+        if ec2_autoscaling:
+            self.__ec2_ai_engine = create_autoscaling_group(
+                instance_class=self,
+                service_prefix=service_prefix,
+                asg_config=AsgConfig(
+                    id='asg-ai-engine',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=ai_subnet_config.subnet_id,
+                    security_group=ec2_sg,
+                    role=ec2_role,
+                    key_name='ec2-bastion-host',
+                    instance_class=ec2_instance_class,
+                    machine_image=ec2_images['ec2-ai-engine'],
+                    min_capacity=ec2_min_capacity,
+                    max_capacity=ec2_max_capacity,
+                    # With the sensor stream, the workers are added when they fall behind the stream
+                    scaling_metric=self.__sensor_stream.metric_get_records_iterator_age_milliseconds(
+                        statistic='Maximum'
+                    ) if self.__sensor_stream is not None else None,
+                    scaling_metric_target=Duration.minutes(1).to_milliseconds(),
+                    elb_health_check=True
+                )
             )
-        )
 
-        self.__ec2_ai_engine.user_data.add_commands(gh_token_id)
-        self.__ec2_ai_engine.user_data.add_commands(f'EC2_WR_PRIVATE_IP={self.__ec2_wr.instance_private_ip}')
-        self.__ec2_ai_engine.user_data.add_commands(ec2_ai_engine_init)
+            self.__ec2_ai_engine_lb = create_internal_load_balancer(
+                instance_class=self,
+                service_prefix=service_prefix,
+                lb_config=LoadBalancerConfig(
+                    id='nlb-ai-engine',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=ai_subnet_config.subnet_id,
+                    port=EC2_SERVICE_PORT,
+                    targets=[self.__ec2_ai_engine]
+                )
+            )
 
-        self.__ec2_sensor_listener = create_ec2(
-            instance_class=self,
-            service_prefix=service_prefix,
-            ec2_config=Ec2Config(
-                id='ec2-sensor-listener',
-                vpc=self.__vpc,
-                vpc_subnet_id=sensor_subnet_config.subnet_id,
-                security_group=ec2_sg,
-                role=ec2_role,
-                key_name='ec2-bastion-host'
+            ec2_ai_engine_host = self.__ec2_ai_engine_lb.load_balancer_dns_name
+        else:
+            self.__ec2_ai_engine = create_ec2(
+                instance_class=self,
+                service_prefix=service_prefix,
+                ec2_config=Ec2Config(
+                    id='ec2-ai-engine',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=ai_subnet_config.subnet_id,
+                    security_group=ec2_sg,
+                    role=ec2_role,
+                    key_name='ec2-bastion-host',
+                    instance_class=ec2_instance_class,
+                    machine_image=ec2_images['ec2-ai-engine']
+                )
+            )
+
+            ec2_ai_engine_host = self.__ec2_ai_engine.instance_private_ip
+
+        # The *_PRIVATE_IP variables are kept for the services not reading the *_HOST ones yet
+        self.__ec2_ai_engine.user_data.add_commands(gh_token_id)
+        self.__ec2_ai_engine.user_data.add_commands(f'EC2_WR_HOST={ec2_wr_host}')
+        self.__ec2_ai_engine.user_data.add_commands(f'EC2_WR_PRIVATE_IP={ec2_wr_host}')
+
+        if self.__sensor_stream is not None:
+            self.__ec2_ai_engine.user_data.add_commands(f'SENSOR_STREAM_NAME={self.__sensor_stream.stream_name}')
+            self.__sensor_stream.grant_read(self.__ec2_ai_engine.role)
+
+        if ec2_images['ec2-ai-engine'] is not None:
+            self.__ec2_ai_engine.user_data.add_commands(f'REPO_NAME={EC2_REPOSITORIES["ec2-ai-engine"]}')
+            self.__ec2_ai_engine.user_data.add_commands(read_user_data(EC2_START_PATH))
+        else:
+            self.__ec2_ai_engine.user_data.add_commands(read_user_data(EC2_AI_ENGINE_INIT_PATH))
+
+        if ec2_autoscaling:
+            self.__ec2_sensor_listener = create_autoscaling_group(
+                instance_class=self,
+                service_prefix=service_prefix,
+                asg_config=AsgConfig(
+                    id='asg-sensor-listener',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=sensor_subnet_config.subnet_id,
+                    security_group=ec2_sg,
+                    role=ec2_role,
+                    key_name='ec2-bastion-host',
+                    instance_class=ec2_instance_class,
+                    machine_image=ec2_images['ec2-sensor-listener'],
+                    min_capacity=ec2_min_capacity,
+                    max_capacity=ec2_max_capacity
+                )
+            )
+        else:
+            self.__ec2_sensor_listener = create_ec2(
+                instance_class=self,
+                service_prefix=service_prefix,
+                ec2_config=Ec2Config(
+                    id='ec2-sensor-listener',
+                    vpc=self.__vpc,
+                    vpc_subnet_id=sensor_subnet_config.subnet_id,
+                    security_group=ec2_sg,
+                    role=ec2_role,
+                    key_name='ec2-bastion-host',
+                    instance_class=ec2_instance_class,
+                    machine_image=ec2_images['ec2-sensor-listener']
+                )
             )
-        )
 
         self.__ec2_sensor_listener.user_data.add_commands(gh_token_id)
         self.__ec2_sensor_listener.user_data.add_commands(
             f'IMAGE_BACKUPS_BUCKET={self.__image_backups_bucket.bucket_name}')
-        self.__ec2_sensor_listener.user_data.add_commands(
-            f'EC2_AI_ENGINE_PRIVATE_IP={self.__ec2_ai_engine.instance_private_ip}')
-        self.__ec2_sensor_listener.user_data.add_commands(ec2_sensors_listener_init)
+        self.__ec2_sensor_listener.user_data.add_commands(f'EC2_AI_ENGINE_HOST={ec2_ai_engine_host}')
+        self.__ec2_sensor_listener.user_data.add_commands(f'EC2_AI_ENGINE_PRIVATE_IP={ec2_ai_engine_host}')
+
+        if self.__sensor_stream is not None:
+            self.__ec2_sensor_listener.user_data.add_commands(f'SENSOR_STREAM_NAME={self.__sensor_stream.stream_name}')
+            self.__sensor_stream.grant_write(self.__ec2_sensor_listener.role)
+
+        if ec2_images['ec2-sensor-listener'] is not None:
+            self.__ec2_sensor_listener.user_data.add_commands(f'REPO_NAME={EC2_REPOSITORIES["ec2-sensor-listener"]}')
+            self.__ec2_sensor_listener.user_data.add_commands(read_user_data(EC2_START_PATH))
+        else:
+            self.__ec2_sensor_listener.user_data.add_commands(read_user_data(EC2_SENSORS_LISTENER_INIT_PATH))
 
         self.__ec2_sensor_listener.add_to_role_policy(
             statement=iam.PolicyStatement(
@@ -412,22 +889,60 @@ class SmartTrafficStack(Stack):
         # ---------------------------------------- #
         # Api Gateway
         # ---------------------------------------- #
-        self.__api_gateway = ApiGatewayStack(
-            scope=self,
-            construct_id=service_prefix.id + 'api-gateway',
-            description='Api Gateway for the Smart Traffic project',
-            service_prefix=service_prefix,
-            endpoint='smart-traffic-api',
-            allowed_methods=[
-                'GET'
-            ],
-            api_models=[
-                ApiGatewayModel(
-                    method='GET',
-                    lambda_integration=self.lambda_rd
-                )
-            ]
-        )
+        # Throttling and reserved concurrency are off by default, they are sized together: a function serving
+        # api_rate_limit requests per second of L seconds each keeps api_rate_limit * L environments busy
+        # (50 requests of 200 ms: 10), and the stage lets api_burst_limit requests through at once. A reserved
+        # concurrency under the burst limit throttles requests the stage accepted, which the non-proxy
+        # integration answers with 500 instead of the 429 of the stage
+        if lambda_reserved_concurrency is not None and api_burst_limit is not None \
+                and api_burst_limit > lambda_reserved_concurrency:
+            raise ValueError(
+                f'The burst limit of the API ({api_burst_limit}) cannot exceed the reserved concurrency '
+                f'of its functions ({lambda_reserved_concurrency})'
+            )
+
+        api_models = [
+            ApiGatewayModel(
+                method='GET',
+                lambda_integration=read_integration,
+                request_templates=READ_REQUEST_TEMPLATES,
+                cache_ttl=api_cache_ttl,
+                cache_key_parameters=READ_CACHE_KEY_PARAMETERS,
+                proxy=api_proxy,
+                throttling_rate_limit=api_rate_limit,
+                throttling_burst_limit=api_burst_limit,
+                api_key_required=api_usage_plan is not None
+            )
+        ]
+
+        # HTTP APIs cost less and add less latency per request, REST APIs cache and compress the responses
+        if http_api:
+            self.__api_gateway = HttpApiGatewayStack(
+                scope=self,
+                construct_id=service_prefix.id + 'api-gateway',
+                description='Api Gateway for the Smart Traffic project',
+                service_prefix=service_prefix,
+                endpoint='smart-traffic-api',
+                allowed_methods=[
+                    'GET'
+                ],
+                api_models=api_models
+            )
+        else:
+            self.__api_gateway = ApiGatewayStack(
+                scope=self,
+                construct_id=service_prefix.id + 'api-gateway',
+                description='Api Gateway for the Smart Traffic project',
+                service_prefix=service_prefix,
+                endpoint='smart-traffic-api',
+                allowed_methods=[
+                    'GET'
+                ],
+                # The proxy functions return their compressed bodies base64 encoded, API Gateway sends them as binary
+                binary_media_types=['*/*'] if api_proxy else None,
+                usage_plan=api_usage_plan,
+                api_models=api_models
+            )
 
         # ---------------------------------------- #
         # Amplify
@@ -0,0 +1,167 @@
+"""
+Import time of the Lambda handler modules, the part of the init spent in Python
+
+Each handler is imported in a fresh interpreter with python -X importtime, the runtime layer on the path as
+/opt/python is in Lambda. The cumulative time of the top-level imports of the handler is compared with its
+budget in import_budget.json, and the modules the handlers must not import at init (boto3, imported with
+the first AWS client) are reported.
+
+    python -m tests.benchmark.import_time --samples 5 --check
+"""
+
+import argparse
+import glob
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+RUNTIME_PATH = os.path.join(ROOT, 'lib', 'lambda_runtime')
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), 'import_budget.json')
+
+HANDLERS_PATTERN = 'stacks/*/lambda_*/lambda-handler.py'
+
+MARKER = 'import-handler'
+
+# The handler is loaded after the marker, the imports of the interpreter and of the loader come before it
+LOADER = f"""
+import importlib.util, sys
+print('{MARKER}', file=sys.stderr, flush=True)
+spec = importlib.util.spec_from_file_location('handler', sys.argv[1])
+spec.loader.exec_module(importlib.util.module_from_spec(spec))
+"""
+
+
+def find_handlers() -> list:
+    """
+    Paths of the handler modules of the stacks, relative to the root of the repository
+
+    :return: list
+    """
+
+    return sorted(os.path.relpath(path, ROOT) for path in glob.glob(os.path.join(ROOT, HANDLERS_PATTERN)))
+
+
+def load_budget(path: str = BUDGET_PATH) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+def parse_importtime(stderr: str) -> dict:
+    """
+    Read the -X importtime report of the imports done after the marker
+
+    :param stderr:
+    :return: {"total_us": cumulative time of the top-level imports, "modules": {name: cumulative us}}
+    """
+
+    lines = stderr.splitlines()
+    lines = lines[lines.index(MARKER) + 1:] if MARKER in lines else lines
+
+    total = 0
+    modules = {}
+
+    for line in lines:
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+
+        _, cumulative, name = line[len('import time:'):].split('|')
+        cumulative = int(cumulative)
+        modules[name.strip()] = cumulative
+
+        # Nested imports are indented, their time is in the cumulative time of their parent
+        if not name[1:].startswith(' '):
+            total += cumulative
+
+    return {
+        'total_us': total,
+        'modules': modules
+    }
+
+
+def measure(handler_path: str) -> dict:
+    """
+    Import the handler in a fresh interpreter
+
+    :param handler_path:
+    :return: see parse_importtime
+    """
+
+    env = dict(os.environ, PYTHONPATH=RUNTIME_PATH, DB_SECRET_ARN='db-secret')
+    # A warm-up at import would time the connection, not the imports
+    env.pop('AWS_LAMBDA_INITIALIZATION_TYPE', None)
+    env.pop('WARMUP_ON_INIT', None)
+
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', LOADER, handler_path],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True
+    )
+
+    return parse_importtime(result.stderr)
+
+
+def benchmark(handlers: list = None, samples: int = 5, budget: dict = None) -> dict:
+    """
+    Median import time of each handler, with its budget and the forbidden modules it imports
+
+    :param handlers: defaults to every handler of the stacks
+    :param samples:
+    :param budget: defaults to import_budget.json
+    :return: {handler: {"import_ms": ..., "budget_ms": ..., "forbidden": [...], "heaviest": [modules outside the runtime]}}
+    """
+
+    budget = budget or load_budget()
+    results = {}
+
+    for handler in handlers or find_handlers():
+        runs = [measure(handler) for _ in range(samples)]
+        modules = runs[-1]['modules']
+        dependencies = {name: time for name, time in modules.items() if not name.startswith('futura_runtime')}
+
+        results[handler] = {
+            'import_ms': statistics.median(run['total_us'] for run in runs) / 1000,
+            'budget_ms': budget['handlers'].get(handler, budget['default_ms']),
+            'forbidden': sorted(
+                name for name in modules
+                if name.split('.')[0] in budget['forbidden_modules']
+            ),
+            'heaviest': sorted(dependencies, key=dependencies.get, reverse=True)[:5]
+        }
+
+    return results
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description='Import time of the Lambda handler modules')
+    parser.add_argument('handlers', nargs='*', help='defaults to every handler of the stacks')
+    parser.add_argument('--samples', type=int, default=5)
+    parser.add_argument('--check', action='store_true', help='exit with 1 when a handler is over its budget')
+    args = parser.parse_args(argv)
+
+    results = benchmark(args.handlers, args.samples)
+    failed = False
+
+    print(f'{"handler":<56}{"import ms":>10}{"budget ms":>10}  heaviest')
+    for handler, result in results.items():
+        over = result['import_ms'] > result['budget_ms'] or result['forbidden']
+        failed = failed or over
+
+        print(f'{handler:<56}{result["import_ms"]:>10.1f}{result["budget_ms"]:>10.1f}  '
+              f'{", ".join(result["heaviest"])}{"  OVER BUDGET" if over else ""}')
+
+        if result['forbidden']:
+            print(f'    imported at init: {", ".join(result["forbidden"][:10])}')
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Local cold-vs-warm timing of a Lambda handler module
+
+Each sample runs in a fresh interpreter, as a new execution environment: it imports the handler module
+(the init), then invokes it once (the first request) and --invocations more times (the warm requests).
+MySQL and Secrets Manager are the stand-ins of the unit tests, answering after the given latencies so that
+the connection setup weighs as it does from a VPC. The on-demand environments are compared with the
+provisioned ones (AWS_LAMBDA_INITIALIZATION_TYPE=provisioned-concurrency), which connect during the init.
+
+    python -m tests.benchmark.lambda_warm_start stacks/smart_traffic/lambda_read/lambda-handler.py --samples 5
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+RUNTIME_PATH = os.path.join(ROOT, 'lib', 'lambda_runtime')
+
+MODES = ('on-demand', 'provisioned-concurrency')
+
+SECRET = {
+    'host': 'localhost',
+    'port': 3306,
+    'username': 'admin',
+    'password': 'password',
+    'dbname': 'RdsMysql'
+}
+
+
+def run_sample(handler_path: str, invocations: int, connect_latency: float, secret_latency: float) -> dict:
+    """
+    Import and invoke the handler in this interpreter, which must not have imported the runtime yet
+
+    :param handler_path:
+    :param invocations: warm invocations after the first one
+    :param connect_latency: seconds taken by each MySQL connection
+    :param secret_latency: seconds taken by each GetSecretValue
+    :return: dict of durations in milliseconds
+    """
+
+    os.environ.setdefault('DB_SECRET_ARN', 'db-secret')
+    sys.path.insert(0, RUNTIME_PATH)
+
+    start = time.perf_counter()
+    from futura_runtime import db, secret
+    runtime_imported = time.perf_counter()
+
+    from tests.unit.aws_stub import FakeSecretsManager
+    from tests.unit.mysql_stub import FakeMySQLServer, load_handler
+
+    server = FakeMySQLServer()
+    for table in ('energy_efficiency', 'smart_traffic'):
+        server.query(f'CREATE TABLE {table} (id INT PRIMARY KEY AUTO_INCREMENT, name VARCHAR(255))')
+        server.query(f"INSERT INTO {table} (name) VALUES ('a'), ('b'), ('c')")
+
+    secrets_manager = FakeSecretsManager({os.environ['DB_SECRET_ARN']: dict(SECRET)})
+
+    def connect(**kwargs):
+        time.sleep(connect_latency)
+        return server.connect(**kwargs)
+
+    def get_secret_value(**kwargs):
+        time.sleep(secret_latency)
+        return FakeSecretsManager.get_secret_value(secrets_manager, **kwargs)
+
+    db.pymysql.connect = connect
+    secrets_manager.get_secret_value = get_secret_value
+    secret._secrets_client = secrets_manager
+
+    # The handlers log their metrics on stdout, which carries the result of the sample
+    with contextlib.redirect_stdout(io.StringIO()):
+        handler_loaded = time.perf_counter()
+        module = load_handler(handler_path, 'benchmarked_handler')
+        initialized = time.perf_counter()
+
+        module.handler({}, None)
+        first_invocation = time.perf_counter()
+
+        warm = []
+        for _ in range(invocations):
+            invocation_start = time.perf_counter()
+            module.handler({}, None)
+            warm.append(time.perf_counter() - invocation_start)
+
+    init = (runtime_imported - start) + (initialized - handler_loaded)
+
+    return {
+        'init_ms': init * 1000,
+        'first_invocation_ms': (first_invocation - initialized) * 1000,
+        'warm_invocation_ms': statistics.median(warm) * 1000 if warm else None,
+        'connections': server.connections_opened
+    }
+
+
+def sample(mode: str, handler_path: str, invocations: int, connect_latency: float, secret_latency: float) -> dict:
+    """
+    Run one sample in a fresh interpreter, initialized as an environment of the given mode
+
+    :param mode: "on-demand" or "provisioned-concurrency"
+    :param handler_path:
+    :param invocations:
+    :param connect_latency:
+    :param secret_latency:
+    :return: dict of durations in milliseconds
+    """
+
+    env = dict(os.environ, AWS_LAMBDA_INITIALIZATION_TYPE=mode)
+    env.pop('WARMUP_ON_INIT', None)
+
+    output = subprocess.run(
+        [
+            sys.executable, '-m', 'tests.benchmark.lambda_warm_start', handler_path, '--sample',
+            '--invocations', str(invocations),
+            '--connect-latency', str(connect_latency),
+            '--secret-latency', str(secret_latency)
+        ],
+        cwd=ROOT,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True
+    ).stdout
+
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def benchmark(handler_path: str, samples: int = 5, invocations: int = 20,
+              connect_latency: float = 0.05, secret_latency: float = 0.03) -> dict:
+    """
+    Median durations of the samples of each mode
+
+    :param handler_path:
+    :param samples:
+    :param invocations:
+    :param connect_latency:
+    :param secret_latency:
+    :return: {mode: {"init_ms": ..., "first_invocation_ms": ..., "warm_invocation_ms": ...}}
+    """
+
+    results = {}
+
+    for mode in MODES:
+        runs = [sample(mode, handler_path, invocations, connect_latency, secret_latency) for _ in range(samples)]
+
+        results[mode] = {
+            key: statistics.median(run[key] for run in runs)
+            for key in ('init_ms', 'first_invocation_ms', 'warm_invocation_ms')
+        }
+
+    return results
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description='Cold-vs-warm timing of a Lambda handler module')
+    parser.add_argument('handler', help='path of the lambda-handler.py file')
+    parser.add_argument('--samples', type=int, default=5)
+    parser.add_argument('--invocations', type=int, default=20)
+    parser.add_argument('--connect-latency', type=float, default=0.05, help='seconds per MySQL connection')
+    parser.add_argument('--secret-latency', type=float, default=0.03, help='seconds per GetSecretValue')
+    parser.add_argument('--sample', action='store_true', help='run a single sample in this interpreter')
+    args = parser.parse_args(argv)
+
+    if args.sample:
+        print(json.dumps(run_sample(args.handler, args.invocations, args.connect_latency, args.secret_latency)))
+        return
+
+    results = benchmark(args.handler, args.samples, args.invocations, args.connect_latency, args.secret_latency)
+
+    print(f'{"mode":<26}{"init ms":>10}{"first ms":>10}{"warm ms":>10}')
+    for mode, result in results.items():
+        print(f'{mode:<26}{result["init_ms"]:>10.2f}{result["first_invocation_ms"]:>10.2f}'
+              f'{result["warm_invocation_ms"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Synth time of the stacks of the CDK app, with the size of their templates
+
+Each sample builds and synthesizes a stack in a fresh interpreter with lib.synth.synth_stack, the bundling of
+the assets skipped: the time is the one of the import of the stack module, of the creation of its constructs
+and of the synthesis of its templates, nested stacks included, not the one of pip or Docker. The median of
+the samples, the size of the templates and their resource counts are compared with the baseline of each
+stack in synth_budget.json: a value over its baseline by more than the threshold is a regression. The
+committed baselines are the size of the templates and their resource counts, which do not depend on the
+machine: --update records them, --update --with-times the times of this machine as well. The SmartTrafficStack
+reads the key of the bastion host, which is not checked in: an empty placeholder is created for the run.
+
+    python -m tests.benchmark.synth_time --samples 3 --check
+    python -m tests.benchmark.synth_time --samples 3 --update
+"""
+
+import argparse
+import contextlib
+import collections
+import json
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+from lib.synth import STACKS, synth_stack
+
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+BUDGET_PATH = os.path.join(os.path.dirname(__file__), 'synth_budget.json')
+BASTION_KEY_PATH = os.path.join(ROOT, 'stacks', 'smart_traffic', 'userdata', 'ec2-bastion-host.pem')
+
+REGION = 'eu-north-1'
+
+# Checked against the baseline, the times are medians of the samples
+METRICS = ('import_s', 'construct_s', 'synth_s', 'template_bytes', 'resources')
+# Recorded by --update, the same on every machine
+TEMPLATE_METRICS = ('template_bytes', 'resources')
+
+
+def load_budget(path: str = BUDGET_PATH) -> dict:
+    with open(path) as f:
+        return json.load(f)
+
+
+@contextlib.contextmanager
+def bastion_key(path: str = BASTION_KEY_PATH):
+    """
+    Empty placeholder of the key of the bastion host while the stacks are synthesized, when there is none
+
+    :param path:
+    :return:
+    """
+
+    created = not os.path.exists(path)
+
+    if created:
+        open(path, 'w').close()
+
+    try:
+        yield path
+    finally:
+        if created:
+            os.remove(path)
+
+
+def measure_templates(assembly: str) -> dict:
+    """
+    Size and resources of the templates of a cloud assembly, the ones of the nested stacks included
+
+    :param assembly: folder of the assembly
+    :return: {"template_bytes": ..., "resources": ..., "resource_types": {type: count}}
+    """
+
+    size = 0
+    resource_types = collections.Counter()
+
+    for name in os.listdir(assembly):
+        if not name.endswith('.template.json'):
+            continue
+
+        path = os.path.join(assembly, name)
+        size += os.path.getsize(path)
+
+        with open(path) as f:
+            for resource in json.load(f).get('Resources', {}).values():
+                resource_types[resource['Type']] += 1
+
+    return {
+        'template_bytes': size,
+        'resources': sum(resource_types.values()),
+        'resource_types': dict(resource_types.most_common())
+    }
+
+
+def run_sample(stack_name: str, outdir: str) -> dict:
+    """
+    Synthesize the stack in this interpreter, which must not have imported it yet
+
+    :param stack_name:
+    :param outdir:
+    :return: the result of synth_stack with the measures of its templates
+    """
+
+    # The stacks read their files relative to the root of the repository
+    os.chdir(ROOT)
+
+    result = synth_stack(stack_name, REGION, outdir, bundling=False)
+
+    return {**result, **measure_templates(result['assembly'])}
+
+
+def benchmark(stack_names: list = None, samples: int = 3) -> dict:
+    """
+    Median synth times of each stack, each sample in a fresh interpreter
+
+    :param stack_names: defaults to every stack of the app
+    :param samples:
+    :return: {stack: {"import_s": ..., "construct_s": ..., "synth_s": ..., "template_bytes": ..., "resources": ...,
+              "resource_types": {...}}}
+    """
+
+    results = {}
+    context = multiprocessing.get_context('spawn')
+
+    with tempfile.TemporaryDirectory() as outdir, bastion_key():
+        for stack_name in stack_names or list(STACKS):
+            runs = []
+
+            for sample in range(samples):
+                with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+                    runs.append(executor.submit(run_sample, stack_name, os.path.join(outdir, str(sample))).result())
+
+            results[stack_name] = {
+                **{key: statistics.median(run[key] for run in runs) for key in ('import_s', 'construct_s', 'synth_s')},
+                'template_bytes': runs[-1]['template_bytes'],
+                'resources': runs[-1]['resources'],
+                'resource_types': runs[-1]['resource_types']
+            }
+
+    return results
+
+
+def find_regressions(results: dict, budget: dict) -> dict:
+    """
+    Metrics over their baseline by more than the threshold, the stacks without baseline are not checked
+
+    :param results: of benchmark
+    :param budget: {"threshold": 0.25, "stacks": {stack: {metric: baseline}}}
+    :return: {stack: [metric, ...]}
+    """
+
+    regressions = {}
+
+    for stack_name, result in results.items():
+        baseline = budget['stacks'].get(stack_name, {})
+        over = [
+            metric for metric in METRICS
+            if metric in baseline and result[metric] > baseline[metric] * (1 + budget['threshold'])
+        ]
+
+        if over:
+            regressions[stack_name] = over
+
+    return regressions
+
+
+def update_budget(results: dict, path: str = BUDGET_PATH, metrics: tuple = TEMPLATE_METRICS) -> None:
+    """
+    Record the results as the baselines of their stacks, the other stacks are kept
+
+    :param results:
+    :param path:
+    :param metrics: defaults to the ones of the templates, the times depend on the machine
+    :return:
+    """
+
+    budget = load_budget(path)
+
+    for stack_name, result in results.items():
+        budget['stacks'][stack_name] = {
+            metric: round(result[metric], 3) if isinstance(result[metric], float) else result[metric]
+            for metric in metrics
+        }
+
+    budget['stacks'] = dict(sorted(budget['stacks'].items()))
+
+    with open(path, 'w') as f:
+        json.dump(budget, f, indent=2)
+        f.write('\n')
+
+
+def main(argv: list = None) -> None:
+    parser = argparse.ArgumentParser(description='Synth time of the stacks of the CDK app')
+    parser.add_argument('stacks', nargs='*', help=f'defaults to every stack: {", ".join(STACKS)}')
+    parser.add_argument('--samples', type=int, default=3)
+    parser.add_argument('--check', action='store_true', help='exit with 1 when a stack is over its baseline')
+    parser.add_argument('--update', action='store_true', help='record the template sizes and resources as the baselines')
+    parser.add_argument('--with-times', action='store_true', help='record the times of this machine as well')
+    args = parser.parse_args(argv)
+
+    budget = load_budget()
+    results = benchmark(args.stacks, args.samples)
+    regressions = find_regressions(results, budget)
+
+    print(f'{"stack":<24}{"import s":>10}{"construct s":>13}{"synth s":>10}{"bytes":>10}{"resources":>11}  heaviest')
+    for stack_name, result in results.items():
+        heaviest = ', '.join(f'{name} {count}' for name, count in list(result['resource_types'].items())[:3])
+
+        print(f'{stack_name:<24}{result["import_s"]:>10.2f}{result["construct_s"]:>13.2f}{result["synth_s"]:>10.2f}'
+              f'{result["template_bytes"]:>10}{result["resources"]:>11}  {heaviest}')
+
+        if stack_name in regressions:
+            print(f'    over the baseline by more than {budget["threshold"]:.0%}: {", ".join(regressions[stack_name])}')
+
+    if args.update:
+        update_budget(results, metrics=METRICS if args.with_times else TEMPLATE_METRICS)
+
+    if args.check and regressions:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
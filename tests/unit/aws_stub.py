@@ -0,0 +1,90 @@
+"""
+Minimal stand-ins for the AWS clients used by the Lambda handlers
+"""
+
+import json
+
+
+class FakeSecretsManager:
+    def __init__(self, secrets: dict = None):
+        self.secrets = secrets or {}
+        self.calls = 0
+
+    def put_secret(self, secret_id: str, value: dict) -> None:
+        self.secrets[secret_id] = value
+
+    def get_secret_value(self, SecretId: str) -> dict:
+        self.calls += 1
+
+        return {
+            'ARN': SecretId,
+            'SecretString': json.dumps(self.secrets[SecretId])
+        }
+
+
+class FakeS3:
+    def __init__(self):
+        self.objects = {}
+        self.uploads = {}
+        self.aborted = []
+        self.fail_on_part = None
+
+    def create_multipart_upload(self, Bucket: str, Key: str, ContentType: str = None) -> dict:
+        upload_id = f'upload-{len(self.uploads) + 1}'
+        self.uploads[upload_id] = {
+            'key': (Bucket, Key),
+            'content_type': ContentType,
+            'parts': {}
+        }
+
+        return {'UploadId': upload_id}
+
+    def upload_part(self, Bucket: str, Key: str, UploadId: str, PartNumber: int, Body: bytes) -> dict:
+        if self.fail_on_part == PartNumber:
+            from botocore.exceptions import ClientError
+            raise ClientError({'Error': {'Code': 'InternalError', 'Message': 'boom'}}, 'UploadPart')
+
+        self.uploads[UploadId]['parts'][PartNumber] = Body
+
+        return {'ETag': f'"etag-{PartNumber}"'}
+
+    def complete_multipart_upload(self, Bucket: str, Key: str, UploadId: str, MultipartUpload: dict) -> dict:
+        upload = self.uploads.pop(UploadId)
+        numbers = [part['PartNumber'] for part in MultipartUpload['Parts']]
+        self.objects[(Bucket, Key)] = b''.join(upload['parts'][n] for n in numbers)
+
+        return {}
+
+    def abort_multipart_upload(self, Bucket: str, Key: str, UploadId: str) -> dict:
+        self.uploads.pop(UploadId)
+        self.aborted.append(Key)
+
+        return {}
+
+    def generate_presigned_url(self, method: str, Params: dict, ExpiresIn: int) -> str:
+        return f'https://{Params["Bucket"]}.s3.amazonaws.com/{Params["Key"]}?X-Amz-Expires={ExpiresIn}'
+
+
+class FakeApiGateway:
+    def __init__(self):
+        self.flushed = []
+
+    def flush_stage_cache(self, restApiId: str, stageName: str) -> dict:
+        self.flushed.append((restApiId, stageName))
+
+        return {}
+
+
+class FakeLambda:
+    def __init__(self):
+        self.invocations = []
+        self.fail = False
+
+    def invoke(self, FunctionName: str, InvocationType: str, Payload: bytes) -> dict:
+        if self.fail:
+            from botocore.exceptions import ConnectTimeoutError
+            raise ConnectTimeoutError(endpoint_url='https://lambda.eu-west-1.amazonaws.com')
+
+        self.invocations.append((FunctionName, InvocationType, json.loads(Payload)))
+
+        return {'StatusCode': 202}
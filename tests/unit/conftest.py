@@ -0,0 +1,121 @@
+import os
+import sys
+
+import pytest
+
+# The runtime layer is mounted under /opt/python in Lambda, here it is imported from the sources
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', '..', 'lib', 'lambda_runtime'))
+
+from futura_runtime import cache, db, exports, replicas, secret, timing  # noqa: E402
+
+from tests.unit.aws_stub import FakeLambda, FakeS3, FakeSecretsManager  # noqa: E402
+from tests.unit.mysql_stub import FakeMySQLServer  # noqa: E402
+
+
+SECRET = {
+    'host': 'localhost',
+    'port': 3306,
+    'username': 'admin',
+    'password': 'password',
+    'dbname': 'RdsMysql'
+}
+
+
+@pytest.fixture
+def server():
+    server = FakeMySQLServer()
+    server.query('CREATE TABLE energy_efficiency (id INT PRIMARY KEY AUTO_INCREMENT, name VARCHAR(255))')
+    server.query('CREATE TABLE smart_traffic (id INT PRIMARY KEY AUTO_INCREMENT, name VARCHAR(255))')
+
+    return server
+
+
+@pytest.fixture
+def secrets_manager():
+    return FakeSecretsManager({'db-secret': dict(SECRET)})
+
+
+@pytest.fixture
+def s3():
+    return FakeS3()
+
+
+@pytest.fixture
+def lambda_client():
+    return FakeLambda()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Controllable time.monotonic of the runtime
+    """
+
+    now = [1000.0]
+    monkeypatch.setattr(db.time, 'monotonic', lambda: now[0])
+
+    return now
+
+
+@pytest.fixture
+def runtime(monkeypatch, server, secrets_manager, s3, lambda_client):
+    """
+    Cold container: no cached connection or secret, AWS clients and MySQL replaced by the stand-ins
+    """
+
+    monkeypatch.setenv('DB_SECRET_ARN', 'db-secret')
+
+    monkeypatch.setattr(db, '_connection', None)
+    monkeypatch.setattr(db, '_last_used', 0.0)
+    monkeypatch.setattr(db.pymysql, 'connect', server.connect)
+
+    monkeypatch.setattr(replicas, 'DB_READER_HOSTS', [])
+    monkeypatch.setattr(replicas, '_reader', None)
+    monkeypatch.setattr(replicas, '_reader_host', None)
+    monkeypatch.setattr(replicas, '_skipped_until', {})
+
+    monkeypatch.setattr(secret, '_secret', None)
+    monkeypatch.setattr(secret, '_secret_expires_at', 0.0)
+    monkeypatch.setattr(secret, '_secrets_client', secrets_manager)
+
+    monkeypatch.setattr(exports, '_s3_client', s3)
+    monkeypatch.setattr(exports, 'EXPORT_BUCKET', 'exports-bucket')
+    monkeypatch.setattr(exports, 'EXPORT_FUNCTION', 'StLambdaRead')
+    monkeypatch.setattr(exports, '_lambda_client', lambda_client)
+
+    monkeypatch.setattr(cache, '_lambda_client', lambda_client)
+    monkeypatch.setattr(cache, '_last_attempt', None)
+    monkeypatch.setattr(cache, 'CACHE_FLUSH_FUNCTION', None)
+
+    monkeypatch.setattr(timing, '_cold_start', True)
+
+    return db
+
+
+@pytest.fixture
+def app():
+    """
+    CDK app that synthesizes without bundling the Lambda assets (no Docker needed)
+    """
+
+    import aws_cdk as cdk
+
+    return cdk.App(context={'aws:cdk:bundling-stacks': []})
+
+
+@pytest.fixture
+def bastion_key():
+    """
+    Placeholder for the key pair of the bastion host, which is not checked in
+    """
+
+    path = 'stacks/smart_traffic/userdata/ec2-bastion-host.pem'
+    created = not os.path.exists(path)
+
+    if created:
+        open(path, 'w').close()
+
+    yield path
+
+    if created:
+        os.remove(path)
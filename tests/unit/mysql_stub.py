@@ -0,0 +1,213 @@
+"""
+Local stand-in for the RDS MySQL instance, backed by an in-memory sqlite3 database.
+
+It replaces pymysql.connect in the Lambda handlers so that the connection handling
+(reuse, ping, reconnect) and the queries can be exercised without a MySQL server.
+"""
+
+import importlib.util
+import re
+import sqlite3
+
+import pymysql
+
+
+def load_handler(path: str, module_name: str):
+    """
+    Import a "lambda-handler.py" file, which is not importable by name because of the dash
+
+    :param path:
+    :param module_name:
+    :return: module
+    """
+
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    return module
+
+
+def _to_sqlite(sql: str) -> str:
+    sql = sql.replace('%s', '?')
+    sql = re.sub(r'\bINT PRIMARY KEY AUTO_INCREMENT\b', 'INTEGER PRIMARY KEY AUTOINCREMENT', sql)
+
+    return sql
+
+
+class FakeMySQLServer:
+    def __init__(self, db: sqlite3.Connection = None):
+        self.db = db or sqlite3.connect(':memory:', isolation_level=None, check_same_thread=False)
+        self.is_replica = False
+        self.replica_lag = None
+        self.down = False
+        self.connections_opened = 0
+        self.pings = 0
+        self.connect_kwargs = None
+        self.password = None
+        self.statements = []
+        self._generation = 0
+
+    def replica(self, lag: float = 0.0) -> 'FakeMySQLServer':
+        """
+        Read replica of this server, sharing its data, reporting the given lag in SHOW REPLICA STATUS
+        """
+
+        replica = FakeMySQLServer(db=self.db)
+        replica.is_replica = True
+        replica.replica_lag = lag
+
+        return replica
+
+    def connect(self, **kwargs) -> 'FakeConnection':
+        self.connect_kwargs = kwargs
+
+        if self.down:
+            raise pymysql.err.OperationalError(2003, f"Can't connect to MySQL server on '{kwargs.get('host')}'")
+
+        if self.password is not None and kwargs.get('password') != self.password:
+            raise pymysql.err.OperationalError(1045, f"Access denied for user '{kwargs.get('user')}'")
+
+        self.connections_opened += 1
+
+        return FakeConnection(self)
+
+    def drop_connections(self) -> None:
+        """
+        Simulate the server closing every open connection (restart, wait_timeout, failover)
+        """
+
+        self._generation += 1
+
+    def query(self, sql: str, args: tuple = ()) -> list:
+        return self.db.execute(_to_sqlite(sql), args).fetchall()
+
+
+class FakeConnection:
+    def __init__(self, server: FakeMySQLServer):
+        self.server = server
+        self.closed = False
+        self._generation = server._generation
+
+    def _check(self) -> None:
+        if self.closed:
+            raise pymysql.err.InterfaceError(0, '')
+
+        if self._generation != self.server._generation:
+            raise pymysql.err.OperationalError(2013, 'Lost connection to MySQL server during query')
+
+    def ping(self, reconnect: bool = True) -> None:
+        self.server.pings += 1
+
+        if self.closed:
+            raise pymysql.err.Error('Already closed')
+
+        if self._generation != self.server._generation:
+            raise pymysql.err.OperationalError(2006, 'MySQL server has gone away')
+
+    def cursor(self, cursor_class=None) -> 'FakeCursor':
+        self._check()
+
+        return FakeCursor(self)
+
+    def begin(self) -> None:
+        self._check()
+        self.server.db.execute('BEGIN')
+
+    def commit(self) -> None:
+        self._check()
+
+        if self.server.db.in_transaction:
+            self.server.db.execute('COMMIT')
+
+    def rollback(self) -> None:
+        if self.server.db.in_transaction:
+            self.server.db.execute('ROLLBACK')
+
+    def close(self) -> None:
+        if self.closed:
+            raise pymysql.err.Error('Already closed')
+
+        self.closed = True
+
+
+class FakeCursor:
+    def __init__(self, connection: FakeConnection):
+        self.connection = connection
+        self.rowcount = -1
+        self.lastrowid = None
+        self._cursor = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self, method, sql: str, args) -> int:
+        self.connection._check()
+        self.connection.server.statements.append((method.__name__, sql))
+
+        try:
+            self._cursor = method(_to_sqlite(sql), args)
+        except sqlite3.IntegrityError as e:
+            raise pymysql.err.IntegrityError(1062, str(e))
+        except sqlite3.Error as e:
+            raise pymysql.err.ProgrammingError(1064, str(e))
+
+        self.rowcount = self._cursor.rowcount
+        self.lastrowid = self._cursor.lastrowid
+
+        return self.rowcount
+
+    def execute(self, sql: str, args=None) -> int:
+        if sql == 'SHOW REPLICA STATUS':
+            return self._replica_status()
+
+        return self._run(self.connection.server.db.execute, sql, tuple(args or ()))
+
+    def executemany(self, sql: str, args) -> int:
+        return self._run(self.connection.server.db.executemany, sql, [tuple(a) for a in args])
+
+    def _replica_status(self) -> int:
+        self.connection._check()
+        server = self.connection.server
+        server.statements.append(('execute', 'SHOW REPLICA STATUS'))
+
+        rows = [{'Seconds_Behind_Source': server.replica_lag}] if server.is_replica else []
+        self._cursor = _Rows(rows)
+        self.rowcount = len(rows)
+
+        return self.rowcount
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size: int = 1) -> tuple:
+        return tuple(self._cursor.fetchmany(size))
+
+    def fetchall(self) -> tuple:
+        return tuple(self._cursor.fetchall())
+
+    def close(self) -> None:
+        self._cursor = None
+
+
+class _Rows:
+    """
+    Result set of the statements answered by the stub itself instead of sqlite
+    """
+
+    def __init__(self, rows: list):
+        self._rows = list(rows)
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchmany(self, size: int = 1) -> list:
+        rows, self._rows = self._rows[:size], self._rows[size:]
+        return rows
+
+    def fetchall(self) -> list:
+        rows, self._rows = self._rows, []
+        return rows
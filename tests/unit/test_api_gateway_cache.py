@@ -0,0 +1,138 @@
+import aws_cdk as cdk
+import pytest
+from aws_cdk import assertions
+
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+
+CACHE_KEY_PARAMETERS = [
+    'method.request.querystring.limit',
+    'method.request.querystring.after_id',
+    'method.request.querystring.fields',
+    'method.request.querystring.export'
+]
+
+
+def _stacks(app, stack_class: str, **kwargs):
+    if stack_class == 'energy_efficiency':
+        stack = EnergyEfficiencyStack(app, 'ee', **kwargs)
+        prefix = 'ee-'
+    else:
+        from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+        stack = SmartTrafficStack(app, 'st', **kwargs)
+        prefix = 'st-'
+
+    return stack, stack.node.find_child(prefix + 'api-gateway')
+
+
+@pytest.mark.parametrize('stack_class, endpoint', [
+    ('energy_efficiency', 'energy-efficiency'),
+    ('smart_traffic', 'smart-traffic-api')
+])
+def test_read_method_cached(app, bastion_key, stack_class, endpoint):
+    _, api_stack = _stacks(app, stack_class, api_cache_ttl=cdk.Duration.seconds(5))
+    template = assertions.Template.from_stack(api_stack)
+
+    template.has_resource_properties('AWS::ApiGateway::Stage', {
+        'StageName': 'prod',
+        'CacheClusterEnabled': True,
+        'CacheClusterSize': '0.5',
+        'MethodSettings': assertions.Match.array_with([assertions.Match.object_like({
+            'HttpMethod': 'GET',
+            'ResourcePath': '/~1' + endpoint,
+            'CachingEnabled': True,
+            'CacheTtlInSeconds': 5
+        })])
+    })
+    template.has_resource_properties('AWS::ApiGateway::Method', {
+        'HttpMethod': 'GET',
+        'RequestParameters': {parameter: False for parameter in CACHE_KEY_PARAMETERS},
+        'Integration': {
+            'CacheKeyParameters': CACHE_KEY_PARAMETERS
+        }
+    })
+
+
+def test_write_method_not_cached_and_invalidates(app):
+    stack, api_stack = _stacks(app, 'energy_efficiency', api_cache_ttl=cdk.Duration.seconds(5))
+    template = assertions.Template.from_stack(api_stack)
+
+    post = template.find_resources('AWS::ApiGateway::Method', {'Properties': {'HttpMethod': 'POST'}})
+    assert len(post) == 1
+    assert 'CacheKeyParameters' not in next(iter(post.values()))['Properties']['Integration']
+
+    # The stage is flushed by a function outside of the VPC, the management API has no VPC endpoint
+    flush = template.find_resources('AWS::Lambda::Function', {'Properties': {'FunctionName': 'EeLambdaCacheFlush'}})
+    assert len(flush) == 1
+    flush_properties = next(iter(flush.values()))['Properties']
+    assert 'VpcConfig' not in flush_properties
+    assert flush_properties['Environment']['Variables']['CACHE_STAGE_NAME'] == 'prod'
+    assert 'Ref' in flush_properties['Environment']['Variables']['CACHE_REST_API_ID']
+
+    template.has_resource_properties('AWS::IAM::Policy', {
+        'PolicyDocument': {
+            'Statement': assertions.Match.array_with([
+                assertions.Match.object_like({
+                    'Action': 'apigateway:DELETE',
+                    'Resource': {'Fn::Join': ['', assertions.Match.array_with([
+                        assertions.Match.string_like_regexp('/stages/prod/cache/data')
+                    ])]}
+                })
+            ])
+        }
+    })
+    template.has_resource_properties('AWS::IAM::Policy', {
+        'PolicyDocument': {
+            'Statement': [
+                assertions.Match.object_like({
+                    'Action': 'lambda:InvokeFunction',
+                    'Resource': {'Fn::GetAtt': [next(iter(flush)), 'Arn']}
+                })
+            ]
+        }
+    })
+
+    parent = assertions.Template.from_stack(stack)
+    parent.has_resource_properties('AWS::Lambda::Function', {
+        'Environment': {'Variables': assertions.Match.object_like({
+            'CACHE_FLUSH_FUNCTION': 'EeLambdaCacheFlush'
+        })}
+    })
+    assert not parent.find_resources('AWS::EC2::VPCEndpoint', {
+        'Properties': {'ServiceName': {'Fn::Join': ['', assertions.Match.array_with(['.execute-api'])]}}
+    })
+
+
+def test_lambda_errors_not_returned_as_200(app):
+    _, api_stack = _stacks(app, 'energy_efficiency')
+    template = assertions.Template.from_stack(api_stack)
+
+    get = next(iter(template.find_resources('AWS::ApiGateway::Method', {'Properties': {'HttpMethod': 'GET'}}).values()))
+    integration_response, = get['Properties']['Integration']['IntegrationResponses']
+    response_template = integration_response['ResponseTemplates']['application/json']
+
+    assert '#set($context.responseOverride.status = $statusCode)' in response_template
+    assert {response['StatusCode'] for response in get['Properties']['MethodResponses']} >= {'200', '400', '500'}
+
+
+@pytest.mark.parametrize('async_writes', [False, True])
+def test_caching_disabled_by_default(app, async_writes):
+    stack, api_stack = _stacks(app, 'energy_efficiency', async_writes=async_writes)
+    template = assertions.Template.from_stack(api_stack)
+
+    # The cache cluster is billed per hour, it is opt-in
+    stage = next(iter(template.find_resources('AWS::ApiGateway::Stage').values()))['Properties']
+    assert 'CacheClusterEnabled' not in stage
+    assert not any(setting.get('CachingEnabled') for setting in stage.get('MethodSettings', []))
+
+    # Nothing to flush
+    assert not template.find_resources('AWS::Lambda::Function')
+    for function in assertions.Template.from_stack(stack).find_resources('AWS::Lambda::Function').values():
+        assert 'CACHE_FLUSH_FUNCTION' not in function['Properties'].get('Environment', {}).get('Variables', {})
+
+
+def test_custom_ttl(app):
+    _, api_stack = _stacks(app, 'energy_efficiency', api_cache_ttl=cdk.Duration.seconds(30))
+
+    assertions.Template.from_stack(api_stack).has_resource_properties('AWS::ApiGateway::Stage', {
+        'MethodSettings': assertions.Match.array_with([assertions.Match.object_like({'CacheTtlInSeconds': 30})])
+    })
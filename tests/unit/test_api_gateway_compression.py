@@ -0,0 +1,13 @@
+from aws_cdk import assertions
+
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+
+
+def test_rest_api_compresses_responses(app):
+    stack = EnergyEfficiencyStack(app, 'ee')
+    template = assertions.Template.from_stack(stack.node.find_child('ee-api-gateway'))
+
+    template.has_resource_properties('AWS::ApiGateway::RestApi', {
+        'Name': 'EeApiGateway',
+        'MinimumCompressionSize': 1024
+    })
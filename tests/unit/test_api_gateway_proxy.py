@@ -0,0 +1,82 @@
+import pytest
+from aws_cdk import assertions
+
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+
+
+def _api_template(app, stack_class: str, **kwargs) -> assertions.Template:
+    if stack_class == 'energy_efficiency':
+        stack = EnergyEfficiencyStack(app, 'ee', **kwargs)
+        prefix = 'ee-'
+    else:
+        from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+        stack = SmartTrafficStack(app, 'st', **kwargs)
+        prefix = 'st-'
+
+    return assertions.Template.from_stack(stack.node.find_child(prefix + 'api-gateway'))
+
+
+def _methods(template: assertions.Template) -> dict:
+    methods = template.find_resources('AWS::ApiGateway::Method')
+
+    return {
+        resource['Properties']['HttpMethod']: resource['Properties']
+        for resource in methods.values()
+        if resource['Properties']['HttpMethod'] != 'OPTIONS'
+    }
+
+
+@pytest.mark.parametrize('stack_class', ['energy_efficiency', 'smart_traffic'])
+def test_non_proxy_mode(app, bastion_key, stack_class):
+    template = _api_template(app, stack_class)
+
+    for method in _methods(template).values():
+        assert method['Integration']['Type'] == 'AWS'
+        assert method['Integration']['IntegrationResponses'][0]['StatusCode'] == '200'
+        assert method['MethodResponses'][0]['StatusCode'] == '200'
+
+    assert 'RequestTemplates' in _methods(template)['GET']['Integration']
+    assert 'BinaryMediaTypes' not in next(iter(template.find_resources('AWS::ApiGateway::RestApi').values()))['Properties']
+
+
+@pytest.mark.parametrize('stack_class', ['energy_efficiency', 'smart_traffic'])
+def test_proxy_mode(app, bastion_key, stack_class):
+    template = _api_template(app, stack_class, api_proxy=True)
+    methods = _methods(template)
+
+    assert set(methods) == ({'GET', 'POST'} if stack_class == 'energy_efficiency' else {'GET'})
+    for method in methods.values():
+        assert method['Integration']['Type'] == 'AWS_PROXY'
+        assert 'RequestTemplates' not in method['Integration']
+        assert 'IntegrationResponses' not in method['Integration']
+        assert 'MethodResponses' not in method
+
+    # The cache stays keyed by the query string in proxy mode
+    assert methods['GET']['Integration']['CacheKeyParameters'][1] == 'method.request.querystring.after_id'
+
+    template.has_resource_properties('AWS::ApiGateway::RestApi', {
+        'BinaryMediaTypes': ['*/*']
+    })
+
+
+def test_proxy_mode_with_cors_and_queued_writes(app):
+    template = _api_template(app, 'energy_efficiency', api_proxy=True, async_writes=True)
+    post = _methods(template)['POST']['Integration']
+
+    # The binary payloads are converted to text for the mapping templates of the preflight and of the queue
+    preflight = template.find_resources('AWS::ApiGateway::Method', {'Properties': {'HttpMethod': 'OPTIONS'}})
+    assert len(preflight) == 1
+    assert next(iter(preflight.values()))['Properties']['Integration']['ContentHandling'] == 'CONVERT_TO_TEXT'
+
+    assert post['ContentHandling'] == 'CONVERT_TO_TEXT'
+    assert post['RequestTemplates']['application/json'] == \
+        'Action=SendMessage&MessageBody=$util.urlEncode($util.base64Decode($input.body))'
+
+
+def test_text_requests_without_binary_media_types(app):
+    template = _api_template(app, 'energy_efficiency', async_writes=True)
+    post = _methods(template)['POST']['Integration']
+
+    assert post['RequestTemplates']['application/json'] == 'Action=SendMessage&MessageBody=$util.urlEncode($input.body)'
+    preflight = next(iter(template.find_resources('AWS::ApiGateway::Method', {'Properties': {'HttpMethod': 'OPTIONS'}}).values()))
+    assert 'ContentHandling' not in preflight['Properties']['Integration']
@@ -0,0 +1,119 @@
+import aws_cdk as cdk
+import pytest
+from aws_cdk import assertions, aws_apigateway as apigw_
+
+from stacks.api_gateway.api_gateway_stack import ApiUsagePlan
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+
+
+def _stacks(app, stack_class: str, **kwargs):
+    if stack_class == 'energy_efficiency':
+        stack = EnergyEfficiencyStack(app, 'ee', **kwargs)
+        prefix = 'ee-'
+    else:
+        from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+        stack = SmartTrafficStack(app, 'st', **kwargs)
+        prefix = 'st-'
+
+    return stack, stack.node.find_child(prefix + 'api-gateway')
+
+
+@pytest.mark.parametrize('stack_class, endpoint, methods', [
+    ('energy_efficiency', 'energy-efficiency', ['GET', 'POST']),
+    ('smart_traffic', 'smart-traffic-api', ['GET'])
+])
+def test_rest_api_method_throttling(app, bastion_key, stack_class, endpoint, methods):
+    _, api_stack = _stacks(app, stack_class, api_rate_limit=20, api_burst_limit=40, api_cache_ttl=cdk.Duration.seconds(5))
+    template = assertions.Template.from_stack(api_stack)
+
+    stage = next(iter(template.find_resources('AWS::ApiGateway::Stage').values()))['Properties']
+    settings = {setting['HttpMethod']: setting for setting in stage['MethodSettings']}
+
+    assert sorted(settings) == methods
+    for setting in settings.values():
+        assert setting['ResourcePath'] == '/~1' + endpoint
+        assert setting['ThrottlingRateLimit'] == 20
+        assert setting['ThrottlingBurstLimit'] == 40
+
+    # Throttling does not turn caching off
+    assert settings['GET']['CachingEnabled'] is True
+
+
+@pytest.mark.parametrize('stack_class, lambda_names', [
+    ('energy_efficiency', ['EeLambdaRead', 'EeLambdaWrite']),
+    ('smart_traffic', ['StLambdaRead'])
+])
+def test_reserved_concurrency(app, bastion_key, stack_class, lambda_names):
+    stack, _ = _stacks(app, stack_class, lambda_reserved_concurrency=15)
+    template = assertions.Template.from_stack(stack)
+
+    functions = template.find_resources('AWS::Lambda::Function', {
+        'Properties': {'ReservedConcurrentExecutions': 15}
+    })
+    assert sorted(function['Properties']['FunctionName'] for function in functions.values()) == lambda_names
+
+
+def test_usage_plan(app):
+    _, api_stack = _stacks(app, 'energy_efficiency', api_usage_plan=ApiUsagePlan(
+        rate_limit=10,
+        burst_limit=20,
+        quota_limit=100000,
+        quota_period=apigw_.Period.MONTH
+    ))
+    template = assertions.Template.from_stack(api_stack)
+
+    template.has_resource_properties('AWS::ApiGateway::UsagePlan', {
+        'UsagePlanName': 'EeUsagePlan',
+        'Throttle': {'RateLimit': 10, 'BurstLimit': 20},
+        'Quota': {'Limit': 100000, 'Period': 'MONTH'},
+        'ApiStages': [assertions.Match.object_like({'Stage': assertions.Match.any_value()})]
+    })
+    template.has_resource_properties('AWS::ApiGateway::ApiKey', {'Name': 'EeApiKey'})
+    template.resource_count_is('AWS::ApiGateway::UsagePlanKey', 1)
+
+    methods = template.find_resources('AWS::ApiGateway::Method')
+    for method in methods.values():
+        if method['Properties']['HttpMethod'] == 'OPTIONS':
+            assert not method['Properties'].get('ApiKeyRequired')
+        else:
+            assert method['Properties']['ApiKeyRequired'] is True
+
+
+def test_no_usage_plan_by_default(app):
+    _, api_stack = _stacks(app, 'energy_efficiency')
+    template = assertions.Template.from_stack(api_stack)
+
+    template.resource_count_is('AWS::ApiGateway::UsagePlan', 0)
+    template.resource_count_is('AWS::ApiGateway::ApiKey', 0)
+
+
+def test_http_api_route_throttling(app):
+    _, api_stack = _stacks(app, 'energy_efficiency', http_api=True, api_rate_limit=20, api_burst_limit=40)
+    template = assertions.Template.from_stack(api_stack)
+
+    stages = template.find_resources('AWS::ApiGatewayV2::Stage')
+    stage = next(iter(stages.values()))
+
+    assert stage['Properties']['RouteSettings'] == {
+        'GET /energy-efficiency': {'ThrottlingRateLimit': 20, 'ThrottlingBurstLimit': 40},
+        'POST /energy-efficiency': {'ThrottlingRateLimit': 20, 'ThrottlingBurstLimit': 40}
+    }
+    # The route settings need the routes to exist
+    assert set(template.find_resources('AWS::ApiGatewayV2::Route')) <= set(stage['DependsOn'])
+
+
+@pytest.mark.parametrize('stack_class', ['energy_efficiency', 'smart_traffic'])
+def test_no_throttling_nor_reserved_concurrency_by_default(app, bastion_key, stack_class):
+    stack, api_stack = _stacks(app, stack_class)
+
+    stage = next(iter(assertions.Template.from_stack(api_stack).find_resources('AWS::ApiGateway::Stage').values()))
+    assert 'MethodSettings' not in stage['Properties']
+
+    for function in assertions.Template.from_stack(stack).find_resources('AWS::Lambda::Function').values():
+        assert 'ReservedConcurrentExecutions' not in function['Properties']
+
+
+@pytest.mark.parametrize('stack_class', ['energy_efficiency', 'smart_traffic'])
+def test_burst_limit_within_reserved_concurrency(app, bastion_key, stack_class):
+    with pytest.raises(ValueError, match=r'burst limit of the API \(100\) cannot exceed the reserved concurrency'):
+        _stacks(app, stack_class, api_rate_limit=50, api_burst_limit=100, lambda_reserved_concurrency=10)
@@ -0,0 +1,100 @@
+from aws_cdk import assertions
+
+from stacks.data_analytics.data_analytics_stack import DataAnalyticsStack
+from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+
+
+def _user_data(template, logical_id_part: str) -> str:
+    templates = template.find_resources('AWS::EC2::LaunchTemplate')
+
+    return next(
+        str(launch_template['Properties']['LaunchTemplateData']['UserData'])
+        for logical_id, launch_template in templates.items()
+        if logical_id_part in logical_id
+    )
+
+
+def test_smart_traffic_roles_are_autoscaling_groups(app, bastion_key):
+    stack = SmartTrafficStack(app, 'st', ec2_autoscaling=True, ec2_min_capacity=2, ec2_max_capacity=6)
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is('AWS::EC2::Instance', 1)  # the bastion host
+    template.resource_count_is('AWS::AutoScaling::AutoScalingGroup', 3)
+    template.resource_count_is('AWS::EC2::LaunchTemplate', 3)
+    template.has_resource_properties('AWS::AutoScaling::AutoScalingGroup', {
+        'MinSize': '2',
+        'MaxSize': '6',
+        'LaunchTemplate': assertions.Match.object_like({
+            'LaunchTemplateId': assertions.Match.any_value()
+        })
+    })
+    template.has_resource_properties('AWS::AutoScaling::ScalingPolicy', {
+        'PolicyType': 'TargetTrackingScaling',
+        'TargetTrackingConfiguration': {
+            'PredefinedMetricSpecification': {
+                'PredefinedMetricType': 'ASGAverageCPUUtilization'
+            },
+            'TargetValue': 60
+        }
+    })
+
+
+def test_peers_addressed_through_internal_load_balancers(app, bastion_key):
+    stack = SmartTrafficStack(app, 'st', ec2_autoscaling=True)
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is('AWS::ElasticLoadBalancingV2::LoadBalancer', 2)
+    template.has_resource_properties('AWS::ElasticLoadBalancingV2::LoadBalancer', {
+        'Scheme': 'internal',
+        'Type': 'network'
+    })
+    template.has_resource_properties('AWS::ElasticLoadBalancingV2::Listener', {
+        'Port': 8000,
+        'Protocol': 'TCP'
+    })
+    template.has_resource_properties('AWS::AutoScaling::AutoScalingGroup', {
+        'HealthCheckType': 'ELB',
+        'TargetGroupARNs': assertions.Match.any_value()
+    })
+
+    # The DNS name of the load balancer replaces the private IP of the instance
+    assert 'nlbaiengine' in _user_data(template, 'asgsensorlistener')
+    assert 'DNSName' in _user_data(template, 'asgsensorlistener')
+    assert 'nlbwr' in _user_data(template, 'asgaiengine')
+    assert 'PrivateIp' not in str(template.to_json())
+
+
+def test_ai_engine_tracks_stream_iterator_age(app, bastion_key):
+    stack = SmartTrafficStack(app, 'st', ec2_autoscaling=True, sensor_stream_shards=2)
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::AutoScaling::ScalingPolicy', {
+        'PolicyType': 'TargetTrackingScaling',
+        'TargetTrackingConfiguration': {
+            'CustomizedMetricSpecification': assertions.Match.object_like({
+                'MetricName': 'GetRecords.IteratorAgeMilliseconds',
+                'Namespace': 'AWS/Kinesis'
+            }),
+            'TargetValue': 60000
+        }
+    })
+
+
+def test_single_instances_by_default(app, bastion_key):
+    template = assertions.Template.from_stack(SmartTrafficStack(app, 'st'))
+
+    template.resource_count_is('AWS::AutoScaling::AutoScalingGroup', 0)
+    template.resource_count_is('AWS::ElasticLoadBalancingV2::LoadBalancer', 0)
+    template.resource_count_is('AWS::EC2::Instance', 4)
+
+
+def test_data_analytics_autoscaling_group(app):
+    template = assertions.Template.from_stack(DataAnalyticsStack(app, 'da', ec2_autoscaling=True))
+
+    template.resource_count_is('AWS::EC2::Instance', 0)
+    template.has_resource_properties('AWS::AutoScaling::AutoScalingGroup', {
+        'HealthCheckType': 'EC2',
+        'MinSize': '1',
+        'MaxSize': '4'
+    })
+    assert 'S3_BUCKET=' in _user_data(template, 'daasg')
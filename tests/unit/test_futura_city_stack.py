@@ -1,15 +1,16 @@
-import aws_cdk as core
-import aws_cdk.assertions as assertions
+from aws_cdk import assertions
 
-from futura_city.futura_city_stack import FuturaCityStack
+from stacks.data_analytics.data_analytics_stack import DataAnalyticsStack
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
 
-# example tests. To run these tests, uncomment this file along with the example
-# resource in futura_city/futura_city_stack.py
-def test_sqs_queue_created():
-    app = core.App()
-    stack = FuturaCityStack(app, "futura-city")
-    template = assertions.Template.from_stack(stack)
 
-#     template.has_resource_properties("AWS::SQS::Queue", {
-#         "VisibilityTimeout": 300
-#     })
+def test_stacks_of_the_app_synthesize(app, bastion_key):
+    stacks = [
+        DataAnalyticsStack(app, 'DataAnalyticsStack'),
+        EnergyEfficiencyStack(app, 'EnergyEfficiencyStack'),
+        SmartTrafficStack(app, 'SmartTrafficStack')
+    ]
+
+    for stack in stacks:
+        assertions.Template.from_stack(stack).resource_count_is('AWS::EC2::VPC', 1)
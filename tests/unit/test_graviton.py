@@ -0,0 +1,162 @@
+import aws_cdk as cdk
+import pytest
+from aws_cdk import assertions, aws_ec2 as ec2
+
+from lib.dataclasses import DbConfig, Ec2Config, LambdaLayerConfig, ServicePrefix, SubnetConfig, VpcConfig
+from lib.instance_catalog import is_offered
+from lib.services import create_ec2, create_lambda_layer, create_rds_mysql, create_vpc
+from stacks.data_analytics.data_analytics_stack import DataAnalyticsStack
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+
+
+PREFIX = ServicePrefix(id='t-', name='T')
+
+
+def _vpc_stack(app, env: cdk.Environment = None):
+    stack = cdk.Stack(app, 'catalog', env=env)
+    vpc = create_vpc(
+        instance_class=stack,
+        service_prefix=PREFIX,
+        vpc_config=VpcConfig(cidr='10.0.0.0/24'),
+        subnets_config=[
+            SubnetConfig(subnet_id='public-subnet', subnet_type=ec2.SubnetType.PUBLIC, cidr_mask=28)
+        ]
+    )
+
+    return stack, vpc
+
+
+def _image_parameters(template) -> str:
+    return str(template.to_json().get('Parameters', {}))
+
+
+def test_x86_64_by_default(app):
+    template = assertions.Template.from_stack(EnergyEfficiencyStack(app, 'ee'))
+
+    template.has_resource_properties('AWS::Lambda::Function', {
+        'Architectures': ['x86_64']
+    })
+    template.has_resource_properties('AWS::RDS::DBInstance', {
+        'DBInstanceClass': 'db.m6i.large'
+    })
+
+
+def test_graviton_functions_and_database(app):
+    template = assertions.Template.from_stack(EnergyEfficiencyStack(app, 'ee', graviton=True, async_writes=True))
+
+    functions = template.find_resources('AWS::Lambda::Function', {
+        'Properties': {'Handler': assertions.Match.string_like_regexp('lambda-handler')}
+    })
+    assert functions
+    assert all(function['Properties']['Architectures'] == ['arm64'] for function in functions.values())
+
+    template.has_resource_properties('AWS::Lambda::LayerVersion', {
+        'CompatibleArchitectures': ['arm64']
+    })
+    template.has_resource_properties('AWS::RDS::DBInstance', {
+        'DBInstanceClass': 'db.m6g.large'
+    })
+
+
+def test_layer_architectures_default_to_the_bundled_one(app):
+    stack = cdk.Stack(app, 'layer')
+    create_lambda_layer(
+        instance_class=stack,
+        service_prefix=PREFIX,
+        layer_config=LambdaLayerConfig(
+            id='lambda-runtime',
+            name='LambdaRuntime',
+            description='Shared runtime',
+            code_folder_path='lib/lambda_runtime'
+        )
+    )
+
+    assertions.Template.from_stack(stack).has_resource_properties('AWS::Lambda::LayerVersion', {
+        'CompatibleArchitectures': ['x86_64']
+    })
+
+
+def test_graviton_instances_boot_arm64_images(app, bastion_key):
+    template = assertions.Template.from_stack(SmartTrafficStack(app, 'st', graviton=True))
+
+    instances = template.find_resources('AWS::EC2::Instance')
+    assert len(instances) == 4
+    assert all(instance['Properties']['InstanceType'] == 't4g.micro' for instance in instances.values())
+
+    assert 'al2023-ami-kernel-6.1-arm64' in _image_parameters(template)
+    assert 'al2023-ami-kernel-6.1-x86_64' not in _image_parameters(template)
+
+
+def test_graviton_autoscaling_and_image_pipeline(app):
+    stack = DataAnalyticsStack(app, 'da', graviton=True, ec2_autoscaling=True, image_pipeline=True)
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::EC2::LaunchTemplate', {
+        'LaunchTemplateData': assertions.Match.object_like({
+            'InstanceType': 't4g.micro'
+        })
+    })
+    # The image is built on an instance of the architecture of its parent
+    template.has_resource_properties('AWS::ImageBuilder::InfrastructureConfiguration', {
+        'InstanceTypes': ['t4g.medium']
+    })
+    assert 'al2023-ami-kernel-6.1-x86_64' not in _image_parameters(template)
+
+
+def test_catalog_offerings():
+    assert is_offered('eu-north-1', 'ec2', 't4g.micro') is True
+    assert is_offered('eu-north-1', 'ec2', 'i4i.large') is False
+    assert is_offered('eu-north-1', 'rds', 'm6g.large') is True
+    assert is_offered('eu-north-1', 'rds', 'd3en.large') is False
+    assert is_offered('ap-south-2', 'ec2', 'i4i.large') is None
+
+
+def test_instance_type_missing_in_region_fails_the_synth(app):
+    stack, vpc = _vpc_stack(app, env=cdk.Environment(region='eu-north-1'))
+
+    with pytest.raises(ValueError, match='i4i.large is not offered in eu-north-1'):
+        create_ec2(
+            instance_class=stack,
+            service_prefix=PREFIX,
+            ec2_config=Ec2Config(
+                id='ec2',
+                vpc=vpc,
+                vpc_subnet_id='public-subnet',
+                instance_class=ec2.InstanceClass.I4I,
+                instance_size=ec2.InstanceSize.LARGE
+            )
+        )
+
+
+def test_db_instance_class_missing_in_region_fails_the_synth(app):
+    stack, vpc = _vpc_stack(app, env=cdk.Environment(region='eu-north-1'))
+
+    with pytest.raises(ValueError, match='db.d3en.large is not offered in eu-north-1'):
+        create_rds_mysql(
+            instance_class=stack,
+            service_prefix=PREFIX,
+            db_config=DbConfig(
+                vpc=vpc,
+                vpc_subnet_id='public-subnet',
+                instance_class=ec2.InstanceClass.D3EN,
+                instance_size=ec2.InstanceSize.LARGE
+            )
+        )
+
+
+@pytest.mark.parametrize('env', [None, cdk.Environment(region='ap-south-2')])
+def test_unknown_regions_are_not_checked(app, env):
+    stack, vpc = _vpc_stack(app, env=env)
+
+    create_ec2(
+        instance_class=stack,
+        service_prefix=PREFIX,
+        ec2_config=Ec2Config(
+            id='ec2',
+            vpc=vpc,
+            vpc_subnet_id='public-subnet',
+            instance_class=ec2.InstanceClass.I4I,
+            instance_size=ec2.InstanceSize.LARGE
+        )
+    )
@@ -0,0 +1,66 @@
+import pytest
+from aws_cdk import assertions
+
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+
+
+def _stacks(app, stack_class: str, **kwargs):
+    if stack_class == 'energy_efficiency':
+        stack = EnergyEfficiencyStack(app, 'ee', **kwargs)
+        prefix = 'ee-'
+    else:
+        from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+        stack = SmartTrafficStack(app, 'st', **kwargs)
+        prefix = 'st-'
+
+    return stack, stack.node.find_child(prefix + 'api-gateway')
+
+
+@pytest.mark.parametrize('stack_class, endpoint, methods', [
+    ('energy_efficiency', 'energy-efficiency', ['GET', 'POST']),
+    ('smart_traffic', 'smart-traffic-api', ['GET'])
+])
+def test_http_api(app, bastion_key, stack_class, endpoint, methods):
+    _, api_stack = _stacks(app, stack_class, http_api=True)
+    template = assertions.Template.from_stack(api_stack)
+
+    template.resource_count_is('AWS::ApiGateway::RestApi', 0)
+    template.has_resource_properties('AWS::ApiGatewayV2::Api', {
+        'ProtocolType': 'HTTP',
+        'CorsConfiguration': {
+            'AllowOrigins': ['*'],
+            'AllowMethods': methods,
+            'AllowHeaders': ['Content-Type']
+        }
+    })
+
+    routes = template.find_resources('AWS::ApiGatewayV2::Route')
+    assert sorted(route['Properties']['RouteKey'] for route in routes.values()) == [f'{method} /{endpoint}' for method in methods]
+
+    integrations = template.find_resources('AWS::ApiGatewayV2::Integration')
+    assert len(integrations) == len(methods)
+    for integration in integrations.values():
+        assert integration['Properties']['IntegrationType'] == 'AWS_PROXY'
+        assert integration['Properties']['PayloadFormatVersion'] == '2.0'
+
+    template.has_resource_properties('AWS::ApiGatewayV2::Stage', {
+        'StageName': '$default',
+        'AutoDeploy': True
+    })
+
+
+@pytest.mark.parametrize('stack_class', ['energy_efficiency', 'smart_traffic'])
+def test_rest_api_by_default(app, bastion_key, stack_class):
+    _, api_stack = _stacks(app, stack_class)
+    template = assertions.Template.from_stack(api_stack)
+
+    template.resource_count_is('AWS::ApiGateway::RestApi', 1)
+    template.resource_count_is('AWS::ApiGatewayV2::Api', 0)
+
+
+def test_url_output(app, bastion_key):
+    _, api_stack = _stacks(app, 'smart_traffic', http_api=True)
+    template = assertions.Template.from_stack(api_stack)
+
+    url = template.find_outputs('stapigwurl')['stapigwurl']['Value']
+    assert url['Fn::Join'][1][-1].endswith('/smart-traffic-api')
@@ -0,0 +1,88 @@
+import json
+
+import aws_cdk as cdk
+import pytest
+from aws_cdk import assertions
+
+from stacks.data_analytics.data_analytics_stack import DataAnalyticsStack
+from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+
+
+EU = cdk.Environment(region='eu-north-1')
+
+
+def _app(context: dict = None):
+    return cdk.App(context={'aws:cdk:bundling-stacks': [], **(context or {})})
+
+
+def _user_data(template, resource_type: str, logical_id_part: str) -> str:
+    resources = template.find_resources(resource_type)
+
+    return next(str(resource['Properties']) for logical_id, resource in resources.items() if logical_id_part in logical_id)
+
+
+def test_pipeline_per_role(bastion_key):
+    template = assertions.Template.from_stack(SmartTrafficStack(_app(), 'st', image_pipelines=True))
+
+    template.resource_count_is('AWS::ImageBuilder::ImagePipeline', 3)
+    template.resource_count_is('AWS::ImageBuilder::ImageRecipe', 3)
+    template.has_resource_properties('AWS::ImageBuilder::InfrastructureConfiguration', {
+        'TerminateInstanceOnFailure': True,
+        'SubnetId': assertions.Match.any_value()
+    })
+
+    # The slow steps of the boot run in the build phase of the component
+    components = template.find_resources('AWS::ImageBuilder::Component')
+    documents = {
+        logical_id: json.loads(component['Properties']['Data'])
+        for logical_id, component in components.items()
+    }
+    wr_document = next(document for logical_id, document in documents.items() if 'ec2wrimage' in logical_id)
+    commands = wr_document['phases'][0]['steps'][0]['inputs']['commands']
+
+    assert commands[:2] == ['GH_TOKEN_ID=st-gh-token', 'REPO_NAME=fc-st-ec2-wr']
+    assert 'make install-dep' in commands[2]
+    assert 'yum update' in commands[2]
+
+
+def test_baked_image_boot_only_injects_configuration(bastion_key):
+    stack = SmartTrafficStack(_app({'st-ec2-wr-ami': 'ami-0123456789abcdef0'}), 'st', env=EU)
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::EC2::Instance', {
+        'ImageId': 'ami-0123456789abcdef0'
+    })
+
+    user_data = _user_data(template, 'AWS::EC2::Instance', 'stec2wr')
+    assert 'REPO_NAME=fc-st-ec2-wr' in user_data
+    assert 'DB_SECRET_ARN=' in user_data
+    assert 'yum' not in user_data
+    assert 'git clone' not in user_data
+
+    # The roles without a baked image keep the full initialization
+    assert 'git clone' in _user_data(template, 'AWS::EC2::Instance', 'stec2aiengine')
+
+
+def test_baked_image_in_launch_template(bastion_key):
+    app = _app({'st-ec2-ai-engine-ami': {'eu-north-1': 'ami-0fedcba9876543210'}})
+    template = assertions.Template.from_stack(SmartTrafficStack(app, 'st', ec2_autoscaling=True))
+
+    launch_template = _user_data(template, 'AWS::EC2::LaunchTemplate', 'stasgaiengine')
+    assert 'git clone' not in launch_template
+    assert template.to_json()['Mappings']
+
+
+def test_ami_id_needs_region():
+    with pytest.raises(Exception, match='must map the regions'):
+        DataAnalyticsStack(_app({'da-ec2-ami': 'ami-0123456789abcdef0'}), 'da')
+
+
+def test_data_analytics_pipeline_and_baked_image():
+    stack = DataAnalyticsStack(_app({'da-ec2-ami': 'ami-0123456789abcdef0'}), 'da', image_pipeline=True, env=EU)
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is('AWS::ImageBuilder::ImagePipeline', 1)
+    template.has_resource_properties('AWS::EC2::Instance', {
+        'ImageId': 'ami-0123456789abcdef0'
+    })
+    assert 'REPO_NAME=da-ec2' in _user_data(template, 'AWS::EC2::Instance', 'daec2')
@@ -0,0 +1,93 @@
+import pytest
+
+from tests.unit.mysql_stub import load_handler
+
+
+@pytest.fixture
+def lambda_write(runtime, server):
+    # UNIQUE lets a test make one chunk fail with a duplicate key
+    server.query('DROP TABLE energy_efficiency')
+    server.query('CREATE TABLE energy_efficiency (id INT PRIMARY KEY AUTO_INCREMENT, name VARCHAR(255) UNIQUE)')
+
+    return load_handler('stacks/energy_efficiency/lambda_write/lambda-handler.py', 'ee_lambda_write')
+
+
+def _names(server):
+    return [row[0] for row in server.query('SELECT name FROM energy_efficiency ORDER BY id')]
+
+
+def test_single_record_keeps_original_contract(server, lambda_write):
+    response = lambda_write.handler({'name': 'a'}, None)
+
+    assert response['statusCode'] == 200
+    assert response['body'] == 'Successfully inserted data'
+    assert _names(server) == ['a']
+
+
+def test_batch_inserted_in_chunks(server, lambda_write):
+    records = [{'name': f'r{i}'} for i in range(10)]
+
+    response = lambda_write.handler({'records': records, 'chunk_size': 4}, None)
+
+    assert response['statusCode'] == 200
+    assert response['body']['inserted'] == 10
+    assert [chunk['size'] for chunk in response['body']['chunks']] == [4, 4, 2]
+    assert _names(server) == [f'r{i}' for i in range(10)]
+
+    # One multi-row statement per chunk and a single connection for the whole batch
+    assert [method for method, _ in server.statements].count('executemany') == 3
+    assert server.connections_opened == 1
+
+
+def test_list_event_uses_default_chunk_size(server, lambda_write):
+    response = lambda_write.handler([{'name': 'a'}, {'name': 'b'}], None)
+
+    assert response['statusCode'] == 200
+    assert len(response['body']['chunks']) == 1
+
+
+def test_failed_chunk_rolled_back_others_kept(server, lambda_write):
+    server.query("INSERT INTO energy_efficiency (name) VALUES ('dup')")
+    records = [{'name': 'a'}, {'name': 'b'}, {'name': 'c'}, {'name': 'dup'}, {'name': 'e'}]
+
+    response = lambda_write.handler({'records': records, 'chunk_size': 2}, None)
+    body = response['body']
+
+    assert response['statusCode'] == 207
+    assert body['inserted'] == 3
+    assert body['failed'] == 2
+    assert body['chunks'][1]['status'] == 'failed'
+    assert body['chunks'][1]['indexes'] == [2, 3]
+    # 'c' was in the failed chunk with 'dup'
+    assert _names(server) == ['dup', 'a', 'b', 'e']
+
+
+def test_invalid_records_rejected_with_index(server, lambda_write):
+    records = [{'name': 'a'}, {'value': 1}, {'name': 'x' * 300}, {'name': 'd'}]
+
+    response = lambda_write.handler({'records': records}, None)
+    body = response['body']
+
+    assert response['statusCode'] == 207
+    assert [r['index'] for r in body['rejected']] == [1, 2]
+    assert body['inserted'] == 2
+    assert _names(server) == ['a', 'd']
+
+
+def test_all_chunks_failing(server, lambda_write):
+    server.query('DROP TABLE energy_efficiency')
+
+    response = lambda_write.handler({'records': [{'name': 'a'}]}, None)
+
+    assert response['statusCode'] == 500
+    assert response['body']['failed'] == 1
+
+
+@pytest.mark.parametrize('event', [
+    {'records': []},
+    {'records': 'a'},
+    {'records': [{'name': 'a'}], 'chunk_size': 0},
+    {'records': [{'name': 'a'}], 'chunk_size': 'big'}
+])
+def test_invalid_batch_requests(lambda_write, event):
+    assert lambda_write.handler(event, None)['statusCode'] == 400
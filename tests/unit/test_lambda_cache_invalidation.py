@@ -0,0 +1,90 @@
+import pytest
+
+from futura_runtime import cache
+
+from tests.unit.aws_stub import FakeApiGateway
+from tests.unit.mysql_stub import load_handler
+
+
+FLUSH = ('EeLambdaCacheFlush', 'Event', {})
+
+
+@pytest.fixture
+def lambda_write(monkeypatch, runtime):
+    monkeypatch.setattr(cache, 'CACHE_FLUSH_FUNCTION', 'EeLambdaCacheFlush')
+
+    return load_handler('stacks/energy_efficiency/lambda_write/lambda-handler.py', 'ee_lambda_write')
+
+
+def test_write_requests_flush(lambda_client, lambda_write):
+    assert lambda_write.handler({'name': 'a'}, None)['statusCode'] == 200
+
+    assert lambda_client.invocations == [FLUSH]
+
+
+def test_batch_write_requests_flush(lambda_client, lambda_write):
+    assert lambda_write.handler([{'name': 'a'}, {'name': 'b'}], None)['statusCode'] == 200
+
+    assert lambda_client.invocations == [FLUSH]
+
+
+def test_failed_write_does_not_flush(lambda_client, lambda_write):
+    assert lambda_write.handler({'name': 1}, None)['statusCode'] == 400
+    assert lambda_write.handler([{'name': 1}], None)['statusCode'] == 207
+
+    assert lambda_client.invocations == []
+
+
+def test_flush_at_most_once_per_interval(lambda_client, clock, lambda_write):
+    for name in ('a', 'b', 'c'):
+        lambda_write.handler({'name': name}, None)
+
+    clock[0] += cache.CACHE_FLUSH_MIN_INTERVAL_SECONDS
+    lambda_write.handler({'name': 'd'}, None)
+
+    assert lambda_client.invocations == [FLUSH, FLUSH]
+
+
+def test_flush_failure_does_not_fail_write(server, lambda_client, lambda_write):
+    lambda_client.fail = True
+
+    assert lambda_write.handler({'name': 'a'}, None)['statusCode'] == 200
+    assert server.query('SELECT name FROM energy_efficiency') == [('a',)]
+
+
+def test_failed_flush_waits_for_interval(lambda_client, clock, lambda_write):
+    lambda_client.fail = True
+    lambda_write.handler({'name': 'a'}, None)
+
+    # The failed attempt counts: the next writes of the interval do not wait for another timeout
+    lambda_client.fail = False
+    lambda_write.handler({'name': 'b'}, None)
+    assert lambda_client.invocations == []
+
+    clock[0] += cache.CACHE_FLUSH_MIN_INTERVAL_SECONDS
+    lambda_write.handler({'name': 'c'}, None)
+    assert lambda_client.invocations == [FLUSH]
+
+
+def test_no_invalidation_without_flush_function(monkeypatch, lambda_client, lambda_write):
+    monkeypatch.setattr(cache, 'CACHE_FLUSH_FUNCTION', None)
+
+    lambda_write.handler({'name': 'a'}, None)
+
+    assert lambda_client.invocations == []
+
+
+def test_lambda_client_fails_fast():
+    assert cache.LAMBDA_CLIENT_CONFIG['connect_timeout'] <= 1
+    assert cache.LAMBDA_CLIENT_CONFIG['retries']['max_attempts'] == 1
+
+
+def test_flush_function_flushes_stage(monkeypatch):
+    lambda_cache_flush = load_handler('stacks/api_gateway/lambda_cache_flush/lambda-handler.py', 'lambda_cache_flush')
+    apigateway = FakeApiGateway()
+    monkeypatch.setattr(lambda_cache_flush, '_apigateway_client', apigateway)
+    monkeypatch.setattr(lambda_cache_flush, 'CACHE_REST_API_ID', 'api-ee')
+
+    assert lambda_cache_flush.handler({}, None) == {'flushed': True}
+
+    assert apigateway.flushed == [('api-ee', 'prod')]
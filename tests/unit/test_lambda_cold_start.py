@@ -0,0 +1,69 @@
+import os
+import subprocess
+
+import pytest
+
+from lib.bundling import RUNTIME_PROVIDED_PACKAGES, slim_bundle_commands
+from tests.benchmark.import_time import benchmark, find_handlers, load_budget, parse_importtime
+
+
+def test_every_handler_found():
+    handlers = find_handlers()
+
+    assert 'stacks/smart_traffic/lambda_read/lambda-handler.py' in handlers
+    assert 'stacks/api_gateway/lambda_cache_flush/lambda-handler.py' in handlers
+    assert len(handlers) == 7
+
+
+@pytest.mark.parametrize('handler', find_handlers())
+def test_handler_import_within_budget(handler):
+    result = benchmark([handler], samples=3)[handler]
+
+    # boto3 is imported with the first AWS client, not at init
+    assert result['forbidden'] == []
+    assert result['import_ms'] <= result['budget_ms']
+
+
+def test_parse_importtime_sums_top_level_imports():
+    stderr = '\n'.join([
+        'import time: self [us] | cumulative | imported package',
+        'import time:       100 |        100 | site',
+        'import-handler',
+        'import time:        50 |         50 |   pymysql.err',
+        'import time:       200 |        250 | pymysql',
+        'import time:        30 |         30 | futura_runtime'
+    ])
+
+    result = parse_importtime(stderr)
+
+    assert result['total_us'] == 280
+    assert 'site' not in result['modules']
+
+
+def test_functions_do_not_bundle_boto3():
+    for handler in find_handlers():
+        path = os.path.join(os.path.dirname(handler), 'requirements.txt')
+
+        # The functions without requirements bundle their sources only
+        if not os.path.exists(path):
+            continue
+
+        with open(path) as f:
+            requirements = f.read()
+
+        assert not any(package in requirements for package in load_budget()['forbidden_modules'])
+
+
+def test_bundle_hooks_strip_and_compile(tmp_path):
+    for package in RUNTIME_PROVIDED_PACKAGES:
+        (tmp_path / package).mkdir()
+        (tmp_path / f'{package}-1.0.dist-info').mkdir()
+    (tmp_path / 'pymysql').mkdir()
+    (tmp_path / 'pymysql' / '__init__.py').write_text('VERSION = 1\n')
+
+    for command in slim_bundle_commands(str(tmp_path)):
+        subprocess.run(command, shell=True, check=True)
+
+    assert sorted(os.listdir(tmp_path)) == ['pymysql']
+    assert os.listdir(tmp_path / 'pymysql' / '__pycache__')
+
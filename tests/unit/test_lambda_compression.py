@@ -0,0 +1,92 @@
+import base64
+import gzip
+import json
+
+import brotli
+import pytest
+
+from futura_runtime import responses
+
+from tests.unit.mysql_stub import load_handler
+
+
+def _proxy_event(accept_encoding: str = None) -> dict:
+    headers = {'accept-encoding': accept_encoding} if accept_encoding is not None else {}
+
+    return {
+        'resource': '/energy-efficiency',
+        'httpMethod': 'GET',
+        'headers': headers,
+        'requestContext': {'stage': 'prod'}
+    }
+
+
+@pytest.fixture
+def lambda_read(runtime, server):
+    for i in range(1, 101):
+        server.query('INSERT INTO energy_efficiency (name) VALUES (%s)', (f'row-{i}',))
+
+    return load_handler('stacks/energy_efficiency/lambda_read/lambda-handler.py', 'ee_lambda_read')
+
+
+@pytest.mark.parametrize('accept_encoding, coding, decompress', [
+    ('gzip, deflate, br', 'br', brotli.decompress),
+    ('gzip', 'gzip', gzip.decompress),
+    ('br;q=0, gzip;q=0.8', 'gzip', gzip.decompress)
+])
+def test_large_response_compressed(lambda_read, accept_encoding, coding, decompress):
+    response = lambda_read.handler(_proxy_event(accept_encoding), None)
+
+    assert response['isBase64Encoded'] is True
+    assert response['headers']['Content-Encoding'] == coding
+    assert response['headers']['Vary'] == 'Accept-Encoding'
+
+    body = json.loads(decompress(base64.b64decode(response['body'])))
+    assert len(body['items']) == 100
+
+
+def test_not_compressed_without_accept_encoding(lambda_read):
+    response = lambda_read.handler(_proxy_event(), None)
+
+    assert response['isBase64Encoded'] is False
+    assert 'Content-Encoding' not in response['headers']
+    assert len(json.loads(response['body'])['items']) == 100
+
+
+def test_small_response_not_compressed(lambda_read):
+    response = lambda_read.handler(dict(_proxy_event('gzip'), queryStringParameters={'limit': '1'}), None)
+
+    assert response['isBase64Encoded'] is False
+    assert json.loads(response['body'])['items'] == [{'id': 1, 'name': 'row-1'}]
+
+
+def test_non_proxy_response_left_to_api_gateway(lambda_read):
+    response = lambda_read.handler({}, None)
+
+    assert response['isBase64Encoded'] is False
+    assert isinstance(response['body'], dict)
+
+
+def test_brotli_not_installed(monkeypatch):
+    monkeypatch.setattr(responses, 'brotli', None)
+
+    assert responses.choose_encoding('br, gzip') == 'gzip'
+    assert responses.choose_encoding('br') is None
+
+
+@pytest.mark.parametrize('accept_encoding, coding', [
+    (None, None),
+    ('identity', None),
+    ('*', 'br'),
+    ('*;q=0', None),
+    ('GZIP', 'gzip'),
+    ('br;q=invalid, gzip', 'gzip')
+])
+def test_choose_encoding(accept_encoding, coding):
+    assert responses.choose_encoding(accept_encoding) == coding
+
+
+def test_json_fallback_without_orjson(monkeypatch):
+    monkeypatch.setattr(responses, 'orjson', None)
+
+    assert responses.dumps({'items': [{'id': 1, 'name': 'é'}]}) == '{"items":[{"id":1,"name":"é"}]}'.encode()
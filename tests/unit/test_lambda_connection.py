@@ -0,0 +1,104 @@
+import pytest
+
+from tests.unit.mysql_stub import load_handler
+
+
+@pytest.fixture
+def lambda_read(runtime):
+    return load_handler('stacks/energy_efficiency/lambda_read/lambda-handler.py', 'ee_lambda_read')
+
+
+@pytest.fixture
+def lambda_write(runtime):
+    return load_handler('stacks/energy_efficiency/lambda_write/lambda-handler.py', 'ee_lambda_write')
+
+
+def test_connection_reused_across_invocations(server, lambda_write, lambda_read):
+    for name in ('a', 'b', 'c'):
+        assert lambda_write.handler({'name': name}, None)['statusCode'] == 200
+
+    response = lambda_read.handler({}, None)
+    response = lambda_read.handler({}, None)
+
+    assert response['statusCode'] == 200
+    assert [row['name'] for row in response['body']['items']] == ['a', 'b', 'c']
+    # One connection per container, shared by the handlers
+    assert server.connections_opened == 1
+    assert server.connect_kwargs['autocommit'] is True
+
+
+def test_ping_only_after_ping_interval(server, runtime, clock, lambda_read):
+    lambda_read.handler({}, None)
+    clock[0] += 1
+    lambda_read.handler({}, None)
+    assert server.pings == 0
+
+    clock[0] += runtime.DB_PING_AFTER_SECONDS + 1
+    lambda_read.handler({}, None)
+    assert server.pings == 1
+    assert server.connections_opened == 1
+
+
+def test_reconnect_after_max_idle(server, runtime, clock, lambda_read):
+    lambda_read.handler({}, None)
+    first = runtime._connection
+
+    clock[0] += runtime.DB_MAX_IDLE_SECONDS + 1
+    lambda_read.handler({}, None)
+
+    assert first.closed
+    assert runtime._connection is not first
+    assert server.connections_opened == 2
+
+
+def test_failed_ping_reconnects(server, runtime, clock, lambda_read):
+    lambda_read.handler({}, None)
+    server.drop_connections()
+
+    clock[0] += runtime.DB_PING_AFTER_SECONDS + 1
+    response = lambda_read.handler({}, None)
+
+    assert response['statusCode'] == 200
+    assert server.connections_opened == 2
+
+
+def test_read_retried_on_dropped_connection(server, lambda_read, lambda_write):
+    lambda_write.handler({'name': 'a'}, None)
+
+    # Dropped between two invocations, before the ping interval elapsed
+    server.drop_connections()
+    response = lambda_read.handler({}, None)
+
+    assert response['statusCode'] == 200
+    assert [row['name'] for row in response['body']['items']] == ['a']
+    assert server.connections_opened == 2
+
+
+def test_write_not_retried_on_dropped_connection(server, lambda_write):
+    lambda_write.handler({'name': 'a'}, None)
+
+    # The insert may have been committed before the connection dropped, running it again could duplicate it
+    server.drop_connections()
+    assert lambda_write.handler({'name': 'b'}, None)['statusCode'] == 500
+    assert server.query('SELECT name FROM energy_efficiency') == [('a',)]
+
+    # The client retries on a new connection
+    assert lambda_write.handler({'name': 'b'}, None)['statusCode'] == 200
+    assert server.query('SELECT name FROM energy_efficiency ORDER BY id') == [('a',), ('b',)]
+    assert server.connections_opened == 2
+
+
+def test_statement_errors_are_not_retried(server, lambda_read):
+    server.query('DROP TABLE energy_efficiency')
+
+    response = lambda_read.handler({}, None)
+
+    assert response['statusCode'] == 500
+    assert server.connections_opened == 1
+
+
+def test_db_host_overrides_secret_host(server, runtime, monkeypatch, lambda_read):
+    monkeypatch.setattr(runtime, 'DB_HOST', 'proxy.proxy-abc.eu-north-1.rds.amazonaws.com')
+
+    assert lambda_read.handler({}, None)['statusCode'] == 200
+    assert server.connect_kwargs['host'] == 'proxy.proxy-abc.eu-north-1.rds.amazonaws.com'
@@ -0,0 +1,134 @@
+import csv
+import io
+import json
+
+import pytest
+from botocore.exceptions import ClientError
+
+from futura_runtime import db, exports
+
+from tests.unit.mysql_stub import load_handler
+
+
+ROWS = 2500
+
+
+@pytest.fixture
+def lambda_read(monkeypatch, runtime, server):
+    server.db.executemany('INSERT INTO smart_traffic (name) VALUES (?)', [(f'sensor-{i}',) for i in range(ROWS)])
+
+    monkeypatch.setattr(exports, 'EXPORT_BATCH_SIZE', 100)
+    monkeypatch.setattr(exports, 'EXPORT_PART_SIZE', 4096)
+
+    return load_handler('stacks/smart_traffic/lambda_read/lambda-handler.py', 'st_lambda_read_export')
+
+
+def _export(lambda_client, lambda_read, request: dict) -> dict:
+    """
+    Answer the request, then run the export of the asynchronous invocation it queued
+    """
+
+    response = lambda_read.handler(request, None)
+    assert response['statusCode'] == 202
+
+    (function_name, invocation_type, job), = lambda_client.invocations
+    assert (function_name, invocation_type) == ('StLambdaRead', 'Event')
+
+    result = lambda_read.handler(job, None)
+    assert result['statusCode'] == 200
+    assert result['body']['export']['key'] == response['body']['export']['key']
+
+    return result['body']
+
+
+def _object(s3, body):
+    return s3.objects[(body['export']['bucket'], body['export']['key'])].decode()
+
+
+def test_export_answered_before_it_runs(s3, lambda_client, lambda_read):
+    response = lambda_read.handler({'export': 'ndjson'}, None)
+    export = response['body']['export']
+
+    assert response['statusCode'] == 202
+    assert export['key'].startswith('exports/smart_traffic/')
+    assert export['url'] == f'https://exports-bucket.s3.amazonaws.com/{export["key"]}?X-Amz-Expires=3600'
+    # Nothing is read nor uploaded within the request
+    assert s3.uploads == {} and s3.objects == {}
+    assert lambda_client.invocations == [
+        ('StLambdaRead', 'Event', {'export_job': {'fields': ['id', 'name'], 'format': 'ndjson', 'key': export['key']}})
+    ]
+
+
+def test_export_ndjson(s3, lambda_client, lambda_read):
+    body = _export(lambda_client, lambda_read, {'export': 'ndjson'})
+
+    assert body['export']['rows'] == ROWS
+
+    lines = _object(s3, body).splitlines()
+    assert len(lines) == ROWS
+    assert json.loads(lines[0]) == {'id': 1, 'name': 'sensor-0'}
+
+
+def test_export_csv_with_fields(s3, lambda_client, lambda_read):
+    body = _export(lambda_client, lambda_read, {'export': 'csv', 'fields': 'id'})
+
+    rows = list(csv.reader(io.StringIO(_object(s3, body))))
+    assert rows[0] == ['id']
+    assert rows[-1] == [str(ROWS)]
+    assert len(rows) == ROWS + 1
+
+
+def test_export_uploaded_in_bounded_parts(monkeypatch, s3, lambda_client, lambda_read):
+    part_sizes = []
+    upload_part = s3.upload_part
+
+    def record_part(**kwargs):
+        part_sizes.append(len(kwargs['Body']))
+        return upload_part(**kwargs)
+
+    monkeypatch.setattr(s3, 'upload_part', record_part)
+
+    _export(lambda_client, lambda_read, {'export': 'ndjson'})
+
+    # Memory holds at most one part plus one batch of rows, whatever the table size
+    assert len(part_sizes) > 1
+    assert max(part_sizes) < exports.EXPORT_PART_SIZE + 100 * 64
+
+
+def test_empty_table_export(s3, server, lambda_client, lambda_read):
+    server.query('DELETE FROM smart_traffic')
+
+    body = _export(lambda_client, lambda_read, {'export': 'ndjson'})
+
+    assert body['export']['rows'] == 0
+    assert _object(s3, body) == ''
+
+
+def test_failed_upload_aborted(s3, lambda_client, lambda_read):
+    s3.fail_on_part = 2
+
+    lambda_read.handler({'export': 'ndjson'}, None)
+    (_, _, job), = lambda_client.invocations
+
+    # Raised for Lambda to retry the asynchronous invocation
+    with pytest.raises(ClientError):
+        lambda_read.handler(job, None)
+
+    assert len(s3.aborted) == 1
+    assert s3.uploads == {}
+    # The half-read unbuffered result is not left on the cached connection
+    assert db._connection is None
+
+
+def test_export_not_started(s3, lambda_client, lambda_read):
+    lambda_client.fail = True
+
+    response = lambda_read.handler({'export': 'ndjson'}, None)
+
+    assert response['statusCode'] == 500
+    assert s3.uploads == {}
+
+
+def test_unknown_export_format(lambda_client, lambda_read):
+    assert lambda_read.handler({'export': 'xml'}, None)['statusCode'] == 400
+    assert lambda_client.invocations == []
@@ -0,0 +1,84 @@
+import pytest
+
+from futura_runtime import reads
+
+from tests.unit.mysql_stub import load_handler
+
+
+@pytest.fixture(params=['energy_efficiency', 'smart_traffic'])
+def lambda_read(request, runtime, server):
+    table = request.param
+
+    for i in range(1, 26):
+        server.query(f'INSERT INTO {table} (name) VALUES (%s)', (f'row-{i}',))
+
+    return load_handler(f'stacks/{table}/lambda_read/lambda-handler.py', f'{table}_lambda_read')
+
+
+def test_default_page(lambda_read):
+    body = lambda_read.handler({}, None)['body']
+
+    assert len(body['items']) == min(25, reads.DEFAULT_PAGE_SIZE)
+    assert body['items'][0] == {'id': 1, 'name': 'row-1'}
+
+
+def test_walk_all_pages_with_cursor(lambda_read):
+    seen = []
+    cursor = None
+
+    while True:
+        body = lambda_read.handler({'limit': '10', 'after_id': cursor}, None)['body']
+        seen.extend(row['id'] for row in body['items'])
+        cursor = body['next_cursor']
+
+        if cursor is None:
+            break
+
+    assert seen == list(range(1, 26))
+
+
+def test_next_cursor_is_last_id_of_page(lambda_read):
+    body = lambda_read.handler({'limit': 10, 'after_id': 10}, None)['body']
+
+    assert [row['id'] for row in body['items']] == list(range(11, 21))
+    assert body['next_cursor'] == 20
+
+
+def test_last_full_page_has_no_cursor(lambda_read):
+    body = lambda_read.handler({'limit': 5, 'after_id': 20}, None)['body']
+
+    assert len(body['items']) == 5
+    assert body['next_cursor'] is None
+
+
+def test_empty_template_values_use_defaults(lambda_read):
+    # The non-proxy mapping template sends empty strings for missing query string parameters
+    body = lambda_read.handler({'limit': '', 'after_id': '', 'fields': ''}, None)['body']
+
+    assert body['items'][0] == {'id': 1, 'name': 'row-1'}
+
+
+def test_field_projection_keeps_id(lambda_read):
+    body = lambda_read.handler({'limit': 2, 'fields': 'id'}, None)['body']
+
+    assert body['items'] == [{'id': 1}, {'id': 2}]
+
+
+@pytest.mark.parametrize('event', [
+    {'limit': 'ten'},
+    {'limit': 0},
+    {'limit': 100000},
+    {'after_id': -1},
+    {'fields': 'name,password'},
+    {'fields': 'id; DROP TABLE energy_efficiency'}
+])
+def test_invalid_requests(lambda_read, event):
+    assert lambda_read.handler(event, None)['statusCode'] == 400
+
+
+def test_negative_cursor_message(lambda_read):
+    assert lambda_read.handler({'after_id': -1}, None)['body'] == '"after_id" must be non-negative'
+
+
+def test_zero_cursor_is_first_page(lambda_read):
+    assert lambda_read.handler({'after_id': 0}, None)['statusCode'] == 200
@@ -0,0 +1,161 @@
+import base64
+import json
+
+import pytest
+
+from tests.unit.mysql_stub import load_handler
+
+
+def _proxy_event(method: str, query: dict = None, body: str = None, base64_encoded: bool = False) -> dict:
+    return {
+        'resource': '/energy-efficiency',
+        'path': '/energy-efficiency',
+        'httpMethod': method,
+        'headers': {'Content-Type': 'application/json'},
+        'queryStringParameters': query,
+        'body': body,
+        'isBase64Encoded': base64_encoded,
+        'requestContext': {'stage': 'prod', 'httpMethod': method}
+    }
+
+
+@pytest.fixture
+def lambda_read(runtime, server):
+    for i in range(1, 26):
+        server.query('INSERT INTO energy_efficiency (name) VALUES (%s)', (f'row-{i}',))
+
+    return load_handler('stacks/energy_efficiency/lambda_read/lambda-handler.py', 'ee_lambda_read')
+
+
+@pytest.fixture
+def lambda_write(runtime):
+    return load_handler('stacks/energy_efficiency/lambda_write/lambda-handler.py', 'ee_lambda_write')
+
+
+@pytest.fixture
+def lambda_init(runtime):
+    return load_handler('stacks/energy_efficiency/lambda_init/lambda-handler.py', 'ee_lambda_init')
+
+
+def test_query_string_pagination(lambda_read):
+    response = lambda_read.handler(_proxy_event('GET', {'limit': '10', 'fields': 'name'}), None)
+
+    assert response['statusCode'] == 200
+    assert response['headers']['Content-Type'] == 'application/json'
+
+    body = json.loads(response['body'])
+    assert body['items'][0] == {'id': 1, 'name': 'row-1'}
+    assert body['next_cursor'] == 10
+
+    body = json.loads(lambda_read.handler(_proxy_event('GET', {'after_id': '20'}), None)['body'])
+    assert [row['id'] for row in body['items']] == [21, 22, 23, 24, 25]
+    assert body['next_cursor'] is None
+
+
+def test_no_query_string(lambda_read):
+    response = lambda_read.handler(_proxy_event('GET'), None)
+
+    assert response['statusCode'] == 200
+    assert len(json.loads(response['body'])['items']) == 25
+
+
+def test_bad_request_status_code(lambda_read):
+    response = lambda_read.handler(_proxy_event('GET', {'limit': 'abc'}), None)
+
+    assert response['statusCode'] == 400
+    assert isinstance(json.loads(response['body']), str)
+
+
+def test_error_status_code(server, lambda_read):
+    server.query('DROP TABLE energy_efficiency')
+
+    response = lambda_read.handler(_proxy_event('GET'), None)
+
+    # The non-proxy integration answers 200 with statusCode 500 in the body, the proxy one answers 500
+    assert response['statusCode'] == 500
+    assert 'no such table' in json.loads(response['body'])
+
+
+def test_json_body_single_write(server, lambda_write):
+    response = lambda_write.handler(_proxy_event('POST', body=json.dumps({'name': 'a'})), None)
+
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == 'Successfully inserted data'
+    assert server.query('SELECT name FROM energy_efficiency') == [('a',)]
+
+
+def test_json_body_batch_write(server, lambda_write):
+    records = [{'name': f'row-{i}'} for i in range(5)] + [{'name': 1}]
+    response = lambda_write.handler(_proxy_event('POST', body=json.dumps({'records': records, 'chunk_size': 2})), None)
+
+    assert response['statusCode'] == 207
+    body = json.loads(response['body'])
+    assert body['inserted'] == 5
+    assert body['rejected'] == [{'index': 5, 'error': '"name" must be a string'}]
+
+
+def test_base64_body(server, lambda_write):
+    body = base64.b64encode(json.dumps([{'name': 'a'}, {'name': 'b'}]).encode()).decode()
+
+    response = lambda_write.handler(_proxy_event('POST', body=body, base64_encoded=True), None)
+
+    assert response['statusCode'] == 200
+    assert server.query('SELECT name FROM energy_efficiency') == [('a',), ('b',)]
+
+
+@pytest.mark.parametrize('body, base64_encoded, error', [
+    ('{"name": ', False, 'The body of the request is not valid JSON'),
+    ('', False, 'The body of the request is not valid JSON'),
+    ('not base64!', True, 'The body of the request is not valid base64')
+])
+def test_invalid_body(server, lambda_write, body, base64_encoded, error):
+    response = lambda_write.handler(_proxy_event('POST', body=body, base64_encoded=base64_encoded), None)
+
+    assert response['statusCode'] == 400
+    assert json.loads(response['body']) == error
+    assert server.query('SELECT COUNT(*) FROM energy_efficiency') == [(0,)]
+
+
+def test_init_action(server, lambda_init):
+    response = lambda_init.handler(_proxy_event('POST', body=json.dumps({'action': 'delete'})), None)
+    assert response['statusCode'] == 200
+
+    response = lambda_init.handler(_proxy_event('POST', body=json.dumps({})), None)
+    assert response['statusCode'] == 400
+
+
+def _http_api_event(method: str, query: dict = None, body: str = None) -> dict:
+    """
+    Event of the HTTP API integration, payload format 2.0
+    """
+
+    event = {
+        'version': '2.0',
+        'routeKey': f'{method} /energy-efficiency',
+        'rawPath': '/energy-efficiency',
+        'rawQueryString': '&'.join(f'{key}={value}' for key, value in (query or {}).items()),
+        'headers': {'accept-encoding': 'gzip', 'content-type': 'application/json'},
+        'requestContext': {'http': {'method': method, 'path': '/energy-efficiency'}, 'stage': '$default'},
+        'isBase64Encoded': False
+    }
+
+    # Payload 2.0 leaves out the missing query string and body
+    if query:
+        event['queryStringParameters'] = query
+    if body is not None:
+        event['body'] = body
+
+    return event
+
+
+def test_http_api_payload_v2(server, lambda_read, lambda_write):
+    records = [{'name': f'name-{i}'} for i in range(100)]
+    response = lambda_write.handler(_http_api_event('POST', body=json.dumps(records)), None)
+    assert response['statusCode'] == 200
+
+    response = lambda_read.handler(_http_api_event('GET', {'limit': '2', 'after_id': '25'}), None)
+    assert response['statusCode'] == 200
+    assert json.loads(response['body']) == {'items': [{'id': 26, 'name': 'name-0'}, {'id': 27, 'name': 'name-1'}], 'next_cursor': 27}
+
+    response = lambda_read.handler(_http_api_event('GET'), None)
+    assert response['headers']['Content-Encoding'] == 'gzip'
@@ -0,0 +1,125 @@
+import pytest
+
+from futura_runtime import replicas
+
+from tests.unit.mysql_stub import load_handler
+
+
+@pytest.fixture
+def cluster(monkeypatch, runtime, server):
+    """
+    Primary reached through the host of the secret, two replicas reached through DB_READER_HOSTS
+    """
+
+    servers = {
+        'replica-1': server.replica(),
+        'replica-2': server.replica()
+    }
+
+    monkeypatch.setattr(runtime.pymysql, 'connect', lambda **kwargs: servers.get(kwargs['host'], server).connect(**kwargs))
+    monkeypatch.setattr(replicas, 'DB_READER_HOSTS', list(servers))
+    # Deterministic order of the candidate replicas
+    monkeypatch.setattr(replicas.random, 'sample', lambda hosts, k: list(hosts))
+
+    for i in range(1, 4):
+        server.query('INSERT INTO energy_efficiency (name) VALUES (%s)', (f'row-{i}',))
+
+    return servers
+
+
+@pytest.fixture
+def lambda_read(runtime):
+    return load_handler('stacks/energy_efficiency/lambda_read/lambda-handler.py', 'ee_lambda_read')
+
+
+def _read(lambda_read) -> list:
+    response = lambda_read.handler({}, None)
+
+    assert response['statusCode'] == 200
+    return [row['name'] for row in response['body']['items']]
+
+
+def test_reads_go_to_replica(server, cluster, lambda_read):
+    assert _read(lambda_read) == ['row-1', 'row-2', 'row-3']
+    assert _read(lambda_read) == ['row-1', 'row-2', 'row-3']
+
+    assert server.connections_opened == 0
+    assert cluster['replica-1'].connections_opened == 1
+    # The lag is checked when connecting, not on every read
+    assert cluster['replica-1'].statements.count(('execute', 'SHOW REPLICA STATUS')) == 1
+
+
+def test_stale_replica_is_skipped(server, cluster, lambda_read):
+    cluster['replica-1'].replica_lag = replicas.DB_MAX_REPLICA_LAG_SECONDS + 1
+
+    assert _read(lambda_read) == ['row-1', 'row-2', 'row-3']
+
+    assert cluster['replica-1'].connections_opened == 1
+    assert replicas._reader_host == 'replica-2'
+    assert server.connections_opened == 0
+
+
+def test_stopped_replication_counts_as_stale(server, cluster, lambda_read):
+    for replica in cluster.values():
+        replica.replica_lag = None
+
+    assert _read(lambda_read) == ['row-1', 'row-2', 'row-3']
+
+    assert replicas._reader is None
+    assert server.connections_opened == 1
+
+
+def test_fallback_to_primary_when_replicas_are_down(server, cluster, lambda_read):
+    for replica in cluster.values():
+        replica.down = True
+
+    assert _read(lambda_read) == ['row-1', 'row-2', 'row-3']
+    assert _read(lambda_read) == ['row-1', 'row-2', 'row-3']
+
+    assert server.connections_opened == 1
+    # The replicas are not retried before DB_REPLICA_RETRY_SECONDS
+    assert set(replicas._skipped_until) == {'replica-1', 'replica-2'}
+
+
+def test_replica_retried_after_retry_delay(server, cluster, clock, lambda_read):
+    cluster['replica-1'].down = True
+    cluster['replica-2'].down = True
+    _read(lambda_read)
+
+    cluster['replica-1'].down = False
+    clock[0] += replicas.DB_REPLICA_RETRY_SECONDS + 1
+    _read(lambda_read)
+
+    assert replicas._reader_host == 'replica-1'
+    assert cluster['replica-1'].connections_opened == 1
+
+
+def test_replica_falling_behind_is_dropped_at_next_check(server, cluster, clock, lambda_read):
+    _read(lambda_read)
+    assert replicas._reader_host == 'replica-1'
+
+    cluster['replica-1'].replica_lag = replicas.DB_MAX_REPLICA_LAG_SECONDS + 1
+    clock[0] += replicas.DB_REPLICA_CHECK_SECONDS + 1
+    _read(lambda_read)
+
+    assert replicas._reader_host == 'replica-2'
+
+
+def test_lost_replica_connection_reads_from_primary(server, cluster, lambda_read):
+    _read(lambda_read)
+    cluster['replica-1'].drop_connections()
+
+    assert _read(lambda_read) == ['row-1', 'row-2', 'row-3']
+
+    assert server.connections_opened == 1
+    assert replicas._reader is None
+    assert 'replica-1' in replicas._skipped_until
+
+
+def test_writes_stay_on_primary(server, cluster, runtime):
+    lambda_write = load_handler('stacks/energy_efficiency/lambda_write/lambda-handler.py', 'ee_lambda_write')
+
+    assert lambda_write.handler({'name': 'row-4'}, None)['statusCode'] == 200
+
+    assert server.connections_opened == 1
+    assert all(replica.connections_opened == 0 for replica in cluster.values())
@@ -0,0 +1,67 @@
+import boto3
+import pytest
+
+from futura_runtime import secret
+
+from tests.unit.conftest import SECRET
+from tests.unit.mysql_stub import load_handler
+
+
+@pytest.fixture
+def lambda_read(runtime, server):
+    server.password = SECRET['password']
+
+    return load_handler('stacks/smart_traffic/lambda_read/lambda-handler.py', 'st_lambda_read')
+
+
+def test_secret_cached_within_ttl(secrets_manager, runtime, clock):
+    assert secret.get_secret() == SECRET
+    clock[0] += secret.SECRET_TTL_SECONDS - 1
+    assert secret.get_secret() == SECRET
+
+    assert secrets_manager.calls == 1
+
+
+def test_secret_refreshed_after_ttl(secrets_manager, runtime, clock):
+    secret.get_secret()
+    clock[0] += secret.SECRET_TTL_SECONDS
+    secret.get_secret()
+
+    assert secrets_manager.calls == 2
+
+
+def test_secret_parsed_as_json(secrets_manager, runtime):
+    secrets_manager.put_secret('db-secret', dict(SECRET, password="__import__('os')"))
+
+    assert secret.get_secret()['password'] == "__import__('os')"
+
+
+def test_client_created_once(monkeypatch, runtime):
+    created = []
+    monkeypatch.setattr(secret, '_secrets_client', None)
+    monkeypatch.setattr(boto3, 'client', lambda service: created.append(service) or object())
+
+    assert secret.get_secrets_client() is secret.get_secrets_client()
+    assert created == ['secretsmanager']
+
+
+def test_rotated_secret_refreshed_on_access_denied(secrets_manager, server, lambda_read):
+    assert lambda_read.handler({}, None)['statusCode'] == 200
+
+    # Rotation: new password on the server and in Secrets Manager, the warm container still caches the old one
+    server.password = 'rotated'
+    secrets_manager.put_secret('db-secret', dict(SECRET, password='rotated'))
+    server.drop_connections()
+
+    assert lambda_read.handler({}, None)['statusCode'] == 200
+    assert server.connect_kwargs['password'] == 'rotated'
+    assert secrets_manager.calls == 2
+
+
+def test_wrong_credentials_still_fail(secrets_manager, server, lambda_read):
+    server.password = 'something-else'
+
+    response = lambda_read.handler({}, None)
+
+    assert response['statusCode'] == 500
+    assert secrets_manager.calls == 2
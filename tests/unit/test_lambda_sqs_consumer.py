@@ -0,0 +1,112 @@
+import json
+
+import pytest
+
+from futura_runtime import cache
+
+from tests.unit.mysql_stub import load_handler
+
+
+@pytest.fixture
+def lambda_consume(monkeypatch, runtime, server):
+    # UNIQUE lets a test make one message fail with a duplicate key
+    server.query('DROP TABLE energy_efficiency')
+    server.query('CREATE TABLE energy_efficiency (id INT PRIMARY KEY AUTO_INCREMENT, name VARCHAR(255) UNIQUE)')
+    monkeypatch.setattr(cache, 'CACHE_FLUSH_FUNCTION', 'EeLambdaCacheFlush')
+
+    return load_handler('stacks/energy_efficiency/lambda_consume/lambda-handler.py', 'ee_lambda_consume')
+
+
+def _event(*bodies):
+    """
+    SQS event as delivered by the event source, one message per body
+    """
+
+    return {
+        'Records': [
+            {
+                'messageId': f'm{index}',
+                'receiptHandle': f'handle-{index}',
+                'body': body if isinstance(body, str) else json.dumps(body),
+                'attributes': {'ApproximateReceiveCount': '1'},
+                'eventSource': 'aws:sqs',
+                'eventSourceARN': 'arn:aws:sqs:eu-north-1:123456789012:EeWriteQueue'
+            }
+            for index, body in enumerate(bodies)
+        ]
+    }
+
+
+def _names(server):
+    return [row[0] for row in server.query('SELECT name FROM energy_efficiency ORDER BY id')]
+
+
+def _failures(response):
+    return [failure['itemIdentifier'] for failure in response['batchItemFailures']]
+
+
+def test_batch_inserted_with_one_statement(server, lambda_client, lambda_consume):
+    response = lambda_consume.handler(_event({'name': 'a'}, [{'name': 'b'}, {'name': 'c'}], {'records': [{'name': 'd'}]}), None)
+
+    assert response == {'batchItemFailures': []}
+    assert _names(server) == ['a', 'b', 'c', 'd']
+
+    # A single multi-row INSERT for the whole batch, then the cache of the stage is flushed once
+    assert [method for method, _ in server.statements].count('executemany') == 1
+    assert lambda_client.invocations == [('EeLambdaCacheFlush', 'Event', {})]
+
+
+def test_invalid_messages_reported(server, lambda_consume):
+    response = lambda_consume.handler(_event({'name': 'a'}, 'not json', {'name': 1}, [], {'name': 'b'}), None)
+
+    assert _failures(response) == ['m1', 'm2', 'm3']
+    assert _names(server) == ['a', 'b']
+
+
+def test_message_with_an_invalid_record_is_not_written(server, lambda_consume):
+    response = lambda_consume.handler(_event([{'name': 'a'}, {'name': 'x' * 256}], {'name': 'b'}), None)
+
+    assert _failures(response) == ['m0']
+    assert _names(server) == ['b']
+
+
+def test_failing_batch_written_message_by_message(server, lambda_client, lambda_consume):
+    server.query("INSERT INTO energy_efficiency (name) VALUES ('dup')")
+
+    response = lambda_consume.handler(_event({'name': 'a'}, [{'name': 'b'}, {'name': 'dup'}], {'name': 'c'}), None)
+
+    # The failed batch is rolled back, only the message with the duplicate is retried
+    assert _failures(response) == ['m1']
+    assert _names(server) == ['dup', 'a', 'c']
+    assert lambda_client.invocations == [('EeLambdaCacheFlush', 'Event', {})]
+
+
+def test_unreachable_database_fails_whole_batch(server, lambda_client, lambda_consume):
+    server.down = True
+
+    response = lambda_consume.handler(_event({'name': 'a'}, {'name': 'b'}), None)
+
+    assert _failures(response) == ['m0', 'm1']
+    assert lambda_client.invocations == []
+
+
+def test_lost_connection_returns_batch_to_queue(server, lambda_consume):
+    lambda_consume.handler(_event({'name': 'a'}), None)
+    server.drop_connections()
+
+    # Not retried in the invocation, the queue delivers the messages again
+    response = lambda_consume.handler(_event({'name': 'b'}), None)
+
+    assert _failures(response) == ['m0']
+    assert _names(server) == ['a']
+
+    response = lambda_consume.handler(_event({'name': 'b'}), None)
+
+    assert response == {'batchItemFailures': []}
+    assert _names(server) == ['a', 'b']
+    assert server.connections_opened == 2
+
+
+def test_empty_event(server, lambda_client, lambda_consume):
+    assert lambda_consume.handler({'Records': []}, None) == {'batchItemFailures': []}
+    assert lambda_client.invocations == []
@@ -0,0 +1,26 @@
+import json
+
+from tests.unit.mysql_stub import load_handler
+
+
+def _metrics(capsys) -> list:
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith('{"_aws"')]
+
+
+def test_handler_steps_emitted_as_metrics(runtime, capsys):
+    lambda_read = load_handler('stacks/energy_efficiency/lambda_read/lambda-handler.py', 'ee_lambda_read_timing')
+
+    lambda_read.handler({}, None)
+    lambda_read.handler({}, None)
+
+    cold, warm = _metrics(capsys)
+
+    assert cold['ColdStart'] is True
+    assert {'Duration', 'Connect', 'Query'} <= set(cold)
+    assert [m['Name'] for m in cold['_aws']['CloudWatchMetrics'][0]['Metrics']] == list(
+        name for name in cold if name not in ('_aws', 'FunctionName', 'ColdStart')
+    )
+
+    # The warm invocation reuses the connection
+    assert warm['ColdStart'] is False
+    assert 'Connect' not in warm
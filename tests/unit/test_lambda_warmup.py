@@ -0,0 +1,124 @@
+import pytest
+from aws_cdk import assertions
+
+from futura_runtime import replicas, warmup
+
+from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+from tests.benchmark.lambda_warm_start import benchmark
+from tests.unit.mysql_stub import load_handler
+
+
+READ_HANDLER = 'stacks/smart_traffic/lambda_read/lambda-handler.py'
+
+
+@pytest.fixture
+def on_demand(monkeypatch, runtime):
+    monkeypatch.delenv('AWS_LAMBDA_INITIALIZATION_TYPE', raising=False)
+    monkeypatch.setattr(warmup, 'WARMUP_ON_INIT', False)
+
+    return runtime
+
+
+@pytest.fixture
+def provisioned(monkeypatch, on_demand):
+    monkeypatch.setenv('AWS_LAMBDA_INITIALIZATION_TYPE', 'provisioned-concurrency')
+
+    return on_demand
+
+
+def test_on_demand_connects_on_first_invocation(server, secrets_manager, on_demand):
+    lambda_read = load_handler(READ_HANDLER, 'st_lambda_read')
+    assert server.connections_opened == 0
+    assert secrets_manager.calls == 0
+
+    assert lambda_read.handler({}, None)['statusCode'] == 200
+    assert server.connections_opened == 1
+
+
+def test_provisioned_connects_during_init(server, secrets_manager, provisioned):
+    lambda_read = load_handler(READ_HANDLER, 'st_lambda_read')
+    assert server.connections_opened == 1
+    assert secrets_manager.calls == 1
+
+    # The first request reuses the connection and the secret of the init
+    assert lambda_read.handler({}, None)['statusCode'] == 200
+    assert server.connections_opened == 1
+    assert secrets_manager.calls == 1
+
+
+def test_warmup_on_init_for_on_demand(monkeypatch, server, on_demand):
+    monkeypatch.setattr(warmup, 'WARMUP_ON_INIT', True)
+
+    load_handler('stacks/energy_efficiency/lambda_write/lambda-handler.py', 'ee_lambda_write')
+    assert server.connections_opened == 1
+
+
+def test_read_handler_warms_up_the_replica(monkeypatch, server, provisioned):
+    replica = server.replica()
+    monkeypatch.setattr(provisioned.pymysql, 'connect', lambda **kwargs: (replica if kwargs['host'] == 'replica-1' else server).connect(**kwargs))
+    monkeypatch.setattr(replicas, 'DB_READER_HOSTS', ['replica-1'])
+
+    load_handler(READ_HANDLER, 'st_lambda_read')
+
+    assert replicas._reader_host == 'replica-1'
+    assert provisioned._connection is None
+    assert server.connections_opened == 0
+
+
+def test_failed_warmup_does_not_fail_the_init(server, provisioned):
+    server.down = True
+    lambda_read = load_handler(READ_HANDLER, 'st_lambda_read')
+    assert provisioned._connection is None
+
+    server.down = False
+    assert lambda_read.handler({}, None)['statusCode'] == 200
+
+
+def test_no_alias_by_default(app, bastion_key):
+    template = assertions.Template.from_stack(SmartTrafficStack(app, 'st'))
+
+    template.resource_count_is('AWS::Lambda::Alias', 0)
+
+
+def test_read_alias_with_rush_hour_schedules(app, bastion_key):
+    stack = SmartTrafficStack(app, 'st', lambda_provisioned_concurrency=2, lambda_rush_hour_concurrency=8)
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::Lambda::Alias', {
+        'Name': 'live',
+        'ProvisionedConcurrencyConfig': {'ProvisionedConcurrentExecutions': 2}
+    })
+    template.has_resource_properties('AWS::ApplicationAutoScaling::ScalableTarget', {
+        'ScalableDimension': 'lambda:function:ProvisionedConcurrency',
+        'MinCapacity': 2,
+        'MaxCapacity': 8,
+        'ScheduledActions': assertions.Match.array_with([
+            assertions.Match.object_like({
+                'Schedule': 'cron(45 5 ? * MON-FRI *)',
+                'ScalableTargetAction': {'MinCapacity': 8, 'MaxCapacity': 8}
+            }),
+            assertions.Match.object_like({
+                'Schedule': 'cron(0 9 ? * MON-FRI *)',
+                'ScalableTargetAction': {'MinCapacity': 2, 'MaxCapacity': 2}
+            })
+        ])
+    })
+
+    # API Gateway invokes the alias, not the unpublished version of the function
+    api_template = assertions.Template.from_stack(stack.node.find_child('st-api-gateway'))
+    permissions = api_template.find_resources('AWS::Lambda::Permission')
+    assert permissions
+    assert all('lambdareadalias' in str(permission['Properties']['FunctionName']) for permission in permissions.values())
+
+
+def test_provisioned_concurrency_within_reserved_concurrency(app, bastion_key):
+    with pytest.raises(ValueError, match='cannot exceed its reserved concurrency'):
+        SmartTrafficStack(app, 'st', lambda_reserved_concurrency=5, lambda_provisioned_concurrency=2,
+                          lambda_rush_hour_concurrency=8)
+
+
+def test_benchmark_first_invocation_of_provisioned_environment():
+    results = benchmark(READ_HANDLER, samples=1, invocations=3, connect_latency=0.05, secret_latency=0.02)
+
+    assert results['on-demand']['first_invocation_ms'] >= 70
+    assert results['provisioned-concurrency']['first_invocation_ms'] < results['on-demand']['first_invocation_ms']
@@ -0,0 +1,91 @@
+import os
+
+import pytest
+from aws_cdk import aws_lambda as lambda_
+
+from lib import bundling
+from lib.bundling import LocalPythonBundling, requirements_hash
+
+
+RUNTIME = lambda_.Runtime.PYTHON_3_8
+ARCHITECTURE = lambda_.Architecture.X86_64
+
+
+@pytest.fixture
+def entry(tmp_path):
+    entry = tmp_path / 'lambda_read'
+    entry.mkdir()
+    (entry / 'lambda-handler.py').write_text('def handler(event, context):\n    return {}\n')
+    (entry / 'requirements.txt').write_text('pymysql==1.1.0\n')
+    (entry / '__pycache__').mkdir()
+    (entry / '__pycache__' / 'lambda-handler.cpython-38.pyc').write_bytes(b'')
+
+    return entry
+
+
+@pytest.fixture
+def installs(monkeypatch):
+    installs = []
+
+    def install_requirements(requirements_path, target_dir, runtime, architecture):
+        installs.append((requirements_path, runtime.name, architecture.name))
+        os.makedirs(os.path.join(target_dir, 'pymysql'))
+        os.makedirs(os.path.join(target_dir, 'boto3'))
+        return True
+
+    monkeypatch.setattr(bundling, 'install_requirements', install_requirements)
+
+    return installs
+
+
+def bundle(entry, cache_dir, output_dir, **kwargs) -> bool:
+    os.makedirs(output_dir)
+    return LocalPythonBundling(str(entry), RUNTIME, ARCHITECTURE, cache_dir=str(cache_dir), **kwargs).try_bundle(str(output_dir))
+
+
+def test_cache_hit_skips_install(tmp_path, entry, installs):
+    assert bundle(entry, tmp_path / 'cache', tmp_path / 'asset-1')
+    assert bundle(entry, tmp_path / 'cache', tmp_path / 'asset-2')
+
+    assert len(installs) == 1
+    for asset in ('asset-1', 'asset-2'):
+        assert sorted(os.listdir(tmp_path / asset)) == ['lambda-handler.py', 'pymysql', 'requirements.txt']
+
+
+def test_changed_requirements_install_again(tmp_path, entry, installs):
+    bundle(entry, tmp_path / 'cache', tmp_path / 'asset-1')
+    (entry / 'requirements.txt').write_text('pymysql==1.1.1\n')
+    bundle(entry, tmp_path / 'cache', tmp_path / 'asset-2')
+
+    assert len(installs) == 2
+
+
+def test_key_depends_on_architecture(entry):
+    requirements = str(entry / 'requirements.txt')
+
+    assert requirements_hash(requirements, RUNTIME, lambda_.Architecture.X86_64) != \
+        requirements_hash(requirements, RUNTIME, lambda_.Architecture.ARM_64)
+
+
+def test_layer_bundled_under_python(tmp_path, entry, installs):
+    assert bundle(entry, tmp_path / 'cache', tmp_path / 'asset', output_path_suffix='python')
+
+    assert os.listdir(tmp_path / 'asset') == ['python']
+    assert 'pymysql' in os.listdir(tmp_path / 'asset' / 'python')
+
+
+def test_failed_install_falls_back_to_docker(monkeypatch, tmp_path, entry):
+    monkeypatch.setattr(bundling, 'install_requirements', lambda *args: False)
+
+    assert not bundle(entry, tmp_path / 'cache', tmp_path / 'asset')
+    # Nothing is cached, the next synth tries again
+    assert os.listdir(tmp_path / 'cache') == []
+
+
+def test_no_requirements(tmp_path, installs):
+    (tmp_path / 'runtime').mkdir()
+    (tmp_path / 'runtime' / 'module.py').write_text('')
+
+    assert bundle(tmp_path / 'runtime', tmp_path / 'cache', tmp_path / 'asset')
+    assert installs == []
+    assert os.listdir(tmp_path / 'asset') == ['module.py']
@@ -0,0 +1,94 @@
+import json
+
+import pytest
+from aws_cdk import assertions
+
+from lib.manifest import expand_manifest, load_manifest
+
+
+CITIES = {
+    'cities': [
+        {
+            'name': 'Milan',
+            'region': 'eu-central-1',
+            'stacks': ['EnergyEfficiencyStack', 'SmartTrafficStack'],
+            'capacity': {'db_instance_size': 'XLARGE', 'lambda_memory_size': 512, 'ec2_max_capacity': 8}
+        },
+        {
+            'name': 'Oslo',
+            'region': 'eu-north-1'
+        }
+    ]
+}
+
+
+def _manifest(tmp_path, manifest: dict) -> str:
+    path = tmp_path / 'cities.json'
+    path.write_text(json.dumps(manifest))
+
+    return str(path)
+
+
+def test_multi_city_manifest(tmp_path, app, bastion_key):
+    stacks = expand_manifest(app, load_manifest(_manifest(tmp_path, CITIES)))
+
+    assert [(stack.stack_name, stack.region) for stack in stacks] == [
+        ('MilanEnergyEfficiencyStack', 'eu-central-1'),
+        ('MilanSmartTrafficStack', 'eu-central-1'),
+        ('OsloDataAnalyticsStack', 'eu-north-1'),
+        ('OsloEnergyEfficiencyStack', 'eu-north-1'),
+        ('OsloSmartTrafficStack', 'eu-north-1')
+    ]
+
+    milan_ee = assertions.Template.from_stack(stacks[0])
+    milan_ee.has_resource_properties('AWS::RDS::DBInstance', {
+        'DBInstanceClass': 'db.m6i.xlarge'
+    })
+    milan_ee.has_resource_properties('AWS::Lambda::Function', {
+        'FunctionName': 'MilanEeLambdaRead',
+        'MemorySize': 512
+    })
+
+    milan_st = assertions.Template.from_stack(stacks[1])
+    milan_st.has_resource_properties('AWS::AutoScaling::AutoScalingGroup', {
+        'MaxSize': '8'
+    })
+
+    oslo_ee = assertions.Template.from_stack(stacks[3])
+    oslo_ee.has_resource_properties('AWS::RDS::DBInstance', {
+        'DBInstanceClass': 'db.m6i.large'
+    })
+    oslo_ee.has_resource_properties('AWS::Lambda::Function', {
+        'FunctionName': 'OsloEeLambdaRead',
+        'MemorySize': 256
+    })
+    oslo_ee.has_resource_properties('AWS::S3::Bucket', {
+        'BucketName': 'oslo-ee-exports-bucket'
+    })
+
+
+@pytest.mark.parametrize('city, error', [
+    ({'name': 'milan', 'region': 'eu-central-1'}, 'City name "milan" must match'),
+    ({'name': 'Milan', 'region': 'eu-central-1', 'stacks': ['CityStack']}, 'Unknown stack "CityStack"'),
+    ({'name': 'Milan', 'region': 'eu-central-1', 'capacity': {'db_class': 'M6I'}}, 'Unknown capacity "db_class"'),
+    ({'name': 'Milan', 'region': 'eu-central-1', 'capacity': {'db_instance_size': 'HUGE'}},
+     'Invalid db_instance_size "HUGE" for Milan'),
+    ({'name': 'Milan', 'region': 'eu-central-1', 'capacity': {'graviton': 'false'}},
+     'Invalid graviton "false" for Milan, expected a JSON bool'),
+    ({'name': 'Milan', 'region': 'eu-central-1', 'capacity': {'graviton': 0}}, 'Invalid graviton 0 for Milan'),
+    ({'name': 'Milan', 'region': 'eu-central-1', 'capacity': {'lambda_memory_size': '512'}},
+     'Invalid lambda_memory_size "512" for Milan, expected a JSON int'),
+    ({'name': 'Milan', 'region': 'eu-central-1', 'capacity': {'ec2_max_capacity': True}},
+     'Invalid ec2_max_capacity true for Milan'),
+    ({'name': 'Milan', 'region': 'eu-central-1', 'zone': 'a'}, 'Invalid city')
+])
+def test_invalid_city(tmp_path, city, error):
+    with pytest.raises(ValueError, match=error):
+        load_manifest(_manifest(tmp_path, {'cities': [city]}))
+
+
+def test_city_listed_twice(tmp_path):
+    cities = [{'name': 'Milan', 'region': 'eu-central-1'}, {'name': 'Milan', 'region': 'eu-west-1'}]
+
+    with pytest.raises(ValueError, match='City "Milan" is listed more than once'):
+        load_manifest(_manifest(tmp_path, {'cities': cities}))
@@ -0,0 +1,91 @@
+import aws_cdk as cdk
+import pytest
+from aws_cdk import assertions, aws_ec2 as ec2, aws_rds as rds
+
+from lib.dataclasses import DbProxyConfig, ServicePrefix
+from lib.services import create_rds_proxy
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+
+
+def _lambda_env(template: assertions.Template) -> dict:
+    functions = template.find_resources('AWS::Lambda::Function', {
+        'Properties': {'Environment': {'Variables': {'DB_SECRET_ARN': assertions.Match.any_value()}}}
+    })
+
+    return {
+        logical_id: resource['Properties']['Environment']['Variables']
+        for logical_id, resource in functions.items()
+    }
+
+
+def test_create_rds_proxy_pool_settings(app):
+    stack = cdk.Stack(app, 'proxy')
+    vpc = ec2.Vpc(stack, 'vpc', subnet_configuration=[
+        ec2.SubnetConfiguration(name='t-private', subnet_type=ec2.SubnetType.PRIVATE_ISOLATED)
+    ])
+    db = rds.DatabaseInstance(
+        stack,
+        'db',
+        engine=rds.DatabaseInstanceEngine.mysql(version=rds.MysqlEngineVersion.VER_8_0_28),
+        vpc=vpc,
+        vpc_subnets=ec2.SubnetSelection(subnet_group_name='t-private'),
+        credentials=rds.Credentials.from_generated_secret('admin')
+    )
+
+    create_rds_proxy(
+        instance_class=stack,
+        service_prefix=ServicePrefix(id='t-', name='T'),
+        proxy_config=DbProxyConfig(
+            db_instance=db,
+            vpc=vpc,
+            vpc_subnet_id='private',
+            max_connections_percent=80,
+            borrow_timeout=cdk.Duration.seconds(10)
+        )
+    )
+
+    template = assertions.Template.from_stack(stack)
+    template.has_resource_properties('AWS::RDS::DBProxy', {
+        'DBProxyName': 'TRdsProxy',
+        'EngineFamily': 'MYSQL',
+        'IdleClientTimeout': 1800,
+        'RequireTLS': False
+    })
+    template.has_resource_properties('AWS::RDS::DBProxyTargetGroup', {
+        'ConnectionPoolConfigurationInfo': {
+            'ConnectionBorrowTimeout': 10,
+            'MaxConnectionsPercent': 80,
+            'MaxIdleConnectionsPercent': 50
+        }
+    })
+    # The proxy reaches the instance on the MySQL port
+    template.has_resource_properties('AWS::EC2::SecurityGroupIngress', {
+        'Description': 'Allow connections to the database Instance from the Proxy'
+    })
+
+
+def test_stack_without_proxy_connects_to_instance(app):
+    template = assertions.Template.from_stack(EnergyEfficiencyStack(app, 'ee'))
+
+    template.resource_count_is('AWS::RDS::DBProxy', 0)
+    for env in _lambda_env(template).values():
+        assert 'DB_HOST' not in env
+
+
+@pytest.mark.parametrize('stack_class', ['energy_efficiency', 'smart_traffic'])
+def test_stack_with_proxy_routes_lambdas_to_proxy(app, bastion_key, stack_class):
+    if stack_class == 'energy_efficiency':
+        stack = EnergyEfficiencyStack(app, 'ee', enable_db_proxy=True)
+    else:
+        from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+        stack = SmartTrafficStack(app, 'st', enable_db_proxy=True)
+
+    template = assertions.Template.from_stack(stack)
+    template.resource_count_is('AWS::RDS::DBProxy', 1)
+
+    proxy_id = next(iter(template.find_resources('AWS::RDS::DBProxy')))
+    envs = _lambda_env(template)
+
+    assert envs
+    for env in envs.values():
+        assert env['DB_HOST'] == {'Fn::GetAtt': [proxy_id, 'Endpoint']}
@@ -0,0 +1,52 @@
+import pytest
+from aws_cdk import assertions
+
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+
+
+def _stack(app, stack_class: str, **kwargs):
+    if stack_class == 'energy_efficiency':
+        return EnergyEfficiencyStack(app, 'ee', **kwargs)
+
+    from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+    return SmartTrafficStack(app, 'st', **kwargs)
+
+
+def _read_lambda_env(template: assertions.Template) -> dict:
+    functions = template.find_resources('AWS::Lambda::Function', {
+        'Properties': {'Environment': {'Variables': {'EXPORT_BUCKET': assertions.Match.any_value()}}}
+    })
+    assert len(functions) == 1
+
+    return next(iter(functions.values()))['Properties']['Environment']['Variables']
+
+
+@pytest.mark.parametrize('stack_class, prefix', [('energy_efficiency', 'ee-'), ('smart_traffic', 'st-')])
+def test_read_replicas(app, bastion_key, stack_class, prefix):
+    template = assertions.Template.from_stack(_stack(app, stack_class, db_read_replicas=2))
+
+    instances = template.find_resources('AWS::RDS::DBInstance')
+    primary_id = next(logical_id for logical_id, resource in instances.items()
+                      if 'SourceDBInstanceIdentifier' not in resource['Properties'])
+    replicas = [resource for resource in instances.values() if 'SourceDBInstanceIdentifier' in resource['Properties']]
+
+    assert len(replicas) == 2
+    for replica in replicas:
+        assert replica['Properties']['DBInstanceClass'] == 'db.m6i.large'
+        assert replica['Properties']['VPCSecurityGroups'] == instances[primary_id]['Properties']['VPCSecurityGroups']
+
+    reader_hosts = _read_lambda_env(template)['DB_READER_HOSTS']
+    assert reader_hosts['Fn::Join'][0] == ','
+    assert len(reader_hosts['Fn::Join'][1]) == 2
+
+    outputs = template.find_outputs('*', {'Export': {'Name': prefix + 'rds-reader-hosts'}})
+    assert len(outputs) == 1
+    assert next(iter(outputs.values()))['Value'] == reader_hosts
+
+
+def test_no_read_replicas_by_default(app):
+    template = assertions.Template.from_stack(_stack(app, 'energy_efficiency'))
+
+    template.resource_count_is('AWS::RDS::DBInstance', 1)
+    assert 'DB_READER_HOSTS' not in _read_lambda_env(template)
+    assert not template.find_outputs('*', {'Export': {'Name': 'ee-rds-reader-hosts'}})
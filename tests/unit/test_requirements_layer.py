@@ -0,0 +1,89 @@
+import os
+
+import pytest
+import aws_cdk as cdk
+from aws_cdk import (
+    assertions,
+    aws_ec2 as ec2,
+    aws_lambda as lambda_
+)
+
+from lib import bundling
+from lib.dataclasses import LambdaConfig, ServicePrefix
+from lib.services import create_lambda
+
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+
+
+def requirements_layers(template: assertions.Template) -> dict:
+    return {
+        logical_id: layer['Properties']
+        for logical_id, layer in template.find_resources('AWS::Lambda::LayerVersion').items()
+        if 'Requirements-' in layer['Properties']['LayerName']
+    }
+
+
+def layers_of(template: assertions.Template, function_name: str) -> list:
+    functions = template.find_resources('AWS::Lambda::Function', {
+        'Properties': {'FunctionName': function_name}
+    })
+    (function,) = functions.values()
+
+    return [layer['Ref'] for layer in function['Properties']['Layers']]
+
+
+def test_one_layer_per_set_of_requirements(app, bastion_key):
+    template = assertions.Template.from_stack(EnergyEfficiencyStack(app, 'ee'))
+
+    # pymysql for init, write and consume, pymysql with orjson and brotli for read
+    assert len(requirements_layers(template)) == 2
+    assert set(layers_of(template, 'EeLambdaInit')) == set(layers_of(template, 'EeLambdaWrite'))
+    assert set(layers_of(template, 'EeLambdaInit')) != set(layers_of(template, 'EeLambdaRead'))
+
+
+def test_identical_requirements_share_one_asset_across_stacks(app, bastion_key):
+    ee_stack = EnergyEfficiencyStack(app, 'ee')
+    st_stack = SmartTrafficStack(app, 'st')
+    ee = assertions.Template.from_stack(ee_stack)
+    st = assertions.Template.from_stack(st_stack)
+
+    ee_assets = {layer['Content']['S3Key'] for layer in requirements_layers(ee).values()}
+    st_assets = {layer['Content']['S3Key'] for layer in requirements_layers(st).values()}
+
+    assert len(ee_assets) == 2
+    assert ee_assets == st_assets
+
+
+def test_function_package_without_requirements(monkeypatch, tmp_path):
+    monkeypatch.setattr(bundling, 'install_requirements', lambda *args: pytest.fail('installed the requirements'))
+    entry = tmp_path / 'lambda_write'
+    entry.mkdir()
+    (entry / 'lambda-handler.py').write_text('')
+    (entry / 'requirements.txt').write_text('pymysql==1.1.0\n')
+
+    local = bundling.LocalPythonBundling(str(entry), lambda_.Runtime.PYTHON_3_8, lambda_.Architecture.X86_64,
+                                         cache_dir=str(tmp_path / 'cache'), with_requirements=False)
+
+    assert local.try_bundle(str(tmp_path / 'asset'))
+    assert sorted(os.listdir(tmp_path / 'asset')) == ['lambda-handler.py', 'requirements.txt']
+
+
+def test_function_keeps_its_requirements(app, bastion_key):
+    stack = cdk.Stack(app, 'stack')
+    vpc = ec2.Vpc(stack, 'vpc', subnet_configuration=[
+        ec2.SubnetConfiguration(name='t-private', subnet_type=ec2.SubnetType.PRIVATE_ISOLATED)
+    ])
+
+    create_lambda(stack, ServicePrefix(id='t-', name='T'), LambdaConfig(
+        id='lambda-write',
+        name='LambdaWrite',
+        description='',
+        code_folder_path='stacks/energy_efficiency/lambda_write',
+        index_file_name='lambda-handler.py',
+        vpc=vpc,
+        vpc_subnet_id='private',
+        requirements_layer=False
+    ))
+
+    assertions.Template.from_stack(stack).resource_count_is('AWS::Lambda::LayerVersion', 0)
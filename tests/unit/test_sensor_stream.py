@@ -0,0 +1,50 @@
+from aws_cdk import assertions
+
+from stacks.smart_traffic.smart_traffic_stack import SmartTrafficStack
+
+
+def test_sensor_stream_and_archive(app, bastion_key):
+    stack = SmartTrafficStack(app, 'st', sensor_stream_shards=4, sensor_events_archive=True)
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::Kinesis::Stream', {
+        'Name': 'StSensorStream',
+        'ShardCount': 4,
+        'StreamEncryption': {
+            'EncryptionType': 'KMS'
+        }
+    })
+    template.has_resource_properties('AWS::KinesisFirehose::DeliveryStream', {
+        'DeliveryStreamType': 'KinesisStreamAsSource',
+        'ExtendedS3DestinationConfiguration': {
+            'Prefix': 'sensor-events/!{timestamp:yyyy/MM/dd/HH}/',
+            'CompressionFormat': 'GZIP'
+        }
+    })
+    endpoints = template.find_resources('AWS::EC2::VPCEndpoint')
+    assert any('vpcepkinesis' in logical_id for logical_id in endpoints)
+
+    # The listener writes and the AI engine reads the stream named in their user data
+    instances = template.find_resources('AWS::EC2::Instance')
+    for logical_id, instance in instances.items():
+        if 'ec2sensorlistener' in logical_id or 'ec2aiengine' in logical_id:
+            assert 'SENSOR_STREAM_NAME=' in str(instance['Properties']['UserData'])
+
+    statements = [
+        statement
+        for policy in template.find_resources('AWS::IAM::Policy').values()
+        for statement in policy['Properties']['PolicyDocument']['Statement']
+    ]
+    actions = {
+        action
+        for statement in statements
+        for action in (statement['Action'] if isinstance(statement['Action'], list) else [statement['Action']])
+    }
+    assert {'kinesis:PutRecords', 'kinesis:GetRecords'} <= actions
+
+
+def test_no_stream_by_default(app, bastion_key):
+    template = assertions.Template.from_stack(SmartTrafficStack(app, 'st'))
+
+    template.resource_count_is('AWS::Kinesis::Stream', 0)
+    template.resource_count_is('AWS::KinesisFirehose::DeliveryStream', 0)
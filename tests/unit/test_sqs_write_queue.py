@@ -0,0 +1,103 @@
+from aws_cdk import Duration, assertions
+
+from stacks.energy_efficiency.energy_efficiency_stack import EnergyEfficiencyStack
+
+
+def _stacks(app, **kwargs):
+    stack = EnergyEfficiencyStack(app, 'ee', **kwargs)
+
+    return stack, stack.node.find_child('ee-api-gateway')
+
+
+def test_queue_and_dead_letter_queue(app):
+    stack, _ = _stacks(app, async_writes=True)
+    template = assertions.Template.from_stack(stack)
+
+    template.resource_count_is('AWS::SQS::Queue', 2)
+    # No method routes to the write function, the consumer inserts the queued writes
+    assert not template.find_resources('AWS::Lambda::Function', {'Properties': {'FunctionName': 'EeLambdaWrite'}})
+    template.has_resource_properties('AWS::SQS::Queue', {
+        'QueueName': 'EeWriteQueue',
+        'VisibilityTimeout': 360,
+        'RedrivePolicy': {
+            'deadLetterTargetArn': assertions.Match.any_value(),
+            'maxReceiveCount': 5
+        }
+    })
+
+
+def test_consumer_event_source(app):
+    stack, _ = _stacks(app, async_writes=True, async_batch_size=50, async_batching_window=Duration.seconds(2))
+    template = assertions.Template.from_stack(stack)
+
+    template.has_resource_properties('AWS::Lambda::EventSourceMapping', {
+        'BatchSize': 50,
+        'MaximumBatchingWindowInSeconds': 2,
+        'FunctionResponseTypes': ['ReportBatchItemFailures']
+    })
+    template.has_resource_properties('AWS::Lambda::Function', {
+        'FunctionName': 'EeLambdaConsume',
+        'Timeout': 60
+    })
+
+
+def test_post_sends_to_queue(app):
+    _, api_stack = _stacks(app, async_writes=True, api_cache_ttl=Duration.seconds(5))
+    template = assertions.Template.from_stack(api_stack)
+
+    template.has_resource_properties('AWS::ApiGateway::Method', {
+        'HttpMethod': 'POST',
+        'Integration': {
+            'Type': 'AWS',
+            'IntegrationHttpMethod': 'POST',
+            'PassthroughBehavior': 'NEVER',
+            'RequestTemplates': {
+                'application/json': 'Action=SendMessage&MessageBody=$util.urlEncode($input.body)'
+            },
+            'IntegrationResponses': assertions.Match.array_with([
+                assertions.Match.object_like({'StatusCode': '202'})
+            ])
+        }
+    })
+    template.has_resource_properties('AWS::IAM::Policy', {
+        'PolicyDocument': {
+            'Statement': assertions.Match.array_with([
+                assertions.Match.object_like({
+                    'Action': assertions.Match.array_with(['sqs:SendMessage'])
+                })
+            ])
+        }
+    })
+
+    # The consumer flushes the cache of the stage, the write function is no longer behind the API
+    policies = template.find_resources('AWS::IAM::Policy')
+    assert any('apigwcacheinvalidationeelambdaconsume' in logical_id for logical_id in policies)
+    assert not any('apigwcacheinvalidationeelambdawrite' in logical_id for logical_id in policies)
+
+
+def test_http_api_route_sends_to_queue(app):
+    _, api_stack = _stacks(app, async_writes=True, http_api=True)
+    template = assertions.Template.from_stack(api_stack)
+
+    template.has_resource_properties('AWS::ApiGatewayV2::Integration', {
+        'IntegrationType': 'AWS_PROXY',
+        'IntegrationSubtype': 'SQS-SendMessage',
+        'PayloadFormatVersion': '1.0',
+        'RequestParameters': {
+            'QueueUrl': assertions.Match.any_value(),
+            'MessageBody': '$request.body'
+        }
+    })
+    template.has_resource_properties('AWS::ApiGatewayV2::Route', {
+        'RouteKey': 'POST /energy-efficiency'
+    })
+
+
+def test_synchronous_writes_by_default(app):
+    stack, api_stack = _stacks(app)
+
+    assertions.Template.from_stack(stack).resource_count_is('AWS::SQS::Queue', 0)
+    assertions.Template.from_stack(stack).has_resource_properties('AWS::Lambda::Function', {'FunctionName': 'EeLambdaWrite'})
+    assertions.Template.from_stack(stack).resource_count_is('AWS::Lambda::EventSourceMapping', 0)
+    roles = assertions.Template.from_stack(api_stack).find_resources('AWS::IAM::Role')
+    assert not any('sqsrole' in logical_id for logical_id in roles)
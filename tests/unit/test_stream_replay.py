@@ -0,0 +1,115 @@
+import json
+import threading
+
+from lib import stream_replay
+
+
+def _events(sensors: int = 8, per_sensor: int = 25):
+    return [
+        {'sensor_id': f'sensor-{sensor}', 'seq': seq, 'vehicles': seq % 7}
+        for seq in range(per_sensor)
+        for sensor in range(sensors)
+    ]
+
+
+class RecordingConsumer:
+    def __init__(self, fail_once: set = None):
+        self.received = []
+        self.threads = set()
+        self.fail_once = set(fail_once or ())
+        self._lock = threading.Lock()
+
+    def __call__(self, event, context):
+        failures = []
+
+        with self._lock:
+            self.threads.add(threading.get_ident())
+
+            for record in event['Records']:
+                decoded = stream_replay.decode_record(record)
+                key = (decoded['sensor_id'], decoded['seq'])
+
+                if key in self.fail_once:
+                    self.fail_once.discard(key)
+                    failures.append({'itemIdentifier': record['kinesis']['sequenceNumber']})
+                    break
+
+                self.received.append(key)
+
+        return {'batchItemFailures': failures}
+
+
+def test_shard_for_is_stable_and_in_range():
+    shards = {stream_replay.shard_for(f'sensor-{i}', 4) for i in range(100)}
+
+    assert shards == {0, 1, 2, 3}
+    assert stream_replay.shard_for('sensor-1', 4) == stream_replay.shard_for('sensor-1', 4)
+    assert stream_replay.shard_for('sensor-1', 1) == 0
+
+
+def test_partition_keeps_a_sensor_on_one_shard_in_order():
+    shards = stream_replay.partition(_events(), 4)
+
+    for records in shards:
+        by_sensor = {}
+
+        for record in records:
+            event = stream_replay.decode_record(record)
+            by_sensor.setdefault(event['sensor_id'], []).append(event['seq'])
+
+        for seqs in by_sensor.values():
+            assert seqs == sorted(seqs)
+
+    sensors_per_shard = [
+        {stream_replay.decode_record(record)['sensor_id'] for record in records}
+        for records in shards
+    ]
+    for i, sensors in enumerate(sensors_per_shard):
+        for other in sensors_per_shard[i + 1:]:
+            assert not sensors & other
+
+
+def test_replay_delivers_every_event_in_parallel():
+    consumer = RecordingConsumer()
+
+    result = stream_replay.replay(_events(), consumer, shard_count=4, batch_size=10)
+
+    assert result['events'] == 200
+    assert result['failed'] == 0
+    assert len(result['shards']) == 4
+    assert sorted(consumer.received) == sorted((e['sensor_id'], e['seq']) for e in _events())
+
+
+def test_failed_record_delivered_again_in_order():
+    consumer = RecordingConsumer(fail_once={('sensor-0', 3)})
+
+    result = stream_replay.replay(_events(sensors=1, per_sensor=10), consumer, batch_size=4)
+
+    assert result['failed'] == 0
+    assert [seq for _, seq in consumer.received] == list(range(10))
+
+
+def test_failed_record_skipped_after_max_retries():
+    def consumer(event, context):
+        return {'batchItemFailures': [
+            {'itemIdentifier': record['kinesis']['sequenceNumber']}
+            for record in event['Records']
+            if stream_replay.decode_record(record)['seq'] == 2
+        ]}
+
+    result = stream_replay.replay(_events(sensors=1, per_sensor=5), consumer, batch_size=5, max_retries=1)
+
+    # The failed record and the ones after it in its batch are given up
+    assert result['failed'] == 3
+    assert result['batches'] == 2
+
+
+def test_cli_replays_a_recorded_file(tmp_path, capsys):
+    path = tmp_path / 'events.ndjson'
+    path.write_text('\n'.join(json.dumps(event) for event in _events(sensors=2, per_sensor=3)) + '\n\n')
+
+    stream_replay.main([str(path), '--shards', '2', '--batch-size', '2'])
+
+    result = json.loads(capsys.readouterr().out)
+    assert result['events'] == 6
+    assert result['failed'] == 0
@@ -0,0 +1,78 @@
+import os
+import json
+import subprocess
+import sys
+
+import pytest
+
+from lib.synth import DEPLOY_COMMAND, STACKS, synthesize
+
+
+def templates(results: list) -> dict:
+    """
+    Templates of the assemblies, nested stacks included, by stack, region and file name
+    """
+
+    contents = {}
+
+    for result in results:
+        for name in sorted(os.listdir(result['assembly'])):
+            if name.endswith('.template.json'):
+                with open(os.path.join(result['assembly'], name)) as f:
+                    contents[(result['stack'], result['region'], name)] = f.read()
+
+    return contents
+
+
+def test_parallel_and_serial_synth_identical(tmp_path, bastion_key):
+    regions = ['eu-north-1', 'eu-central-1']
+
+    serial = synthesize(regions=regions, outdir=str(tmp_path / 'serial'), workers=1, bundling=False)
+    parallel = synthesize(regions=regions, outdir=str(tmp_path / 'parallel'), workers=3, bundling=False)
+
+    assert [(result['stack'], result['region']) for result in parallel] == \
+        [(stack, region) for region in regions for stack in STACKS]
+    assert len(templates(serial)) > len(serial)
+    assert templates(parallel) == templates(serial)
+    assert all(result['synth_s'] > 0 for result in parallel)
+
+
+def test_subset_does_not_import_the_other_stacks(tmp_path, bastion_key):
+    script = (
+        'import sys\n'
+        'from lib.synth import synthesize\n'
+        f'synthesize(["EnergyEfficiencyStack"], outdir={str(tmp_path)!r}, workers=1, bundling=False)\n'
+        'print(sorted(name for name in sys.modules if name.startswith("stacks.")))\n'
+    )
+
+    output = subprocess.run([sys.executable, '-c', script], check=True, capture_output=True, text=True).stdout
+
+    assert 'stacks.energy_efficiency.energy_efficiency_stack' in output
+    assert 'stacks.smart_traffic' not in output
+    assert 'stacks.data_analytics' not in output
+
+
+def test_unknown_stack(tmp_path):
+    with pytest.raises(ValueError, match='Unknown stack "CityStack"'):
+        synthesize(['CityStack'], outdir=str(tmp_path))
+
+
+def test_global_names_unique_across_regions(tmp_path, bastion_key):
+    regions = ['eu-north-1', 'eu-central-1']
+    results = synthesize(regions=regions, outdir=str(tmp_path), workers=1, bundling=False)
+
+    # IAM role names are unique in the account, bucket names in S3
+    names = {region: set() for region in regions}
+    for (_, region, _), template in templates(results).items():
+        for resource in json.loads(template).get('Resources', {}).values():
+            for key in ('RoleName', 'BucketName'):
+                if isinstance(resource.get('Properties', {}).get(key), str):
+                    names[region].add(resource['Properties'][key])
+
+    assert 'EuNorth1StEc2Role' in names['eu-north-1']
+    assert 'eu-central-1-ee-exports-bucket' in names['eu-central-1']
+    assert not names['eu-north-1'] & names['eu-central-1']
+
+
+def test_deploy_asks_for_approval():
+    assert '--require-approval' not in DEPLOY_COMMAND
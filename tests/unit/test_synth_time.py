@@ -0,0 +1,98 @@
+import json
+import os
+
+from lib.synth import STACKS
+from tests.benchmark.synth_time import (
+    TEMPLATE_METRICS, bastion_key, find_regressions, load_budget, measure_templates, update_budget
+)
+
+
+BUDGET = {
+    'threshold': 0.25,
+    'stacks': {
+        'EnergyEfficiencyStack': {'construct_s': 2.0, 'synth_s': 1.0, 'template_bytes': 100000, 'resources': 80}
+    }
+}
+
+
+def _result(**metrics) -> dict:
+    return {'import_s': 1.0, 'construct_s': 2.0, 'synth_s': 1.0, 'template_bytes': 100000, 'resources': 80, **metrics}
+
+
+def test_within_threshold():
+    results = {'EnergyEfficiencyStack': _result(construct_s=2.4, resources=99)}
+
+    assert find_regressions(results, BUDGET) == {}
+
+
+def test_over_threshold():
+    results = {'EnergyEfficiencyStack': _result(synth_s=1.3, template_bytes=130000)}
+
+    assert find_regressions(results, BUDGET) == {'EnergyEfficiencyStack': ['synth_s', 'template_bytes']}
+
+
+def test_stack_without_baseline_not_checked():
+    results = {'SmartTrafficStack': _result(construct_s=60.0)}
+
+    assert find_regressions(results, BUDGET) == {}
+
+
+def test_nested_templates_measured(tmp_path):
+    templates = {
+        'EnergyEfficiencyStack.template.json': {'Resources': {
+            'Vpc': {'Type': 'AWS::EC2::VPC'},
+            'Read': {'Type': 'AWS::Lambda::Function'},
+            'Write': {'Type': 'AWS::Lambda::Function'}
+        }},
+        'EnergyEfficiencyStackeeapigateway.nested.template.json': {'Resources': {
+            'Api': {'Type': 'AWS::ApiGateway::RestApi'}
+        }}
+    }
+
+    for name, template in templates.items():
+        (tmp_path / name).write_text(json.dumps(template))
+    (tmp_path / 'manifest.json').write_text('{}')
+
+    measures = measure_templates(str(tmp_path))
+
+    assert measures['resources'] == 4
+    assert measures['resource_types'] == {
+        'AWS::Lambda::Function': 2,
+        'AWS::EC2::VPC': 1,
+        'AWS::ApiGateway::RestApi': 1
+    }
+    assert measures['template_bytes'] == sum(len(json.dumps(template)) for template in templates.values())
+
+
+def test_committed_baselines_cover_every_stack():
+    budget = load_budget()
+
+    # Without a baseline a stack is not checked
+    assert sorted(budget['stacks']) == sorted(STACKS)
+    for baseline in budget['stacks'].values():
+        assert all(baseline.get(metric, 0) > 0 for metric in TEMPLATE_METRICS)
+
+
+def test_update_records_template_metrics(tmp_path):
+    path = tmp_path / 'synth_budget.json'
+    path.write_text(json.dumps({'threshold': 0.25, 'stacks': {}}))
+
+    update_budget({'EnergyEfficiencyStack': _result()}, str(path))
+
+    assert load_budget(str(path))['stacks'] == {'EnergyEfficiencyStack': {'template_bytes': 100000, 'resources': 80}}
+
+
+def test_bastion_key_placeholder(tmp_path):
+    path = str(tmp_path / 'ec2-bastion-host.pem')
+
+    with bastion_key(path):
+        assert os.path.exists(path)
+    assert not os.path.exists(path)
+
+    # An existing key is left alone
+    with open(path, 'w') as f:
+        f.write('key')
+    with bastion_key(path):
+        pass
+    with open(path) as f:
+        assert f.read() == 'key'